@@ -2,9 +2,9 @@ import os
 import time
 from urllib.parse import urlencode
 
+import aiohttp
 import humanize
 import psutil
-import requests
 import uptime
 from discord.ext import commands
 from discord.ext.commands import Context
@@ -12,6 +12,7 @@ from discord.ext.commands import hybrid_command
 
 from rocketwatch import RocketWatch
 from utils import readable
+from utils.blocking import run_blocking
 from utils.cfg import cfg
 from utils.embeds import Embed
 from utils.embeds import el_explorer_url
@@ -36,13 +37,15 @@ class About(commands.Cog):
 
         if api_key := cfg.get("other.secrets.wakatime"):
             try:
-                code_time = requests.get(
-                    "https://wakatime.com/api/v1/users/current/all_time_since_today",
-                     params={
-                         "project": "rocketwatch",
-                         "api_key": api_key
-                     }
-                ).json()["data"]["text"]
+                async with aiohttp.ClientSession() as session:
+                    resp = await session.get(
+                        "https://wakatime.com/api/v1/users/current/all_time_since_today",
+                        params={
+                            "project": "rocketwatch",
+                            "api_key": api_key
+                        }
+                    )
+                    code_time = (await resp.json())["data"]["text"]
             except Exception as err:
                 await self.bot.report_error(err)
 
@@ -56,7 +59,8 @@ class About(commands.Cog):
                           f"{humanize.intcomma(sum(guild.member_count for guild in g))} Members reached!",
                     inline=False)
 
-        address = el_explorer_url(cfg["rocketpool.manual_addresses.rocketStorage"])
+        # resolving the address profile hits the node
+        address = await run_blocking(el_explorer_url, cfg["rocketpool.manual_addresses.rocketStorage"])
         e.add_field(name="Storage Contract", value=address)
 
         e.add_field(name="Chain", value=cfg["rocketpool.chain"].capitalize())
@@ -78,11 +82,13 @@ class About(commands.Cog):
 
         # show credits
         try:
-            contributors = [
-                f"[{c['login']}]({c['html_url']}) ({c['contributions']})"
-                for c in requests.get("https://api.github.com/repos/InvisibleSymbol/rocketwatch/contributors").json()
-                if "bot" not in c["login"].lower()
-            ]
+            async with aiohttp.ClientSession() as session:
+                resp = await session.get("https://api.github.com/repos/InvisibleSymbol/rocketwatch/contributors")
+                contributors = [
+                    f"[{c['login']}]({c['html_url']}) ({c['contributions']})"
+                    for c in await resp.json()
+                    if "bot" not in c["login"].lower()
+                ]
             contributors_str = ", ".join(contributors[:10])
             if len(contributors) > 10:
                 contributors_str += " and more"
@@ -3,22 +3,23 @@ from datetime import datetime
 from decimal import Decimal
 from io import BytesIO
 
-import matplotlib.pyplot as plt
 from discord import File
 from discord.ext import commands, tasks
 from discord.ext.commands import Context
 from discord.ext.commands import hybrid_command
-from matplotlib.dates import DateFormatter
-from motor.motor_asyncio import AsyncIOMotorClient
 
 from rocketwatch import RocketWatch
 from utils import solidity
 from utils.cfg import cfg
+from utils.lazy_import import lazy_import
 from utils.embeds import Embed
 from utils.rocketpool import rp
 from utils.shared_w3 import w3, historical_w3
 from utils.visibility import is_hidden
 
+plt = lazy_import("matplotlib.pyplot")
+mdates = lazy_import("matplotlib.dates")
+
 log = logging.getLogger("apr")
 log.setLevel(cfg["log_level"])
 
@@ -43,7 +44,7 @@ def get_duration(d1, d2):
 class APR(commands.Cog):
     def __init__(self, bot: RocketWatch):
         self.bot = bot
-        self.db = AsyncIOMotorClient(cfg["mongodb.uri"]).rocketwatch
+        self.db = bot.db
         self.loop.start()
     
     def cog_unload(self):
@@ -223,7 +224,7 @@ class APR(commands.Cog):
         plt.xlim(left=x[38])
         plt.xticks(rotation=45)
         old_formatter = plt.gca().xaxis.get_major_formatter()
-        plt.gca().xaxis.set_major_formatter(DateFormatter("%b %d"))
+        plt.gca().xaxis.set_major_formatter(mdates.DateFormatter("%b %d"))
 
         ax2.yaxis.set_major_formatter(plt.FuncFormatter(lambda x, loc: "{:.1%}".format(x)))
         ax1.yaxis.set_major_formatter(plt.FuncFormatter(lambda x, loc: "{:.1%}".format(x)))
@@ -403,7 +404,7 @@ class APR(commands.Cog):
         plt.xticks(rotation=0)
         plt.ylim(bottom=0.02)
         old_formatter = plt.gca().xaxis.get_major_formatter()
-        plt.gca().xaxis.set_major_formatter(DateFormatter("%m.%d"))
+        plt.gca().xaxis.set_major_formatter(mdates.DateFormatter("%m.%d"))
 
         ax1.yaxis.set_major_formatter(plt.FuncFormatter(lambda x, loc: "{:.1%}".format(x)))
         ax1.legend(loc="lower left")
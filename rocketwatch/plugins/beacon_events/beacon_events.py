@@ -1,7 +1,9 @@
+import itertools
 import logging
-from typing import Optional, cast
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, Iterator, Optional, cast
 
-import pymongo
 import requests
 import eth_utils
 from eth_typing import BlockNumber
@@ -13,9 +15,10 @@ from utils.cfg import cfg
 from utils.embeds import assemble, prepare_args
 from utils.readable import cl_explorer_url
 from utils.rocketpool import rp
-from utils.shared_w3 import bacon, w3
+from utils.shared_w3 import bacon, bacons, w3
 from utils.solidity import date_to_beacon_block, beacon_block_to_date
 from utils.event import EventPlugin, Event
+from utils.minipool_index import minipool_index
 from utils.block_time import ts_to_block
 from utils.retry import retry
 
@@ -26,8 +29,10 @@ log.setLevel(cfg["log_level"])
 class BeaconEvents(EventPlugin):
     def __init__(self, bot: RocketWatch):
         super().__init__(bot)
-        self.db = pymongo.MongoClient(cfg["mongodb.uri"]).rocketwatch
+        self.db = bot.sync_db
         self.finality_delay_threshold = 3
+        self.slot_fetch_workers = cfg.get("consensus_layer.slot_fetch.workers", 8)
+        self.slot_prefetch = cfg.get("consensus_layer.slot_fetch.prefetch", 32)
 
     def _get_new_events(self) -> list[Event]:
         from_block = self.last_served_block + 1 - self.lookback_distance
@@ -39,35 +44,66 @@ class BeaconEvents(EventPlugin):
         log.info(f"Checking for new beacon chain events in slot range [{from_slot}, {to_slot}]")
 
         events: list[Event] = []
-        for slot_number in range(from_slot, to_slot-1):
-            events.extend(self._get_events_for_slot(slot_number, check_finality=False))
-
-        # quite expensive and only really makes sense to check toward the head of the chain
-        events.extend(self._get_events_for_slot(to_slot, check_finality=True))
+        beacon_blocks = self._fetch_beacon_blocks(range(from_slot, to_slot + 1))
+        while window := list(itertools.islice(beacon_blocks, self.slot_prefetch)):
+            # missed slots come back as None
+            window = [b for b in window if b is not None]
+            slashings = {int(b["slot"]): self._extract_slashings(b) for b in window}
+            minipools = minipool_index.get_many({
+                int(index)
+                for b in window
+                for index in [b["proposer_index"]] + [s["minipool"] for s in slashings[int(b["slot"])]]
+            })
+
+            for beacon_block in window:
+                slot_number = int(beacon_block["slot"])
+                events.extend(self._get_slashing_events(slashings[slot_number], minipools))
+                if proposal_event := self._get_proposal(beacon_block, minipools):
+                    events.append(proposal_event)
+
+                # quite expensive and only really makes sense to check toward the head of the chain
+                if slot_number == to_slot and (finality_delay_event := self._check_finality(beacon_block)):
+                    events.append(finality_delay_event)
 
         log.debug("Finished checking beacon chain events")
         return events
 
-    def _get_events_for_slot(self, slot_number: int, *, check_finality: bool) -> list[Event]:
+    def _fetch_beacon_block(self, slot_number: int, client=bacon) -> Optional[dict]:
         try:
-            log.debug(f"Checking slot {slot_number}")
-            beacon_block = bacon.get_block(slot_number)["data"]["message"]
-        except ValueError as err:
-            if err.args[0] == "Block does not exist":
+            log.debug(f"Fetching slot {slot_number}")
+            return client.get_block(slot_number)["data"]["message"]
+        except Exception as err:
+            if client is not bacon:
+                # secondary endpoints may lag behind, let the primary (and its fallbacks) decide
+                log.debug(f"Failed to fetch slot {slot_number} from {client.base_url}: {err!r}")
+                return self._fetch_beacon_block(slot_number)
+            if isinstance(err, ValueError) and err.args and err.args[0] == "Block does not exist":
                 log.error(f"Beacon block {slot_number} not found, skipping.")
-                return []
+                return None
             raise err
 
-        events = self._get_slashings(beacon_block)
-        if proposal_event := self._get_proposal(beacon_block):
-            events.append(proposal_event)
-
-        if check_finality and (finality_delay_event := self._check_finality(beacon_block)):
-            events.append(finality_delay_event)
-
-        return events
-
-    def _get_slashings(self, beacon_block: dict) -> list[Event]:
+    def _fetch_beacon_blocks(self, slots: Iterable[int]) -> Iterator[Optional[dict]]:
+        """
+        Fetch beacon blocks concurrently, spread round-robin over all consensus layer endpoints.
+        Keeps up to slot_prefetch requests in flight and yields blocks in slot order.
+        """
+        executor = ThreadPoolExecutor(max_workers=self.slot_fetch_workers)
+        pending = deque()
+        try:
+            for i, slot_number in enumerate(slots):
+                client = bacons[i % len(bacons)]
+                pending.append(executor.submit(self._fetch_beacon_block, slot_number, client))
+                if len(pending) >= self.slot_prefetch:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+        finally:
+            for future in pending:
+                future.cancel()
+            executor.shutdown(wait=True)
+
+    @staticmethod
+    def _extract_slashings(beacon_block: dict) -> list[dict]:
         slot = int(beacon_block["slot"])
         timestamp = beacon_block_to_date(slot)
         slashings = []
@@ -89,9 +125,13 @@ class BeaconEvents(EventPlugin):
             "timestamp"    : timestamp
         } for slash in beacon_block["body"]["proposer_slashings"])
 
+        return slashings
+
+    def _get_slashing_events(self, slashings: list[dict], minipools: dict[int, dict]) -> list[Event]:
         events = []
         for slash in slashings:
-            minipool = self.db.minipools.find_one({"validator": int(slash["minipool"])})
+            timestamp = slash["timestamp"]
+            minipool = minipools.get(int(slash["minipool"]))
             if not minipool:
                 log.info(f"Skipping slashing of unknown validator {slash['minipool']}")
                 continue
@@ -120,13 +160,13 @@ class BeaconEvents(EventPlugin):
         return events
 
     @retry(tries=5, delay=10, backoff=2, max_delay=30)
-    def _get_proposal(self, beacon_block: dict) -> Optional[Event]:
+    def _get_proposal(self, beacon_block: dict, minipools: dict[int, dict]) -> Optional[Event]:
         if not (payload := beacon_block["body"].get("execution_payload")):
             # no proposed block
             return None
 
         validator_index = int(beacon_block["proposer_index"])
-        if not (minipool := self.db.minipools.find_one({"validator": validator_index})):
+        if not (minipool := minipools.get(validator_index)):
             # not proposed by a minipool
             return None
 
@@ -1,22 +1,24 @@
 import logging
 import re
 from datetime import datetime, timedelta, timezone
+from functools import cached_property
 from io import BytesIO
 
-import anthropic
 import pytz
-import tiktoken
 from discord import File, DeletedReferencedMessage
 from discord.channel import TextChannel
 from discord.ext import commands
 from discord.ext.commands import Context, is_owner
 from discord.ext.commands import hybrid_command
-from motor.motor_asyncio import AsyncIOMotorClient
 
 from rocketwatch import RocketWatch
 from utils.cfg import cfg
+from utils.lazy_import import lazy_import
 from utils.embeds import Embed
 
+anthropic = lazy_import("anthropic")
+tiktoken = lazy_import("tiktoken")
+
 log = logging.getLogger("chat_summary")
 log.setLevel(cfg["log_level"])
 
@@ -24,10 +26,16 @@ log.setLevel(cfg["log_level"])
 class ChatSummary(commands.Cog):
     def __init__(self, bot: RocketWatch):
         self.bot = bot
-        self.client = anthropic.AsyncAnthropic(api_key=cfg["other.secrets.anthropic"])
-        # log all possible engines
-        self.tokenizer = tiktoken.encoding_for_model("gpt-4-turbo")
-        self.db = AsyncIOMotorClient(cfg["mongodb.uri"]).rocketwatch
+        self.db = bot.db
+
+    # created on first use, so that anthropic and tiktoken aren't imported at load time
+    @cached_property
+    def client(self) -> "anthropic.AsyncAnthropic":
+        return anthropic.AsyncAnthropic(api_key=cfg["other.secrets.anthropic"])
+
+    @cached_property
+    def tokenizer(self) -> "tiktoken.Encoding":
+        return tiktoken.encoding_for_model("gpt-4-turbo")
 
     @classmethod
     def message_to_text(cls, message, index):
@@ -133,7 +141,7 @@ class ChatSummary(commands.Cog):
         prompt = "\n".join([self.message_to_text(message, i) for i, message in enumerate(messages)]).replace("\n\n", "\n")
         return f"{prefix}\n\n{prompt}\n\n{suffix}"
 
-    async def prompt_model(self, channel: TextChannel, prompt: str, cut_off_ts: int) -> tuple[anthropic.types.Message, str, int]:
+    async def prompt_model(self, channel: TextChannel, prompt: str, cut_off_ts: int) -> tuple["anthropic.types.Message", str, int]:
         messages = [message async for message in channel.history(limit=4096) if message.content != ""]
         messages = [message for message in messages if message.author.id != self.bot.user.id]
         messages = [message for message in messages if message.created_at > cut_off_ts]
@@ -2,24 +2,26 @@ import logging
 from io import BytesIO
 
 import inflect
-import matplotlib as mpl
-import matplotlib.pyplot as plt
 import numpy as np
 from discord import File
 from discord.app_commands import describe
 from discord.ext import commands
 from discord.ext.commands import Context, hybrid_command
 from discord.utils import as_chunks
-from matplotlib.ticker import FuncFormatter
 from eth_typing import ChecksumAddress
 
 from rocketwatch import RocketWatch
 from utils import solidity
 from utils.cfg import cfg
+from utils.lazy_import import lazy_import
 from utils.embeds import Embed, resolve_ens
 from utils.rocketpool import rp
 from utils.visibility import is_hidden
 
+mpl = lazy_import("matplotlib")
+plt = lazy_import("matplotlib.pyplot")
+ticker = lazy_import("matplotlib.ticker")
+
 log = logging.getLogger("collateral")
 log.setLevel(cfg["log_level"])
 
@@ -263,7 +265,7 @@ class Collateral(commands.Cog):
             label.label.set_visible(False)
         ax.set_ylim(top=(ax.get_ylim()[1] * 1.1))
         ax.yaxis.set_visible(False)
-        ax.get_xaxis().set_major_formatter(FuncFormatter(
+        ax.get_xaxis().set_major_formatter(ticker.FuncFormatter(
             lambda n, _: f"{x_keys[n] if n < len(x_keys) else 0}{'+' if n == len(x_keys)-1 and cap_collateral else ''}%")
         )
 
@@ -275,7 +277,7 @@ class Collateral(commands.Cog):
         line = ax2.plot(x_keys, [bars.get(int(x), 0) for x in x_keys])
         ax2.set_ylim(top=(ax2.get_ylim()[1] * 1.1))
         ax2.tick_params(axis='y', colors=line[0].get_color())
-        ax2.get_yaxis().set_major_formatter(FuncFormatter(lambda y, _: f"{int(y / 10 ** 3)}k"))
+        ax2.get_yaxis().set_major_formatter(ticker.FuncFormatter(lambda y, _: f"{int(y / 10 ** 3)}k"))
 
         fig.tight_layout()
         ax.legend(rects, ["Node Operators"], loc="upper left")
@@ -2,19 +2,22 @@ import logging
 from io import BytesIO
 
 import numpy as np
-import seaborn as sns
 from discord import File
 from discord.ext import commands
 from discord.ext.commands import Context
 from discord.ext.commands import hybrid_command
-from matplotlib import pyplot as plt
-from motor.motor_asyncio import AsyncIOMotorClient
 
 from rocketwatch import RocketWatch
+from utils.blocking import run_blocking
 from utils.cfg import cfg
+from utils.lazy_import import lazy_import
 from utils.embeds import Embed
+from utils.minipool_index import minipool_index
 from utils.visibility import is_hidden
 
+plt = lazy_import("matplotlib.pyplot")
+sns = lazy_import("seaborn")
+
 log = logging.getLogger("commissions")
 log.setLevel(cfg["log_level"])
 
@@ -22,8 +25,10 @@ log.setLevel(cfg["log_level"])
 class Commissions(commands.Cog):
     def __init__(self, bot: RocketWatch):
         self.bot = bot
-        # connect to local mongodb
-        self.db = AsyncIOMotorClient(cfg["mongodb.uri"]).get_database("rocketwatch")
+
+    async def warm_up(self) -> None:
+        # the initial load scans all minipools, keep it off the event loop
+        await run_blocking(minipool_index.load)
 
     @hybrid_command()
     async def commission_history(self, ctx: Context):
@@ -34,21 +39,21 @@ class Commissions(commands.Cog):
 
         e = Embed(title='Commission History')
 
-        minipools = await self.db.minipools.find().sort("validator", 1).to_list(None)
+        node_fees = minipool_index.get_node_fees()
         # create dot chart of minipools
         # x-axis: validator
         # y-axis: node_fee
         ygrid = list(reversed(range(5, 21)))
-        step_size = int(len(minipools) / len(ygrid) / 2)
+        step_size = int(len(node_fees) / len(ygrid) / 2)
 
         data = [[0] * len(ygrid)]
-        for pool in minipools:
+        for node_fee in node_fees:
             if sum(data[-1]) > step_size:
                 # normalize data
                 # data[-1] = [x / max(data[-1]) for x in data[-1]]
                 data.append([0] * len(ygrid))
             # round to closet ygrid
-            data[-1][ygrid.index(int(round(pool["node_fee"] * 100, 0)))] += 1
+            data[-1][ygrid.index(int(round(node_fee * 100, 0)))] += 1
 
         # normalize data
         # data[-1] = [x / max(data[-1]) for x in data[-1]]
@@ -71,7 +76,7 @@ class Commissions(commands.Cog):
         img.seek(0)
         plt.close()
         e.set_image(url="attachment://chart.png")
-        e.add_field(name="Total Minipools", value=len(minipools))
+        e.add_field(name="Total Minipools", value=len(node_fees))
         e.add_field(name="Bar Width", value=f"{step_size} minipools")
 
         # send data
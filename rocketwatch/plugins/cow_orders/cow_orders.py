@@ -1,7 +1,6 @@
 import logging
 from datetime import datetime, timedelta
 
-import pymongo
 import requests
 from datetime import timezone
 
@@ -25,7 +24,7 @@ class CowOrders(EventPlugin):
     def __init__(self, bot: RocketWatch):
         super().__init__(bot, timedelta(seconds=60))
         self.state = "OK"
-        self.db = pymongo.MongoClient(cfg["mongodb.uri"]).rocketwatch
+        self.db = bot.sync_db
         # create the cow_orders collection if it doesn't exist
         # limit the collection to 10000 entries
         # create an index on order_uid
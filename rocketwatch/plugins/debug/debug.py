@@ -10,7 +10,6 @@ from colorama import Fore, Style
 from discord import File, Object, Interaction
 from discord.app_commands import Choice, command, guilds, describe
 from discord.ext.commands import Cog, is_owner
-from motor.motor_asyncio import AsyncIOMotorClient
 
 from rocketwatch import RocketWatch
 from utils import solidity
@@ -29,7 +28,7 @@ log.setLevel(cfg["log_level"])
 class Debug(Cog):
     def __init__(self, bot: RocketWatch):
         self.bot = bot
-        self.db = AsyncIOMotorClient(cfg["mongodb.uri"]).rocketwatch
+        self.db = bot.db
         self.contract_names = []
         self.function_names = []
 
@@ -256,9 +255,8 @@ class Debug(Cog):
     @guilds(Object(id=cfg["discord.owner.server_id"]))
     @is_owner()
     async def restore_missed_events(self, interaction: Interaction, tx_hash: str):
-        import pickle
-        from datetime import datetime
         from plugins.events.events import Events
+        from utils.event_queue import encode_event
 
         await interaction.response.defer(ephemeral=True)
 
@@ -269,23 +267,12 @@ class Debug(Cog):
             if ("topics" in event_log) and (event_log["topics"][0].hex() in events_plugin.topic_map):
                 filtered_events.append(event_log)
 
-        channels = cfg["discord.channels"]
+        # route like live events, so a restored event lands in the same channel
+        event_core = self.bot.cogs["EventCore"]
         events, _ = events_plugin.process_events(filtered_events)
         for event in events:
-            channel_candidates = [value for key, value in channels.items() if event.event_name.startswith(key)]
-            channel_id = channel_candidates[0] if channel_candidates else channels["default"]
-            await self.db.event_queue.insert_one({
-                "_id": event.unique_id,
-                "embed": pickle.dumps(event.embed),
-                "topic": event.topic,
-                "event_name": event.event_name,
-                "block_number": event.block_number,
-                "score": event.get_score(),
-                "time_seen": datetime.now(),
-                "attachment": pickle.dumps(event.attachment) if event.attachment else None,
-                "channel_id": channel_id,
-                "message_id": None
-            })
+            channel_id = event_core.get_channel_id(event.event_name)
+            await self.db.event_queue.insert_one(await encode_event(self.db, event, channel_id))
             await interaction.followup.send(embed=event.embed)
         await interaction.followup.send(content="Done")
 
@@ -314,6 +301,41 @@ class Debug(Cog):
         a = requests.get("https://www.dotomator.com/api/random_name.json?type=asian").json()["name"]
         await interaction.followup.reply(a)
 
+    @command()
+    @guilds(Object(id=cfg["discord.owner.server_id"]))
+    @is_owner()
+    async def call_cache_stats(self, interaction: Interaction):
+        """
+        Show hit/miss counters of the contract call cache.
+        """
+        await interaction.response.defer(ephemeral=True)
+        info = rp.call_cache_info()
+        lookups = info["hits"] + info["misses"]
+        hit_rate = info["hits"] / lookups if lookups else 0
+        text = (
+            f"Hits: {info['hits']}\n"
+            f"Misses: {info['misses']}\n"
+            f"Hit rate: {hit_rate:.2%}\n"
+            f"Cached (head): {info['head_size']}\n"
+            f"Cached (historical): {info['history_size']}"
+        )
+        await interaction.followup.send(content=f"```{text}```")
+
+    @command()
+    @guilds(Object(id=cfg["discord.owner.server_id"]))
+    @is_owner()
+    async def db_latency_stats(self, interaction: Interaction):
+        """
+        Show per-command latency of database commands.
+        """
+        await interaction.response.defer(ephemeral=True)
+        stats = sorted(self.bot.database.latency.get_stats().items(), key=lambda s: -s[1]["count"] * s[1]["avg_ms"])
+        text = "\n".join(
+            f"{name}: {s['count']}x, avg {s['avg_ms']:.1f}ms, max {s['max_ms']:.0f}ms, {s['failures']} failed"
+            for name, s in stats[:20]
+        ) or "No commands recorded"
+        await interaction.followup.send(content=f"```{text}```")
+
     @command()
     async def get_block_by_timestamp(self, interaction: Interaction, timestamp: int):
         """
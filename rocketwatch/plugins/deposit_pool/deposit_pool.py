@@ -2,12 +2,12 @@ import logging
 
 from discord.ext.commands import Context
 from discord.ext.commands import hybrid_command
-from motor.motor_asyncio import AsyncIOMotorClient
 
 from rocketwatch import RocketWatch
 from plugins.queue.queue import Queue
 from utils.status import StatusPlugin
 from utils import solidity
+from utils.blocking import run_blocking
 from utils.cfg import cfg
 from utils.embeds import Embed
 from utils.rocketpool import rp
@@ -20,25 +20,23 @@ log.setLevel(cfg["log_level"])
 class DepositPool(StatusPlugin):
     def __init__(self, bot: RocketWatch):
         super().__init__(bot)
-        self.db = AsyncIOMotorClient(cfg["mongodb.uri"]).rocketwatch
+        self.db = bot.db
 
     @staticmethod
-    def get_deposit_pool_stats() -> Embed:
-        multicall: dict[str, int] = {
-            res.function_name: res.results[0] for res in rp.multicall.aggregate([
-                rp.get_contract_by_name("rocketDepositPool").functions.getBalance(),
-                rp.get_contract_by_name("rocketDAOProtocolSettingsDeposit").functions.getMaximumDepositPoolSize(),
-                rp.get_contract_by_name("rocketDepositPool").functions.getMaximumDepositAmount(),
-            ]).results
-        }
-
-        dp_balance = solidity.to_float(multicall["getBalance"])
-        deposit_cap = solidity.to_int(multicall["getMaximumDepositPoolSize"])
+    async def get_deposit_pool_stats() -> Embed:
+        balance, max_size, max_deposit = await rp.amulticall([
+            rp.get_function("rocketDepositPool.getBalance"),
+            rp.get_function("rocketDAOProtocolSettingsDeposit.getMaximumDepositPoolSize"),
+            rp.get_function("rocketDepositPool.getMaximumDepositAmount"),
+        ])
+
+        dp_balance = solidity.to_float(balance)
+        deposit_cap = solidity.to_int(max_size)
 
         if deposit_cap - dp_balance < 0.01:
             dp_status = "Capacity reached!"
         else:
-            free_capacity = solidity.to_float(multicall["getMaximumDepositAmount"])
+            free_capacity = solidity.to_float(max_deposit)
             dp_status = f"Enough space for **{free_capacity:,.2f} ETH**."
 
         embed = Embed(title="Deposit Pool Stats")
@@ -47,7 +45,7 @@ class DepositPool(StatusPlugin):
         embed.add_field(name="Status", value=dp_status, inline=False)
 
         display_limit = 3
-        queue_length, queue_content = Queue.get_minipool_queue(display_limit)
+        queue_length, queue_content = await run_blocking(Queue.get_minipool_queue, display_limit)
         if queue_length > 0:
             embed.description = f"**Minipool Queue ({queue_length})**\n"
             embed.description += queue_content
@@ -68,19 +66,17 @@ class DepositPool(StatusPlugin):
         return embed
     
     @staticmethod
-    def get_contract_collateral_stats() -> Embed:
-        multicall: dict[str, int] = {
-            res.function_name: res.results[0] for res in rp.multicall.aggregate([
-                rp.get_contract_by_name("rocketTokenRETH").functions.getExchangeRate(),
-                rp.get_contract_by_name("rocketTokenRETH").functions.totalSupply(),
-                rp.get_contract_by_name("rocketTokenRETH").functions.getCollateralRate(),
-                rp.get_contract_by_name("rocketDAOProtocolSettingsNetwork").functions.getTargetRethCollateralRate(),
-            ]).results
-        }
-
-        total_eth_in_reth: float = multicall["totalSupply"] * multicall["getExchangeRate"] / 10**36
-        collateral_rate: float = solidity.to_float(multicall["getCollateralRate"])
-        collateral_rate_target: float = solidity.to_float(multicall["getTargetRethCollateralRate"])
+    async def get_contract_collateral_stats() -> Embed:
+        exchange_rate, total_supply, collateral_rate, collateral_rate_target = await rp.amulticall([
+            rp.get_function("rocketTokenRETH.getExchangeRate"),
+            rp.get_function("rocketTokenRETH.totalSupply"),
+            rp.get_function("rocketTokenRETH.getCollateralRate"),
+            rp.get_function("rocketDAOProtocolSettingsNetwork.getTargetRethCollateralRate"),
+        ])
+
+        total_eth_in_reth: float = total_supply * exchange_rate / 10**36
+        collateral_rate: float = solidity.to_float(collateral_rate)
+        collateral_rate_target: float = solidity.to_float(collateral_rate_target)
 
         collateral_eth: float = total_eth_in_reth * collateral_rate
         collateral_target_eth: float = total_eth_in_reth * collateral_rate_target
@@ -104,18 +100,18 @@ class DepositPool(StatusPlugin):
     async def deposit_pool(self, ctx: Context) -> None:
         """Show the current deposit pool status"""
         await ctx.defer(ephemeral=is_hidden_weak(ctx))
-        await ctx.send(embed=self.get_deposit_pool_stats())
+        await ctx.send(embed=await self.get_deposit_pool_stats())
 
     @hybrid_command()
     async def reth_extra_collateral(self, ctx: Context) -> None:
         """Show the amount of tokens held in the rETH contract for exit liquidity"""
         await ctx.defer(ephemeral=is_hidden_weak(ctx))
-        await ctx.send(embed=self.get_contract_collateral_stats())
+        await ctx.send(embed=await self.get_contract_collateral_stats())
         
     async def get_status(self) -> Embed:
         embed = Embed(title=":rocket: Live Protocol Status")
 
-        dp_embed = self.get_deposit_pool_stats()
+        dp_embed = await self.get_deposit_pool_stats()
         embed.description = dp_embed.description
         dp_fields = {field.name: field for field in dp_embed.fields}
 
@@ -128,14 +124,14 @@ class DepositPool(StatusPlugin):
         if field := dp_fields.get("Status"):
             embed.add_field(name="Deposits", value=field.value, inline=False)
 
-        collateral_embed = self.get_contract_collateral_stats()
+        collateral_embed = await self.get_contract_collateral_stats()
         embed.add_field(name="Withdrawals", value=collateral_embed.description, inline=False)
         
         if cfg["rocketpool.chain"] != "mainnet":
             return embed
 
-        reth_price = rp.get_reth_eth_price()
-        protocol_rate = solidity.to_float(rp.call("rocketTokenRETH.getExchangeRate"))
+        reth_price = await run_blocking(rp.get_reth_eth_price)
+        protocol_rate = solidity.to_float(await rp.acall("rocketTokenRETH.getExchangeRate"))
         relative_rate_diff = (reth_price / protocol_rate) - 1
         expected_rate_diff = 0.0005
 
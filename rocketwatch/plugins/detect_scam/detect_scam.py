@@ -31,7 +31,6 @@ from discord import (
 )
 from discord.ext.commands import Cog
 from discord.app_commands import command, guilds, ContextMenu
-from motor.motor_asyncio import AsyncIOMotorClient
 
 from rocketwatch import RocketWatch
 from utils.cfg import cfg
@@ -113,7 +112,7 @@ class DetectScam(Cog):
 
     def __init__(self, bot: RocketWatch):
         self.bot = bot
-        self.db = AsyncIOMotorClient(cfg["mongodb.uri"]).get_database("rocketwatch")
+        self.db = bot.db
         
         self._report_lock = asyncio.Lock()
         self._update_lock = asyncio.Lock()
@@ -1,5 +1,4 @@
 import time
-import pickle
 import asyncio
 import logging
 
@@ -11,9 +10,9 @@ from typing import Optional, Any
 
 import pymongo
 from cronitor import Monitor
+from discord import File
 from discord.ext import commands, tasks
 from eth_typing import BlockIdentifier, BlockNumber
-from motor.motor_asyncio import AsyncIOMotorClient
 from web3.datastructures import MutableAttributeDict
 
 from rocketwatch import RocketWatch
@@ -21,7 +20,8 @@ from plugins.support_utils.support_utils import generate_template_embed
 from utils.status import StatusPlugin
 from utils.cfg import cfg
 from utils.embeds import assemble, Embed
-from utils.event import EventPlugin
+from utils.event import EventPlugin, Event
+from utils.event_queue import encode_event, decode_embed, load_image_file
 from utils.shared_w3 import w3
 
 log = logging.getLogger("event_core")
@@ -40,15 +40,32 @@ class EventCore(commands.Cog):
         self.bot = bot
         self.state = self.State.OK
         self.channels = cfg["discord.channels"]
-        self.db = AsyncIOMotorClient(cfg["mongodb.uri"]).rocketwatch
+        self.channel_routes, self.route_prefix_lengths = self._build_channel_routes(self.channels)
+        self.db = bot.db
         self.head_block: BlockIdentifier = cfg["events.genesis"]
         self.block_batch_size = cfg["events.block_batch_size"]
+        self.catch_up_windows = cfg.get("events.catch_up.windows", 8)
+        self.catch_up_workers = cfg.get("events.catch_up.workers", 16)
         self.monitor = Monitor("gather-new-events", api_key=cfg["other.secrets.cronitor"])
         self.loop.start()
 
     def cog_unload(self) -> None:
         self.loop.cancel()
 
+    @staticmethod
+    def _build_channel_routes(channels) -> tuple[dict[str, int], list[int]]:
+        routes = {key: value for key, value in channels.items()}
+        # check longer prefixes first so the most specific route wins
+        prefix_lengths = sorted({len(key) for key in routes}, reverse=True)
+        return routes, prefix_lengths
+
+    def get_channel_id(self, event_name: str) -> int:
+        # select channel dynamically from config based on event_name prefix
+        for length in self.route_prefix_lengths:
+            if (channel_id := self.channel_routes.get(event_name[:length])) is not None:
+                return channel_id
+        return self.channels["default"]
+
     @tasks.loop(seconds=12)
     async def loop(self) -> None:
         p_id = time.time()
@@ -101,7 +118,7 @@ class EventCore(commands.Cog):
             self.head_block = cfg["events.genesis"]
         else:
             # behind chain head, let's see how far
-            last_event_entry = await self.db.event_queue.find().sort(
+            last_event_entry = await self.db.event_queue.find({}, {"block_number": 1}).sort(
                 "block_number", pymongo.DESCENDING
             ).limit(1).to_list(None)
             if last_event_entry:
@@ -111,15 +128,14 @@ class EventCore(commands.Cog):
             if last_checked_entry:
                 self.head_block = max(self.head_block, last_checked_entry["block"])
 
-            if (latest_block - self.head_block) < self.block_batch_size:
-                # close enough to catch up in a single request
-                target_block = "latest"
-                to_block = latest_block
-            else:
-                # too far, advance one batch
-                target_block = self.head_block + self.block_batch_size
-                to_block = target_block
+            if (latest_block - self.head_block) >= self.block_batch_size:
+                # too far behind, replay several windows concurrently
+                await self.catch_up(submodules, latest_block)
+                return
 
+            # close enough to catch up in a single request
+            target_block = "latest"
+            to_block = latest_block
             from_block: BlockNumber = self.head_block + 1
             if to_block < from_block:
                 log.warning(f"Skipping empty block range [{from_block}, {to_block}]")
@@ -131,8 +147,7 @@ class EventCore(commands.Cog):
             for sm in submodules:
                 fn = partial(sm.get_past_events, from_block=from_block, to_block=to_block)
                 gather_fns.append(fn)
-                if target_block == "latest":
-                    sm.start_tracking(to_block + 1)
+                sm.start_tracking(to_block + 1)
 
         log.debug(f"{target_block = }")
 
@@ -141,40 +156,80 @@ class EventCore(commands.Cog):
             futures = [loop.run_in_executor(executor, gather_fn) for gather_fn in gather_fns]
             results = await asyncio.gather(*futures)
 
-        channels = cfg["discord.channels"]
+        await self._store_events([event for result in results for event in result])
+        await self._set_last_checked_block(to_block)
+        self.head_block = target_block
+
+    async def catch_up(self, submodules: list[EventPlugin], latest_block: BlockNumber) -> None:
+        # split backlog into windows, but never run past the chain head
+        windows: list[tuple[BlockNumber, BlockNumber]] = []
+        window_start = self.head_block + 1
+        while len(windows) < self.catch_up_windows:
+            window_end = window_start + self.block_batch_size - 1
+            if window_end > latest_block:
+                break
+            windows.append((window_start, window_end))
+            window_start = window_end + 1
+
+        log.info(
+            f"Catching up on block range [{windows[0][0]}, {windows[-1][1]}] "
+            f"using {len(windows)} windows of {self.block_batch_size} blocks"
+        )
+        start_time = time.time()
+        loop = asyncio.get_running_loop()
+
+        # not a context manager, its shutdown would block the event loop until all windows finished
+        executor = ThreadPoolExecutor(max_workers=self.catch_up_workers)
+        # submit in window order so earlier windows are likely to finish first
+        window_futures = [
+            [
+                loop.run_in_executor(executor, partial(sm.get_past_events, from_block=_from, to_block=_to))
+                for sm in submodules
+            ] for _from, _to in windows
+        ]
+
+        try:
+            # commit strictly in order, a failed window stops all later ones from being committed
+            for (_from, _to), futures in zip(windows, window_futures):
+                results = await asyncio.gather(*futures)
+                await self._store_events([event for result in results for event in result])
+                await self._set_last_checked_block(_to)
+                self.head_block = _to
+
+                blocks_done = _to - windows[0][0] + 1
+                rate = blocks_done / max(time.time() - start_time, 1e-3)
+                log.info(
+                    f"Committed block range [{_from}, {_to}] "
+                    f"({rate:.1f} blocks/s, {latest_block - _to} blocks behind head)"
+                )
+        finally:
+            for future in (f for futures in window_futures for f in futures):
+                future.cancel()
+            # windows already running finish in the background
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    async def _store_events(self, gathered: list[Event]) -> None:
+        known_ids = set(await self.db.event_queue.distinct(
+            "_id", {"_id": {"$in": list({event.unique_id for event in gathered})}}
+        )) if gathered else set()
         events: list[dict[str, Any]] = []
 
-        for result in results:
-            for event in result:
-                if await self.db.event_queue.find_one({"_id": event.unique_id}):
-                    log.debug(f"Event {event} already exists, skipping")
-                    continue
-
-                # select channel dynamically from config based on event_name prefix
-                channel_candidates = [value for key, value in channels.items() if event.event_name.startswith(key)]
-                channel_id = channel_candidates[0] if channel_candidates else channels["default"]
-                events.append({
-                    "_id": event.unique_id,
-                    "embed": pickle.dumps(event.embed),
-                    "topic": event.topic,
-                    "event_name": event.event_name,
-                    "block_number": event.block_number,
-                    "score": event.get_score(),
-                    "time_seen": datetime.now(),
-                    "image": pickle.dumps(event.image) if event.image else None,
-                    "thumbnail": pickle.dumps(event.thumbnail) if event.thumbnail else None,
-                    "channel_id": channel_id,
-                    "message_id": None
-                })
+        for event in gathered:
+            if event.unique_id in known_ids:
+                log.debug(f"Event {event} already exists, skipping")
+                continue
+
+            known_ids.add(event.unique_id)
+            events.append(await encode_event(self.db, event, self.get_channel_id(event.event_name)))
 
         log.info(f"{len(events)} new events gathered, updating DB")
         if events:
             await self.db.event_queue.insert_many(events)
 
-        self.head_block = target_block
-        self.db.last_checked_block.replace_one(
+    async def _set_last_checked_block(self, block_number: BlockNumber) -> None:
+        await self.db.last_checked_block.replace_one(
             {"_id": "events"},
-            {"_id": "events", "block": to_block},
+            {"_id": "events", "block": block_number},
             upsert=True
         )
 
@@ -186,17 +241,17 @@ class EventCore(commands.Cog):
             log.debug("No pending events in queue")
             return
 
-        def try_load(_entry: dict, _key: str) -> Optional[Any]:
+        async def try_load_image(_entry: dict, _key: str, _file_name: str) -> Optional[File]:
             try:
-                serialized = _entry.get(_key)
-                return pickle.loads(serialized) if serialized else None
+                return await load_image_file(self.db, _entry, _key, _file_name)
             except Exception as err:
-                self.bot.report_error(err)
+                await self.bot.report_error(err)
                 return None
 
         for channel_id in channels:
             db_events: list[dict] = await self.db.event_queue.find(
-                {"channel_id": channel_id, "message_id": None}
+                {"channel_id": channel_id, "message_id": None},
+                {"version": 1, "embed": 1, "event_name": 1, "image": 1, "thumbnail": 1}
             ).sort("score", pymongo.ASCENDING).to_list(None)
 
             log.debug(f"Found {len(db_events)} events for channel {channel_id}.")
@@ -208,17 +263,21 @@ class EventCore(commands.Cog):
                 await self.db.state_messages.delete_one({"channel_id": channel_id})
 
             for event_entry in db_events:
-                embed: Optional[Embed] = try_load(event_entry, "embed")
+                try:
+                    embed: Optional[Embed] = decode_embed(event_entry)
+                except Exception as err:
+                    await self.bot.report_error(err)
+                    embed = None
                 files = []
 
-                if embed and (image := try_load(event_entry, "image")):
-                    file_name = f"{event_entry['event_name']}_img.png"
-                    files.append(image.to_file(file_name))
+                file_name = f"{event_entry['event_name']}_img.png"
+                if embed and (image := await try_load_image(event_entry, "image", file_name)):
+                    files.append(image)
                     embed.set_image(url=f"attachment://{file_name}")
 
-                if embed and (thumbnail := try_load(event_entry, "thumbnail")):
-                    file_name = f"{event_entry['event_name']}_thumb.png"
-                    files.append(thumbnail.to_file(file_name))
+                file_name = f"{event_entry['event_name']}_thumb.png"
+                if embed and (thumbnail := await try_load_image(event_entry, "thumbnail", file_name)):
+                    files.append(thumbnail)
                     embed.set_thumbnail(url=f"attachment://{file_name}")
 
                 # post event message
@@ -2,17 +2,17 @@ import json
 import hashlib
 import logging
 import warnings
-from typing import Optional, Callable, Literal
+from dataclasses import dataclass
+from typing import Optional, Callable
 
 from discord import Interaction
 from discord.ext.commands import is_owner
 from discord.app_commands import command, guilds
 from eth_typing import ChecksumAddress, BlockNumber
 from hexbytes import HexBytes
-from web3._utils.filters import Filter
 from web3.datastructures import MutableAttributeDict as aDict
-from web3.exceptions import ABIEventFunctionNotFound
-from web3.types import LogReceipt, EventData, FilterParams
+from web3.exceptions import ABIEventFunctionNotFound, LogTopicError, MismatchedABI
+from web3.types import LogReceipt, EventData, FilterParams, TxReceipt
 
 from rocketwatch import RocketWatch
 from utils import solidity
@@ -20,35 +20,59 @@ from utils.cfg import cfg
 from utils.dao import DefaultDAO, ProtocolDAO
 from utils.embeds import assemble, prepare_args, el_explorer_url, Embed
 from utils.event import EventPlugin, Event
+from utils.event_decoder import EventDecoder, EventDecoderRegistry
 from utils.rocketpool import rp, NoAddressFound
 from utils.shared_w3 import w3, bacon
+from utils.rpc import RequestBatch
 from utils.solidity import SUBMISSION_KEYS
 from utils.block_time import block_to_ts
+from utils.blocking import run_blocking
 
 log = logging.getLogger("events")
 log.setLevel(cfg["log_level"])
 
 
-PartialFilter = Callable[[BlockNumber, BlockNumber | Literal["latest"]], Filter]
+PartialQuery = Callable[[BlockNumber, BlockNumber], list[LogReceipt | EventData]]
+
+
+@dataclass(frozen=True, slots=True)
+class GlobalEventContext:
+    """Receipts and minipool lookups shared by all global events of a batch"""
+    receipts: dict[HexBytes, TxReceipt]
+    minipool_exists: dict[ChecksumAddress, bool]
+    minipool_pubkeys: dict[ChecksumAddress, Optional[bytes]]
+
 
 class Events(EventPlugin):
     def __init__(self, bot: RocketWatch):
         super().__init__(bot)
-        partial_filters, event_map, topic_map = self._parse_event_config()
-        self._partial_filters = partial_filters
+        # filled in warm_up
+        self._partial_queries: list[PartialQuery] = []
+        self.event_map = {}
+        self.topic_map = {}
+        self.event_decoders = EventDecoderRegistry()
+
+    async def warm_up(self) -> None:
+        await super().warm_up()
+        await run_blocking(self._load_event_config)
+
+    def _load_event_config(self) -> None:
+        partial_queries, event_map, topic_map, event_decoders = self._parse_event_config()
+        self._partial_queries = partial_queries
         self.event_map = event_map
         self.topic_map = topic_map
-        self.active_filters: list[Filter] = []
+        self.event_decoders = event_decoders
 
-    def _parse_event_config(self) -> tuple[list[PartialFilter], dict, dict]:
+    def _parse_event_config(self) -> tuple[list[PartialQuery], dict, dict, EventDecoderRegistry]:
         with open("./plugins/events/events.json") as f:
             config = json.load(f)
 
         event_map = {}
         topic_map = {}
-        partial_filters: list[PartialFilter] = []
+        event_decoders = EventDecoderRegistry()
+        partial_queries: list[PartialQuery] = []
 
-        # generate filter for direct events
+        # generate query for direct events
         addresses: set[ChecksumAddress] = set()
         aggregated_topics: set[HexBytes] = set()
         for group in config["direct"]:
@@ -72,35 +96,77 @@ class Events(EventPlugin):
                 aggregated_topics.add(topic)
                 event_map[f"{contract_name}.{event_name}"] = event["name"]
                 topic_map[topic] = event_name
+                event_decoders.register(contract.address, contract.events[event_name].abi)
 
         if addresses:
-            def build_direct_filter(_from: BlockNumber, _to: BlockNumber | Literal["latest"]) -> Filter:
+            def query_direct_events(_from: BlockNumber, _to: BlockNumber) -> list[LogReceipt]:
                 filter_params: FilterParams = {
                     "address"  : list(addresses),
                     "topics"   : [list(aggregated_topics)],
                     "fromBlock": _from,
                     "toBlock"  : _to
                 }
-                return w3.eth.filter(filter_params)
-            partial_filters.append(build_direct_filter)
+                return w3.eth.get_logs(filter_params)
+            partial_queries.append(query_direct_events)
 
-        # generate filters for global events
+        # global events are emitted by arbitrary addresses, so they can't be scoped server-side by address.
+        # all of them share a single topic query and are demultiplexed locally, unless an argument
+        # filter targets an indexed argument, in which case letting the node filter is cheaper.
+        global_decoders: dict[HexBytes, list[tuple[EventDecoder, dict]]] = {}
         for group in config["global"]:
             contract = rp.assemble_contract(name=group["contract_name"])
             for event in group["events"]:
                 event_map[event["event_name"]] = event["name"]
-                def super_builder(_contract, _event) -> PartialFilter:
-                    # this is needed to pin nonlocal variables
-                    def build_topic_filter(_from: BlockNumber, _to: BlockNumber | Literal["latest"]) -> Filter:
-                        return _contract.events[_event["event_name"]].createFilter(
-                            fromBlock=_from,
-                            toBlock=_to,
-                            argument_filters=_event.get("filter", {})
-                        )
-                    return build_topic_filter
-                partial_filters.append(super_builder(contract, event))
-
-        return partial_filters, event_map, topic_map
+                contract_event = contract.events[event["event_name"]]
+                arg_filters = event.get("filter", {})
+                indexed_args = {i["name"] for i in contract_event.abi["inputs"] if i["indexed"]}
+
+                if indexed_args.intersection(arg_filters):
+                    def super_builder(_contract_event, _arg_filters) -> PartialQuery:
+                        # this is needed to pin nonlocal variables
+                        def query_filtered_event(_from: BlockNumber, _to: BlockNumber) -> list[EventData]:
+                            logs = _contract_event.getLogs(argument_filters=_arg_filters, fromBlock=_from, toBlock=_to)
+                            return [e for e in logs if self._matches_arg_filters(e, _arg_filters)]
+                        return query_filtered_event
+                    partial_queries.append(super_builder(contract_event, arg_filters))
+                else:
+                    decoder = EventDecoder(contract_event.abi)
+                    global_decoders.setdefault(decoder.topic, []).append((decoder, arg_filters))
+
+        if global_decoders:
+            def query_global_events(_from: BlockNumber, _to: BlockNumber) -> list[EventData]:
+                filter_params: FilterParams = {
+                    "topics"   : [[topic.hex() for topic in global_decoders]],
+                    "fromBlock": _from,
+                    "toBlock"  : _to
+                }
+                decoded_logs = []
+                for event_log in w3.eth.get_logs(filter_params):
+                    for decoder, arg_filters in global_decoders.get(HexBytes(event_log["topics"][0]), []):
+                        try:
+                            decoded = decoder.decode(event_log)
+                        except (MismatchedABI, LogTopicError):
+                            # unrelated contracts can emit the same signature with a different indexed layout
+                            log.debug(f"Skipping log {event_log} with mismatched ABI")
+                            continue
+                        if self._matches_arg_filters(decoded, arg_filters):
+                            decoded_logs.append(decoded)
+                            break
+                return decoded_logs
+            partial_queries.append(query_global_events)
+
+        return partial_queries, event_map, topic_map, event_decoders
+
+    @staticmethod
+    def _matches_arg_filters(event: EventData, arg_filters: dict) -> bool:
+        for arg_name, expected in arg_filters.items():
+            value = event["args"].get(arg_name)
+            if isinstance(expected, (list, tuple)):
+                if value not in expected:
+                    return False
+            elif value != expected:
+                return False
+        return True
 
     @command()
     @guilds(cfg["discord.owner.server_id"])
@@ -169,54 +235,68 @@ class Events(EventPlugin):
             await interaction.followup.send(content="No events found.")
 
     def _get_new_events(self) -> list[Event]:
-        if not self.active_filters:
-            from_block = self.last_served_block + 1 - self.lookback_distance
-            self.active_filters = [pf(from_block, "latest") for pf in self._partial_filters]
-
-        events = []
-        for event_filter in self.active_filters:
-            events.extend(event_filter.get_new_entries())
-
-        messages, contract_upgrade_block = self.process_events(events)
+        from_block = self.last_served_block + 1 - self.lookback_distance
+        messages, contract_upgrade_block = self.process_events(self._query_logs(from_block, self._pending_block))
         if not contract_upgrade_block:
             return messages
 
         log.info(f"Detected contract upgrade at block {contract_upgrade_block}, reinitializing")
-        old_config = self._partial_filters, self.event_map, self.topic_map
+        old_config = self._partial_queries, self.event_map, self.topic_map, self.event_decoders
+        pending_block = self._pending_block
 
         try:
             rp.flush()
-            self.__init__(self.bot)
+            self._load_event_config()
             self.start_tracking(BlockNumber(contract_upgrade_block + 1))
-            messages.extend(self._get_new_events())
+            self._pending_block = pending_block
+            messages.extend(self.get_past_events(BlockNumber(contract_upgrade_block + 1), pending_block))
             return messages
         except Exception as err:
             # rollback to pre upgrade config if this goes wrong
-            self._partial_filters, self.event_map, self.topic_map = old_config
-            self.active_filters.clear()
+            self._partial_queries, self.event_map, self.topic_map, self.event_decoders = old_config
             raise err
 
-    def start_tracking(self, block: BlockNumber) -> None:
-        super().start_tracking(block)
-        self.active_filters.clear()
-
-    def get_past_events(self, from_block: BlockNumber, to_block: BlockNumber) -> list[Event]:
+    def _query_logs(self, from_block: BlockNumber, to_block: BlockNumber) -> list[LogReceipt | EventData]:
         events = []
-        for pf in self._partial_filters:
-            events.extend(pf(from_block, to_block).get_all_entries())
+        for pq in self._partial_queries:
+            events.extend(pq(from_block, to_block))
+        return events
 
-        messages, _ = self.process_events(events)
+    def get_past_events(self, from_block: BlockNumber, to_block: BlockNumber) -> list[Event]:
+        messages, _ = self.process_events(self._query_logs(from_block, to_block))
         return messages
 
+    def _decode_log(self, event: LogReceipt, decoded_logs: dict[tuple, aDict]) -> aDict:
+        # decode each log at most once per batch
+        key = (event["transactionHash"], event["logIndex"])
+        if (decoded := decoded_logs.get(key)) is None:
+            if (decoded := self.event_decoders.decode(event)) is None:
+                # not registered at config parse time, fall back to web3's decoder
+                contract = rp.get_contract_by_address(event["address"])
+                contract_event = self.topic_map[event["topics"][0].hex()]
+                decoded = contract.events[contract_event]().process_log(event)
+            decoded = aDict(decoded)
+            decoded_logs[key] = decoded
+        return decoded
+
     def process_events(self, events: list[LogReceipt | EventData]) -> tuple[list[Event], Optional[BlockNumber]]:
         events.sort(key=lambda e: (e.blockNumber, e.logIndex))
         messages = []
         upgrade_block = None
+        decoded_logs: dict[tuple, aDict] = {}
 
         log.debug(f"Aggregating {len(events)} events")
-        events: list[aDict] = self.aggregate_events(events)
+        events: list[aDict] = self.aggregate_events(events, decoded_logs)
         log.debug(f"Processing {len(events)} events")
 
+        global_context = self._prefetch_global_context([e for e in events if self._is_global_event(e)])
+
+        # lowest log index of all events in the same transaction, used as per-transaction event offset
+        first_log_index: dict[tuple, int] = {}
+        for event in events:
+            tx_key = (event.transactionHash, event.blockHash)
+            first_log_index[tx_key] = min(event.logIndex, first_log_index.get(tx_key, event.logIndex))
+
         for event in events:
             if event.get("removed", False):
                 continue
@@ -233,10 +313,8 @@ class Events(EventPlugin):
             if (n := rp.get_name_by_address(event.address)) and "topics" in event:
                 log.debug(f"Found event {event} for {n}")
                 # default event path
-                contract = rp.get_contract_by_address(event.address)
-                contract_event = self.topic_map[event.topics[0].hex()]
                 topics = [w3.toHex(t) for t in event.topics]
-                _event = aDict(contract.events[contract_event]().process_log(event))
+                _event = aDict(self._decode_log(event, decoded_logs))
                 _event.topics = topics
                 _event.args = aDict(_event.args)
                 hash_args(_event.args)
@@ -263,18 +341,14 @@ class Events(EventPlugin):
                     # deposit/exit event path
                     event.args = aDict(event.args)
                     hash_args(event.args)
-                    embed = self.handle_global_event(event_name, event)
+                    embed = self.handle_global_event(event_name, event, global_context)
                     event_name = event.args.get("event_name", event_name)
 
             if (event_name is None) or (embed is None):
                 continue
 
             # get the event offset based on the lowest event log index of events with the same txn hashes and block hashes
-            identical_events = filter(
-                lambda e: (e.transactionHash == event.transactionHash) and (e.blockHash == event.blockHash),
-                events
-            )
-            tx_log_index = event.logIndex - min(e.logIndex for e in identical_events)
+            tx_log_index = event.logIndex - first_log_index[(event.transactionHash, event.blockHash)]
 
             response = Event(
                 embed=embed,
@@ -289,15 +363,18 @@ class Events(EventPlugin):
 
         return messages, upgrade_block
 
-    def aggregate_events(self, events: list[LogReceipt | EventData]) -> list[aDict]:
+    def aggregate_events(
+            self,
+            events: list[LogReceipt | EventData],
+            decoded_logs: Optional[dict[tuple, aDict]] = None
+    ) -> list[aDict]:
+        if decoded_logs is None:
+            decoded_logs = {}
+
         # aggregate and deduplicate events within the same transaction
-        events_by_tx = {}
+        events_by_tx: dict[HexBytes, list[LogReceipt | EventData]] = {}
         for event in reversed(events):
-            tx_hash = event["transactionHash"]
-            if tx_hash not in events_by_tx:
-                events_by_tx[tx_hash] = []
-
-            events_by_tx[tx_hash].append(event)
+            events_by_tx.setdefault(event["transactionHash"], []).append(event)
 
         aggregation_attributes = {
             "rocketDepositPool.DepositAssigned": "assignment_count",
@@ -315,6 +392,9 @@ class Events(EventPlugin):
             full_name = f"{contract_name}.{name}" if contract_name else name
             return name, full_name
 
+        # events are dropped by identity instead of list.remove() to keep this linear
+        removed: set[int] = set()
+        full_names: dict[int, str] = {}
         aggregates = {}
         for tx_hash, tx_events in events_by_tx.items():
             tx_aggregates = {}
@@ -323,66 +403,70 @@ class Events(EventPlugin):
 
             for event in tx_events:
                 event_name, full_event_name = get_event_name(event)
+                full_names[id(event)] = full_event_name
                 log.debug(f"Processing event {full_event_name}")
 
                 if full_event_name not in events_by_name:
                     events_by_name[full_event_name] = []
 
                 if full_event_name == "unstETH.WithdrawalRequested":
-                    contract = rp.get_contract_by_address(event["address"])
-                    _event = aDict(contract.events[event_name]().processLog(event))
+                    _event = self._decode_log(event, decoded_logs)
                     # sum up the amount of stETH withdrawn in this transaction
                     if amount := tx_aggregates.get(full_event_name, 0):
-                        events.remove(event)
+                        removed.add(id(event))
                     tx_aggregates[full_event_name] = amount + _event["args"]["amountOfStETH"]
                 elif full_event_name == "rocketTokenRETH.Transfer":
                     conflicting_events = ["rocketTokenRETH.TokensBurned", "rocketDepositPool.DepositReceived"]
                     if any((event in events_by_name for event in conflicting_events)):
-                        events.remove(event)
+                        removed.add(id(event))
                         continue
                     if prev_event := tx_aggregates.get(full_event_name, None):
                         # only keep largest rETH transfer
-                        contract = rp.get_contract_by_address(event["address"])
-                        _event = aDict(contract.events[event_name]().processLog(event))
-                        _prev_event = aDict(contract.events[event_name]().processLog(event))
+                        _event = self._decode_log(event, decoded_logs)
+                        _prev_event = self._decode_log(prev_event, decoded_logs)
                         if _prev_event["args"]["value"] > _event["args"]["value"]:
-                            events.remove(event)
+                            removed.add(id(event))
                             event = prev_event
                         else:
-                            events.remove(prev_event)
+                            removed.add(id(prev_event))
                     tx_aggregates[full_event_name] = event
                 elif full_event_name == "StatusUpdated":
                     if "MinipoolScrubbed" in events_by_name:
-                        events.remove(event)
+                        removed.add(id(event))
                         continue
                 elif full_event_name == "rocketDAOProtocolProposal.ProposalVoteOverridden":
                     # override is emitted first, thus only seen here after the main vote event
                     # remove last seen vote event
                     vote_event = events_by_name.get("rocketDAOProtocolProposal.ProposalVoted", [None]).pop()
                     if vote_event is not None:
-                        events.remove(vote_event)
+                        removed.add(id(vote_event))
                 elif full_event_name == "MinipoolPrestaked":
                     for assign_event in events_by_name.get("rocketDepositPool.DepositAssigned", []).copy():
                         assigned_minipool = w3.to_checksum_address(assign_event["topics"][1][-20:])
                         if event["address"] == assigned_minipool:
                             events_by_name["rocketDepositPool.DepositAssigned"].remove(assign_event)
-                            events.remove(assign_event)
+                            removed.add(id(assign_event))
                             tx_aggregates["rocketDepositPool.DepositAssigned"] -= 1
                 elif full_event_name in aggregation_attributes:
                     # there is a special aggregated event, remove duplicates
                     if count := tx_aggregates.get(full_event_name, 0):
-                        events.remove(event)
+                        removed.add(id(event))
                     tx_aggregates[full_event_name] = count + 1
                 else:
                     # count, but report as individual events
                     tx_aggregates[full_event_name] = tx_aggregates.get(full_event_name, 0) + 1
 
-                if event in events:
+                if id(event) not in removed:
                     events_by_name[full_event_name].append(event)
 
-        events = [aDict(event) for event in events]
+        aggregated_events = []
         for event in events:
-            _, full_event_name = get_event_name(event)
+            if id(event) in removed:
+                continue
+
+            full_event_name = full_names[id(event)]
+            event = aDict(event)
+            aggregated_events.append(event)
             if full_event_name not in aggregation_attributes:
                 continue
 
@@ -392,16 +476,54 @@ class Events(EventPlugin):
 
             event[aggregation_attributes[full_event_name]] = aggregated_value
 
-        return events
+        return aggregated_events
+
+    def _is_global_event(self, event: LogReceipt | EventData) -> bool:
+        # mirrors the deposit/exit event path in process_events
+        if event.get("removed", False):
+            return False
+        if rp.get_name_by_address(event.address) and "topics" in event:
+            return False
+        event_name = self.event_map.get(event.get("event"))
+        return event_name is not None and event_name not in ["contract_upgraded", "contract_added"]
 
-    def handle_global_event(self, event_name: str, event: aDict) -> Optional[Embed]:
-        receipt = w3.eth.get_transaction_receipt(event.transactionHash)
+    @staticmethod
+    def _prefetch_global_context(events: list[EventData]) -> GlobalEventContext:
+        if not events:
+            return GlobalEventContext({}, {}, {})
+
+        # one receipt per transaction, no matter how many events it emitted
+        with RequestBatch() as batch:
+            futures = {
+                tx_hash: batch.submit(w3.eth.get_transaction_receipt, tx_hash)
+                for tx_hash in {event.transactionHash for event in events}
+            }
+        receipts = {tx_hash: future.result() for tx_hash, future in futures.items()}
+
+        # resolve the minipool lookups of all events in a single multicall
+        candidates = list({event.address for event in events} | {r.to for r in receipts.values() if r.to})
+        # same check as handle_global_event, an empty pubkey argument also falls back to the contract
+        pubkey_candidates = list({event.address for event in events if not event.args.get("validatorPubkey")})
+        minipool_manager = rp.get_contract_by_name("rocketMinipoolManager")
+        results = rp.multicall3(
+            [minipool_manager.functions.getMinipoolExists(a) for a in candidates]
+            + [minipool_manager.functions.getMinipoolPubkey(a) for a in pubkey_candidates],
+            require_success=False
+        )
+        log.debug(f"Prefetched {len(receipts)} receipts and {len(results)} minipool lookups for {len(events)} events")
+        return GlobalEventContext(
+            receipts=receipts,
+            minipool_exists={a: bool(r) for a, r in zip(candidates, results)},
+            minipool_pubkeys=dict(zip(pubkey_candidates, results[len(candidates):]))
+        )
+
+    def handle_global_event(self, event_name: str, event: aDict, context: GlobalEventContext) -> Optional[Embed]:
+        receipt = context.receipts[event.transactionHash]
         if not any([
-            rp.call("rocketMinipoolManager.getMinipoolExists", receipt.to),
-            rp.call("rocketMinipoolManager.getMinipoolExists", event.address),
+            context.minipool_exists.get(event.address),
             rp.get_name_by_address(receipt.to),
             rp.get_name_by_address(event.address)
-        ]):
+        ]) and not context.minipool_exists.get(receipt.to):
             # some random contract we don't care about
             log.warning(f"Skipping {event.transactionHash.hex()} because the called contract is not a minipool")
             return None
@@ -414,7 +536,7 @@ class Events(EventPlugin):
 
         # maybe the contract has it stored?
         if not pubkey:
-            pubkey = rp.call("rocketMinipoolManager.getMinipoolPubkey", event.address).hex()
+            pubkey = (context.minipool_pubkeys.get(event.address) or b"").hex()
 
         # maybe it's in the transaction?
         if not pubkey:
@@ -11,6 +11,7 @@ from plugins.forum.forum import Forum
 from plugins.rpips.rpips import RPIPs
 
 from utils.status import StatusPlugin
+from utils.blocking import run_blocking
 from utils.cfg import cfg
 from utils.dao import DAO, DefaultDAO, OracleDAO, SecurityCouncil, ProtocolDAO
 from utils.embeds import Embed
@@ -51,14 +52,14 @@ class Governance(StatusPlugin):
 
     async def _get_active_snapshot_proposals(self) -> list[Snapshot.Proposal]:
         try:
-            return Snapshot.fetch_proposals("active", reverse=True)
+            return await run_blocking(Snapshot.fetch_proposals, "active", reverse=True)
         except Exception as e:
             await self.bot.report_error(e)
             return []
 
     async def _get_draft_rpips(self) -> list[RPIPs.RPIP]:
         try:
-            return [rpip for rpip in RPIPs.get_all_rpips() if (rpip.status == "Draft")][::-1]
+            return [rpip for rpip in await run_blocking(RPIPs.get_all_rpips) if (rpip.status == "Draft")][::-1]
         except Exception as e:
             await self.bot.report_error(e)
             return []
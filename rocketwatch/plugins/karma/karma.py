@@ -2,9 +2,7 @@ import logging
 
 from discord import app_commands, Interaction, User, AppCommandType
 from discord.app_commands.checks import cooldown
-from discord.ext.commands import Cog, GroupCog
-from motor.motor_asyncio import AsyncIOMotorClient
-from pymongo import IndexModel
+from discord.ext.commands import GroupCog
 
 from rocketwatch import RocketWatch
 from utils.cfg import cfg
@@ -18,7 +16,7 @@ log.setLevel(cfg["log_level"])
 class KarmaUtils(GroupCog, name="karma"):
     def __init__(self, bot: RocketWatch):
         self.bot = bot
-        self.db = AsyncIOMotorClient(cfg["mongodb.uri"]).get_database("rocketwatch")
+        self.db = bot.db
         self.menus = []
         for c in [5,10]:
             self.menus.append(app_commands.ContextMenu(
@@ -39,14 +37,6 @@ class KarmaUtils(GroupCog, name="karma"):
         for menu in self.menus:
             self.bot.tree.add_command(menu)
 
-    @Cog.listener()
-    async def on_ready(self):
-        # ensure user and issuer indexes exist
-        await self.db.karma.create_indexes([
-            IndexModel("user"),
-            IndexModel("issuer")
-        ])
-
     async def cog_unload(self) -> None:
         for menu in self.menus:
             self.bot.tree.remove_command(menu)
@@ -2,13 +2,15 @@ import logging
 
 from discord.ext import commands
 from discord.ext.commands import hybrid_command, Context
-from motor.motor_asyncio import AsyncIOMotorClient
 from pymongo import InsertOne
 
 from rocketwatch import RocketWatch
+from utils.blocking import run_blocking
 from utils.cfg import cfg
+from utils.database import database
 from utils.embeds import Embed
 from utils.embeds import el_explorer_url
+from utils.minipool_index import minipool_index
 from utils.shared_w3 import bacon
 from utils.solidity import BEACON_START_DATE, BEACON_EPOCH_LENGTH
 from utils.time_debug import timerun_async
@@ -20,26 +22,12 @@ log.setLevel(cfg["log_level"])
 
 class LotteryBase:
     def __init__(self):
-        # connect to local mongodb
-        self.client = AsyncIOMotorClient(cfg["mongodb.uri"])
-        self.db = self.client.get_database("rocketwatch")
-        self.did_check = False
-
-    async def _check_indexes(self):
-        if self.did_check:
-            return
-        log.debug("Checking indexes")
-        for period in ["latest", "next"]:
-            col = self.db[f"sync_committee_{period}"]
-            await col.create_index("validator", unique=True)
-            await col.create_index("index", unique=True)
-        self.did_check = True
-        log.debug("Indexes checked")
+        self.client = database.async_client
+        self.db = database.db
 
     @timerun_async
     async def load_sync_committee(self, period):
         assert period in ["latest", "next"]
-        await self._check_indexes()
         h = bacon.get_block("head")
         sync_period = int(h['data']['message']['slot']) // 32 // 256
         if period == "next":
@@ -68,42 +56,11 @@ class LotteryBase:
                 await col.bulk_write(payload)
 
     async def get_validators_for_sync_committee_period(self, period):
-        data = await self.db[f"sync_committee_{period}"].aggregate([
-            {
-                '$lookup': {
-                    'from'        : 'minipools',
-                    'localField'  : 'validator',
-                    'foreignField': 'validator',
-                    'as'          : 'entry'
-                }
-            }, {
-                '$match': {
-                    'entry': {
-                        '$ne': []
-                    }
-                }
-            }, {
-                '$replaceRoot': {
-                    'newRoot': {
-                        '$first': '$entry'
-                    }
-                }
-            }, {
-                '$project': {
-                    '_id'          : 0,
-                    'validator'    : 1,
-                    'pubkey'       : 1,
-                    'node_operator': 1
-                }
-            }, {
-                '$match': {
-                    'node_operator': {
-                        '$ne': None
-                    }
-                }
-            }]).to_list(length=None)
-
-        return data
+        validators = await self.db[f"sync_committee_{period}"].distinct("validator")
+        return [
+            entry for entry in minipool_index.get_many(validators).values()
+            if entry["node_operator"] is not None
+        ]
 
     async def generate_sync_committee_description(self, period):
         await self.load_sync_committee(period)
@@ -142,6 +99,10 @@ class Lottery(commands.Cog):
     def __init__(self, bot: RocketWatch):
         self.bot = bot
 
+    async def warm_up(self) -> None:
+        # the initial load scans all minipools, keep it off the event loop
+        await run_blocking(minipool_index.load)
+
     @hybrid_command()
     async def lottery(self, ctx: Context):
         """
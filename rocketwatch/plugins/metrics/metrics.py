@@ -3,20 +3,21 @@ import math
 from datetime import datetime, timedelta
 from io import BytesIO
 
-from motor.motor_asyncio import AsyncIOMotorClient
 from bson import SON
 from cachetools import TTLCache
 from discord import File
 from discord.ext import commands
 from discord.ext.commands import Context
 from discord.ext.commands import hybrid_command
-from matplotlib import pyplot as plt
 
 from rocketwatch import RocketWatch
 from utils.cfg import cfg
+from utils.lazy_import import lazy_import
 from utils.embeds import Embed
 from utils.visibility import is_hidden
 
+plt = lazy_import("matplotlib.pyplot")
+
 log = logging.getLogger("metrics")
 log.setLevel(cfg["log_level"])
 
@@ -25,7 +26,7 @@ class Metrics(commands.Cog):
     def __init__(self, bot: RocketWatch):
         self.bot = bot
         self.notice_ttl_cache = TTLCache(math.inf, ttl=60 * 15)
-        self.db = AsyncIOMotorClient(cfg["mongodb.uri"]).rocketwatch
+        self.db = bot.db
         self.collection = self.db.command_metrics
 
     @hybrid_command()
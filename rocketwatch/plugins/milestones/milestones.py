@@ -1,7 +1,6 @@
 import json
 import logging
 
-import pymongo
 from web3.datastructures import MutableAttributeDict as aDict
 
 from rocketwatch import RocketWatch
@@ -18,7 +17,7 @@ log.setLevel(cfg["log_level"])
 class Milestones(EventPlugin):
     def __init__(self, bot: RocketWatch):
         super().__init__(bot)
-        self.db = pymongo.MongoClient(cfg["mongodb.uri"]).rocketwatch
+        self.db = bot.sync_db
         self.collection = self.db.milestones
         self.state = "OK"
 
@@ -3,9 +3,7 @@ import re
 from io import BytesIO
 
 import inflect
-import matplotlib.pyplot as plt
 import numpy as np
-import pymongo
 from discord import File
 from discord.app_commands import describe
 from discord.ext import commands
@@ -13,9 +11,12 @@ from discord.ext.commands import Context, hybrid_command
 
 from rocketwatch import RocketWatch
 from utils.cfg import cfg
+from utils.lazy_import import lazy_import
 from utils.embeds import Embed
 from utils.visibility import is_hidden
 
+plt = lazy_import("matplotlib.pyplot")
+
 log = logging.getLogger("minipool_distribution")
 log.setLevel(cfg["log_level"])
 p = inflect.engine()
@@ -41,7 +42,7 @@ async def minipool_distribution_raw(ctx: Context, distribution):
 class MinipoolDistribution(commands.Cog):
     def __init__(self, bot: RocketWatch):
         self.bot = bot
-        self.db = pymongo.MongoClient(cfg["mongodb.uri"]).rocketwatch
+        self.db = bot.sync_db
 
     def get_minipool_counts_per_node(self):
         # get an array for minipool counts per node from db using aggregation
@@ -5,7 +5,6 @@ import time
 from concurrent.futures import ThreadPoolExecutor
 
 from cronitor import Monitor
-from pymongo import MongoClient
 from requests.exceptions import HTTPError
 from eth_typing import ChecksumAddress
 
@@ -13,6 +12,7 @@ from discord.ext import commands, tasks
 from discord.utils import as_chunks
 
 from rocketwatch import RocketWatch
+from utils.blocking import run_blocking
 from utils.cfg import cfg
 from utils.rocketpool import rp
 from utils.shared_w3 import w3, bacon
@@ -26,12 +26,15 @@ log.setLevel(cfg["log_level"])
 class MinipoolTask(commands.Cog):
     def __init__(self, bot: RocketWatch):
         self.bot = bot
-        self.db = MongoClient(cfg["mongodb.uri"]).rocketwatch
-        self.minipool_manager = rp.get_contract_by_name("rocketMinipoolManager")
+        self.db = bot.sync_db
+        self.minipool_manager = None
         self.monitor = Monitor('gather-minipools', api_key=cfg["other.secrets.cronitor"])
         self.batch_size = 1000
         self.loop.start()
             
+    async def warm_up(self) -> None:
+        self.minipool_manager = await run_blocking(rp.get_contract_by_name, "rocketMinipoolManager")
+
     def cog_unload(self):
         self.loop.cancel()
 
@@ -130,14 +133,9 @@ class MinipoolTask(commands.Cog):
 
     def check_indexes(self):
         log.debug("checking indexes")
-        self.db.proposals.create_index("validator")
-        # self.db.minipools.create_index("validator", unique=True)
-        # remove the old unique validator index if it exists, create a new one without unique called validator_2
+        # remove the old unique validator index if it exists, its replacement validator_2 is created at startup
         if "validator_1" in self.db.minipools.index_information():
             self.db.minipools.drop_index("validator_1")
-        self.db.minipools.create_index("validator", name="validator_2")
-        self.db.proposals.create_index("slot", unique=True)
-        self.db.minipools.create_index("address")
         log.debug("indexes checked")
 
     def task(self):
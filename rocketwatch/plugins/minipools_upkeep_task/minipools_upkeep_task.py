@@ -5,7 +5,6 @@ from concurrent.futures import ThreadPoolExecutor
 import pymongo
 from discord.ext import commands, tasks
 from discord.ext.commands import hybrid_command
-from motor.motor_asyncio import AsyncIOMotorClient
 from multicall import Call
 
 from rocketwatch import RocketWatch
@@ -16,6 +15,7 @@ from utils.shared_w3 import w3
 from utils.visibility import is_hidden
 from utils.cfg import cfg
 from utils.rocketpool import rp
+from utils.multicall_scheduler import multicall_scheduler
 from utils.time_debug import timerun_async
 
 log = logging.getLogger("minipools_upkeep_task")
@@ -28,7 +28,7 @@ def div_32(i: int):
 class MinipoolsUpkeepTask(commands.Cog):
     def __init__(self, bot: RocketWatch):
         self.bot = bot
-        self.db = AsyncIOMotorClient(cfg["mongodb.uri"]).rocketwatch
+        self.db = bot.db
         self.loop.start()
         
     def cog_unload(self):
@@ -61,23 +61,17 @@ class MinipoolsUpkeepTask(commands.Cog):
             lambda x: (mc.address, [rp.seth_sig(mc.abi, "getEthBalance"), x], [((x, "EthBalance"), solidity.to_float)])
         ]
         minipool_stats = {}
-        batch_size = 10_000 // len(lambs)
-        for i in range(0, len(minipools), batch_size):
-            i_end = min(i + batch_size, len(minipools))
-            log.debug(f"getting minipool stats for {i}-{i_end}")
-            addresses = minipools[i:i_end]
-            calls = [
-                Call(*lamb(a))
-                for a in addresses
-                for lamb in lambs
-            ]
-            res = await rp.multicall2(calls)
-            # add data to mini pool stats dict (address => {func_name: value})
-            # strip get from function name
-            for (address, variable_name), value in res.items():
-                if address not in minipool_stats:
-                    minipool_stats[address] = {}
-                minipool_stats[address][variable_name] = value
+        res = await multicall_scheduler.run([
+            Call(*lamb(a))
+            for a in minipools
+            for lamb in lambs
+        ], label="minipool_upkeep")
+        # add data to mini pool stats dict (address => {func_name: value})
+        # strip get from function name
+        for (address, variable_name), value in res.items():
+            if address not in minipool_stats:
+                minipool_stats[address] = {}
+            minipool_stats[address][variable_name] = value
         return minipool_stats
 
     async def upkeep_minipools(self):
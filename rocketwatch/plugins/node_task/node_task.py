@@ -1,9 +1,12 @@
 import logging
 import time
+from typing import Optional
 
 import pymongo
 from multicall import Call
 from cronitor import Monitor
+from eth_utils import event_abi_to_log_topic
+from bson import Binary
 from pymongo import UpdateOne, UpdateMany
 
 from discord.ext import tasks, commands
@@ -13,9 +16,12 @@ from utils import solidity
 from utils.cfg import cfg
 from utils.block_time import ts_to_block
 from utils.rocketpool import rp
-from utils.shared_w3 import bacon
+from utils.shared_w3 import bacon, w3
 from utils.time_debug import timerun, timerun_async
 from utils.event_logs import get_logs
+from utils.minipool_index import minipool_index
+from utils.multicall_scheduler import multicall_scheduler
+from utils.validator_snapshot import ValidatorSnapshot
 
 
 log = logging.getLogger("node_task")
@@ -47,12 +53,67 @@ def is_true(_, b):
     return b is True
 
 
+class DirtySet:
+    """
+    Minipools and node operators (lowercase addresses) whose event-driven metadata needs a refresh,
+    None means all of them
+    """
+    def __init__(self, minipools: Optional[set[str]], nodes: Optional[set[str]]):
+        self.minipools = minipools
+        self.nodes = nodes
+
+
 class NodeTask(commands.Cog):
+    # (contract, event, argument holding the affected address) that change minipool metadata,
+    # None means the emitting minipool itself
+    MINIPOOL_EVENTS = [
+        ("rocketMinipool", "StatusUpdated", None),
+        ("rocketMinipool", "DelegateUpgraded", None),
+        ("rocketMinipool", "DelegateRolledBack", None),
+        ("rocketMinipool", "MinipoolPromoted", None),
+        ("rocketMinipool", "MinipoolVacancyPrepared", None),
+        ("rocketMinipool", "EtherWithdrawalProcessed", None),
+        ("rocketMinipoolBondReducer", "BeginBondReduction", "minipool"),
+        ("rocketMinipoolBondReducer", "ReductionCancelled", "minipool"),
+    ]
+    # same for node operators, minipool changes also mark their node operator
+    NODE_EVENTS = [
+        ("rocketNodeManager", "NodeRegistered", "node"),
+        ("rocketNodeManager", "NodeTimezoneLocationSet", "node"),
+        ("rocketNodeManager", "NodeRewardNetworkChanged", "node"),
+        ("rocketNodeManager", "NodeSmoothingPoolStateChanged", "node"),
+        ("rocketNodeStaking", "RPLStaked", "from"),
+        ("rocketNodeStaking", "RPLWithdrawn", "to"),
+        ("rocketNodeStaking", "RPLSlashed", "node"),
+        ("rocketNodeDeposit", "DepositReceived", "from"),
+        ("rocketStorage", "NodeWithdrawalAddressSet", "node"),
+        ("rocketMinipoolManager", "MinipoolCreated", "node"),
+        ("rocketMinipoolManager", "MinipoolDestroyed", "node"),
+    ]
+    # events that change derived values of every node operator (e.g. the effective RPL stake)
+    GLOBAL_NODE_EVENTS = [
+        ("rocketNetworkPrices", "PricesUpdated"),
+    ]
+    # events that change derived values of every minipool, a delegate upgrade changes the
+    # effective delegate of all minipools following the latest one without a per-minipool event.
+    # upgrades that write rocketStorage directly emit nothing and are only picked up by the full sweep
+    GLOBAL_MINIPOOL_EVENTS = [
+        ("rocketDAONodeTrustedUpgrade", "ContractUpgraded"),
+    ]
+
     def __init__(self, bot: RocketWatch):
         self.bot = bot
-        self.db = pymongo.MongoClient(cfg["mongodb.uri"]).rocketwatch
+        self.db = bot.sync_db
         self.monitor = Monitor("node-task", api_key=cfg["other.secrets.cronitor"])
         self.batch_size = 1000
+        # dirty tracking state, the first run after startup is always a full sweep
+        self.full_sweep_interval = cfg.get("node_task.full_sweep_interval", 6 * 60 * 60)
+        self.max_dirty_range = cfg.get("node_task.max_dirty_range", 10_000)
+        self.last_checked_block: Optional[int] = None
+        self.last_full_sweep = 0.0
+        # stream the full validator set once per epoch instead of querying minipool validators in chunks
+        self.full_state_sync = cfg.get("node_task.full_state_sync", False)
+        self.beacon_snapshot: Optional[ValidatorSnapshot] = None
         self.loop.start()
             
     def cog_unload(self):
@@ -64,16 +125,24 @@ class NodeTask(commands.Cog):
         self.monitor.ping(state="run", series=p_id)
         try:
             log.debug("starting node task")
-            self.check_indexes()
+            head = w3.eth.block_number
+            dirty = self.get_dirty_set(head)
             await self.add_untracked_minipools()
             await self.add_static_data_to_minipools()
-            await self.update_dynamic_minipool_metadata()
+            await self.update_dynamic_minipool_metadata(dirty)
             self.add_static_deposit_data_to_minipools()
             self.add_static_beacon_data_to_minipools()
-            self.update_dynamic_minipool_beacon_metadata()
+            if self.full_state_sync:
+                self.sync_minipool_beacon_state()
+            else:
+                self.update_dynamic_minipool_beacon_metadata()
             await self.add_untracked_node_operators()
             await self.add_static_data_to_node_operators()
-            await self.update_dynamic_node_operator_metadata()
+            await self.update_dynamic_node_operator_metadata(dirty)
+            # only advance once everything in the dirty set has been written
+            self.last_checked_block = head
+            if dirty is None:
+                self.last_full_sweep = time.time()
             log.debug("node task finished")
             self.monitor.ping(state="complete", series=p_id)
         except Exception as err:
@@ -84,6 +153,135 @@ class NodeTask(commands.Cog):
     async def on_ready(self):
         await self.bot.wait_until_ready()
 
+    def _get_event_sources(self) -> dict[bytes, tuple]:
+        """Map topic0 -> (contract event, kind, address argument) for all tracked events"""
+        sources = {}
+        tracked = (
+            [(c, e, "minipool", arg) for c, e, arg in self.MINIPOOL_EVENTS]
+            + [(c, e, "node", arg) for c, e, arg in self.NODE_EVENTS]
+            + [(c, e, "global", None) for c, e in self.GLOBAL_NODE_EVENTS]
+            + [(c, e, "global_minipool", None) for c, e in self.GLOBAL_MINIPOOL_EVENTS]
+        )
+        for contract_name, event_name, kind, arg in tracked:
+            try:
+                if contract_name == "rocketMinipool":
+                    contract = rp.assemble_contract(contract_name)
+                else:
+                    contract = rp.get_contract_by_name(contract_name)
+                event = contract.events[event_name]
+                sources[event_abi_to_log_topic(event._get_event_abi())] = (event, kind, arg)
+            except Exception:
+                log.warning(f"Not tracking {contract_name}.{event_name} for dirty metadata")
+        return sources
+
+    @timerun
+    def get_dirty_set(self, head: int) -> Optional[DirtySet]:
+        """
+        Collect minipools and node operators touched by relevant events since the last run.
+        Returns None if a full sweep is due instead.
+        """
+        from_block = self.last_checked_block
+        if from_block is None:
+            log.info("No dirty tracking state, running full metadata sweep")
+            return None
+        if time.time() - self.last_full_sweep >= self.full_sweep_interval:
+            log.info("Running periodic full metadata sweep")
+            return None
+        if head - from_block > self.max_dirty_range:
+            log.info(f"Dirty tracking is {head - from_block} blocks behind, running full metadata sweep")
+            return None
+
+        dirty = DirtySet(set(), set())
+        if head <= from_block:
+            return dirty
+
+        sources = self._get_event_sources()
+        logs = w3.eth.get_logs({
+            "fromBlock": from_block + 1,
+            "toBlock"  : head,
+            "topics"   : [["0x" + topic.hex() for topic in sources]]
+        })
+
+        for receipt in logs:
+            event, kind, arg = sources[bytes(receipt["topics"][0])]
+            if kind == "global":
+                log.info(f"Global event {event.event_name} seen, refreshing all node operators")
+                dirty.nodes = None
+                continue
+            if kind == "global_minipool":
+                if self._is_delegate_upgrade(event, receipt):
+                    log.info("Minipool delegate upgraded, refreshing all minipools")
+                    dirty.minipools = None
+                continue
+            if arg is None:
+                address = receipt["address"]
+            else:
+                try:
+                    address = event().processLog(receipt)["args"][arg]
+                except Exception:
+                    log.warning(f"Failed to decode {event.event_name} in {receipt['transactionHash'].hex()}")
+                    continue
+            if kind == "minipool":
+                if dirty.minipools is not None:
+                    dirty.minipools.add(address.lower())
+            elif dirty.nodes is not None:
+                dirty.nodes.add(address.lower())
+
+        # minipool changes (status, bond, ...) affect the derived values of their node operator
+        if dirty.minipools and dirty.nodes is not None:
+            for minipool in self.db.minipools_new.find(
+                    {"address": {"$in": self._stored_addresses(self.db.minipools_new, dirty.minipools)}},
+                    {"node_operator": 1}
+            ):
+                if node_operator := minipool.get("node_operator"):
+                    dirty.nodes.add(node_operator.lower())
+
+        log.debug(f"Dirty set: {'all' if dirty.minipools is None else len(dirty.minipools)} minipools, "
+                  f"{'all' if dirty.nodes is None else len(dirty.nodes)} node operators")
+        return dirty
+
+    @staticmethod
+    def _is_delegate_upgrade(event, receipt) -> bool:
+        try:
+            name = event().processLog(receipt)["args"]["name"]
+        except Exception:
+            # can't tell which contract was upgraded, assume the worst
+            return True
+        return bytes(name) == bytes(w3.solidityKeccak(["string"], ["rocketMinipoolDelegate"]))
+
+    @staticmethod
+    def _stored_addresses(collection, addresses: set[str]) -> list[str]:
+        """Map lowercase addresses to the form they are stored in"""
+        if not addresses:
+            return []
+        # addresses are stored either lowercase or checksummed, look up both forms via the address index
+        candidates = list(addresses) + [w3.toChecksumAddress(a) for a in addresses]
+        return collection.distinct("address", {"address": {"$in": candidates}})
+
+    @staticmethod
+    def _diff_updates(collection, data: dict[str, dict]) -> list[UpdateOne]:
+        """Build updates that only $set fields whose value actually changed"""
+        if not data:
+            return []
+        fields = {field: 1 for values in data.values() for field in values}
+        current = {
+            doc["address"]: doc
+            for doc in collection.find({"address": {"$in": list(data)}}, {"_id": 0, "address": 1} | fields)
+        }
+        updates = []
+        for address, values in data.items():
+            doc = current.get(address, {})
+            if changed := {k: v for k, v in values.items() if k not in doc or doc[k] != v}:
+                updates.append(UpdateOne({"address": address}, {"$set": changed}))
+        return updates
+
+    def _select_refresh(self, collection, dirty_addresses: Optional[set[str]], marker_field: str) -> set[str]:
+        """Stored addresses that need a full refresh: dirty ones plus any that were never refreshed"""
+        if dirty_addresses is None:
+            return set(collection.distinct("address"))
+        never_refreshed = collection.distinct("address", {marker_field: {"$exists": False}})
+        return set(self._stored_addresses(collection, dirty_addresses)) | set(never_refreshed)
+
     @timerun_async
     async def add_untracked_minipools(self):
         # rocketMinipoolManager.getMinipoolAt(i) returns the address of the minipool at index i
@@ -93,20 +291,15 @@ class NodeTask(commands.Cog):
         latest_db = 0
         if res := self.db.minipools_new.find_one(sort=[("_id", pymongo.DESCENDING)]):
             latest_db = res["_id"]
-        data = {}
         # return early if we're up to date
         if latest_db == latest_rp:
             log.debug("No new minipools")
             return
         log.debug(f"Latest minipool in db: {latest_db}, latest minipool in rp: {latest_rp}")
-        # batch into self.batch_size minipools at a time, between latest_id and minipool_count
-        for i in range(latest_db + 1, latest_rp + 1, self.batch_size):
-            i_end = min(i + self.batch_size, latest_rp + 1)
-            log.debug(f"Getting untracked minipools ({i} to {i_end})")
-            data |= await rp.multicall2([
-                Call(mm.address, [rp.seth_sig(mm.abi, "getMinipoolAt"), i], [(i, None)])
-                for i in range(i, i_end)
-            ])
+        data = await multicall_scheduler.run([
+            Call(mm.address, [rp.seth_sig(mm.abi, "getMinipoolAt"), i], [(i, None)])
+            for i in range(latest_db + 1, latest_rp + 1)
+        ], label="untracked_minipools")
         log.debug(f"Inserting {len(data)} new minipools into db")
         self.db.minipools_new.insert_many([
             {"_id": i, "address": a}
@@ -130,20 +323,16 @@ class NodeTask(commands.Cog):
             log.debug("No minipools need to be updated with static data")
             return
         data = {}
-        batch_size = self.batch_size // len(lambs)
-        for i in range(0, len(minipool_addresses), batch_size):
-            i_end = min(i + batch_size, len(minipool_addresses))
-            log.debug(f"Getting minipool static data ({i} to {i_end})")
-            res = await rp.multicall2([
-                Call(*lamb(a))
-                for a in minipool_addresses[i:i_end]
-                for lamb in lambs
-            ], require_success=False)
-            # update data dict with results
-            for (address, variable_name), value in res.items():
-                if address not in data:
-                    data[address] = {}
-                data[address][variable_name] = value
+        res = await multicall_scheduler.run([
+            Call(*lamb(a))
+            for a in minipool_addresses
+            for lamb in lambs
+        ], require_success=False, label="minipool_static_data")
+        # update data dict with results
+        for (address, variable_name), value in res.items():
+            if address not in data:
+                data[address] = {}
+            data[address][variable_name] = value
         log.debug(f"Updating {len(data)} minipools with static data")
         # update minipools in db
         bulk = [
@@ -153,12 +342,17 @@ class NodeTask(commands.Cog):
             ) for a, d in data.items()
         ]
         self.db.minipools_new.bulk_write(bulk, ordered=False)
+        minipool_index.update({"address": a} | d for a, d in data.items())
         log.debug("Minipools updated with static data")
 
     @timerun_async
-    async def update_dynamic_minipool_metadata(self):
+    async def update_dynamic_minipool_metadata(self, dirty: Optional[DirtySet] = None):
         m = rp.assemble_contract("rocketMinipool")
         mc = rp.get_contract_by_name("multicall3")
+        # balances change without emitting events, so they're refreshed for every minipool
+        volatile_lambs = [
+            lambda a: (mc.address, [rp.seth_sig(mc.abi, "getEthBalance"), a], [((a, "execution_balance"), safe_to_float)])
+        ]
         lambs = [
             lambda a: (a, rp.seth_sig(m.abi, "getStatus"), [((a, "status"), safe_state_to_str)]),
             lambda a: (a, rp.seth_sig(m.abi, "getStatusTime"), [((a, "status_time"), None)]),
@@ -169,36 +363,29 @@ class NodeTask(commands.Cog):
             lambda a: (a, rp.seth_sig(m.abi, "getNodeFee"), [((a, "node_fee"), safe_to_float)]),
             lambda a: (a, rp.seth_sig(m.abi, "getEffectiveDelegate"), [((a, "effective_delegate"), None)]),
             lambda a: (a, rp.seth_sig(m.abi, "getUseLatestDelegate"), [((a, "use_latest_delegate"), None)]),
-            lambda a: (mc.address, [rp.seth_sig(mc.abi, "getEthBalance"), a], [((a, "execution_balance"), safe_to_float)])
-        ]
-        # get all minipool addresses from db
+        ] + volatile_lambs
+        # get all minipool addresses from db, only dirty ones get a full refresh
         minipool_addresses = self.db.minipools_new.distinct("address")
-        data = {}
-        att_count = 0
-        batch_size = self.batch_size // len(lambs)
-        for i in range(0, len(minipool_addresses), batch_size):
-            i_end = min(i + batch_size, len(minipool_addresses))
-            log.debug(f"Getting minipool metadata ({i} to {i_end})")
-            res = await rp.multicall2([
-                Call(*lamb(a))
-                for a in minipool_addresses[i:i_end]
-                for lamb in lambs
-            ], require_success=False)
-            # update data dict with results
-            for (address, variable_name), value in res.items():
-                if address not in data:
-                    data[address] = {}
-                data[address][variable_name] = value
-                att_count += 1
-        log.debug(f"Updating {att_count} minipool attributes in db")
-        # update minipools in db
-        bulk = [
-            UpdateOne(
-                {"address": a},
-                {"$set": d}
-            ) for a, d in data.items()
+        refresh = self._select_refresh(self.db.minipools_new, dirty and dirty.minipools, "status")
+        log.debug(f"Refreshing full metadata for {len(refresh)}/{len(minipool_addresses)} minipools")
+        calls = [
+            Call(*lamb(a))
+            for a in minipool_addresses
+            for lamb in (lambs if a in refresh else volatile_lambs)
         ]
-        self.db.minipools_new.bulk_write(bulk, ordered=False)
+        data = {}
+        res = await multicall_scheduler.run(calls, require_success=False, label="minipool_metadata")
+        # update data dict with results
+        for (address, variable_name), value in res.items():
+            if address not in data:
+                data[address] = {}
+            data[address][variable_name] = value
+        # only write attributes that changed
+        bulk = self._diff_updates(self.db.minipools_new, data)
+        log.debug(f"Updating {len(bulk)} changed minipools in db")
+        if bulk:
+            self.db.minipools_new.bulk_write(bulk, ordered=False)
+        minipool_index.update({"address": a, "node_fee": d["node_fee"]} for a, d in data.items() if "node_fee" in d)
         log.debug("Minipools updated with metadata")
         return
 
@@ -303,6 +490,8 @@ class NodeTask(commands.Cog):
             ) for a, d in data.items()
         ]
         self.db.minipools_new.bulk_write(bulk, ordered=False)
+        # newly assigned validator indices, pull the full entries into the shared index
+        minipool_index.refresh({"pubkey": {"$in": list(data)}})
         log.debug("Minipools updated with static beacon data")
 
     @timerun
@@ -347,17 +536,45 @@ class NodeTask(commands.Cog):
         self.db.minipools_new.bulk_write(bulk, ordered=False)
         log.debug("Minipools updated with dynamic beacon data")
 
-    def check_indexes(self):
-        log.debug("checking indexes")
-        self.db.minipools_new.create_index("address")
-        self.db.minipools_new.create_index("pubkey")
-        self.db.minipools_new.create_index("validator_index")
-        self.db.node_operators_new.create_index("address")
-        # proposal index creation that is for some reason here
-        self.db.proposals.create_index("validator")
-        self.db.proposals.create_index("validator")
-        self.db.proposals.create_index("slot", unique=True)
-        log.debug("indexes checked")
+    def _load_beacon_snapshot(self) -> Optional[ValidatorSnapshot]:
+        if self.beacon_snapshot is None and (doc := self.db.beacon_snapshots.find_one({"_id": "minipools"})):
+            self.beacon_snapshot = ValidatorSnapshot.from_bytes(doc["data"])
+        return self.beacon_snapshot
+
+    @timerun
+    def sync_minipool_beacon_state(self):
+        # same result as update_dynamic_minipool_beacon_metadata, but from a single streamed full state
+        mask = minipool_index.get_validator_mask()
+        with bacon.stream_validators("head") as response:
+            snapshot = ValidatorSnapshot.from_stream(
+                response.raw,
+                lambda index: index < len(mask) and mask[index]
+            )
+
+        changed = set(snapshot.changed_indices(self._load_beacon_snapshot()).tolist())
+        # minipools that were (re)added without beacon data don't show up in the snapshot diff
+        changed |= set(self.db.minipools_new.distinct(
+            "validator_index",
+            {"validator_index": {"$ne": None}, "beacon": {"$exists": False}}
+        )) & set(snapshot.indices.tolist())
+        log.debug(f"{len(changed)} of {len(snapshot)} minipool validators changed")
+
+        if changed:
+            bulk = [
+                UpdateMany(
+                    {"validator_index": i},
+                    {"$set": {"beacon": snapshot.beacon_data(i)}}
+                ) for i in changed
+            ]
+            self.db.minipools_new.bulk_write(bulk, ordered=False)
+        # only persist once the database matches it
+        self.db.beacon_snapshots.replace_one(
+            {"_id": "minipools"},
+            {"data": Binary(snapshot.to_bytes()), "validators": len(snapshot), "time": time.time()},
+            upsert=True
+        )
+        self.beacon_snapshot = snapshot
+        log.debug("Minipools updated with dynamic beacon data")
 
     @timerun_async
     async def add_untracked_node_operators(self):
@@ -368,19 +585,14 @@ class NodeTask(commands.Cog):
         latest_db = 0
         if res := self.db.node_operators_new.find_one(sort=[("_id", pymongo.DESCENDING)]):
             latest_db = res["_id"]
-        data = {}
         # return early if we're up to date
         if latest_db == latest_rp:
             log.debug("No new nodes")
             return
-        # batch into 10k nodes at a time, between latest_id and latest_rp
-        for i in range(latest_db + 1, latest_rp + 1, self.batch_size):
-            i_end = min(i + self.batch_size, latest_rp + 1)
-            log.debug(f"Getting untracked node ({i} to {i_end})")
-            data |= await rp.multicall2([
-                Call(nm.address, [rp.seth_sig(nm.abi, "getNodeAt"), i], [(i, None)])
-                for i in range(i, i_end)
-            ])
+        data = await multicall_scheduler.run([
+            Call(nm.address, [rp.seth_sig(nm.abi, "getNodeAt"), i], [(i, None)])
+            for i in range(latest_db + 1, latest_rp + 1)
+        ], label="untracked_nodes")
         log.debug(f"Inserting {len(data)} new nodes into db")
         self.db.node_operators_new.insert_many([
             {"_id": i, "address": a}
@@ -402,20 +614,16 @@ class NodeTask(commands.Cog):
             log.debug("No node operators need to be updated with static data")
             return
         data = {}
-        batch_size = self.batch_size // len(lambs)
-        for i in range(0, len(node_addresses), batch_size):
-            i_end = min(i + batch_size, len(node_addresses))
-            log.debug(f"Getting node operators static data ({i} to {i_end})")
-            res = await rp.multicall2([
-                Call(*lamb(a))
-                for a in node_addresses[i:i_end]
-                for lamb in lambs
-            ], require_success=False)
-            # update data dict with results
-            for (address, variable_name), value in res.items():
-                if address not in data:
-                    data[address] = {}
-                data[address][variable_name] = value
+        res = await multicall_scheduler.run([
+            Call(*lamb(a))
+            for a in node_addresses
+            for lamb in lambs
+        ], require_success=False, label="node_static_data")
+        # update data dict with results
+        for (address, variable_name), value in res.items():
+            if address not in data:
+                data[address] = {}
+            data[address][variable_name] = value
         log.debug(f"Updating {len(data)} node operators with static data")
         # update minipools in db
         bulk = [
@@ -428,13 +636,18 @@ class NodeTask(commands.Cog):
         log.debug("Node operators updated with static data")
 
     @timerun_async
-    async def update_dynamic_node_operator_metadata(self):
+    async def update_dynamic_node_operator_metadata(self, dirty: Optional[DirtySet] = None):
         ndf = rp.get_contract_by_name("rocketNodeDistributorFactory")
         nd = rp.get_contract_by_name("rocketNodeDeposit")
         nm = rp.get_contract_by_name("rocketNodeManager")
         mm = rp.get_contract_by_name("rocketMinipoolManager")
         ns = rp.get_contract_by_name("rocketNodeStaking")
         mc = rp.get_contract_by_name("multicall3")
+        # fee distributor balances change without emitting events, so they're refreshed for every node
+        volatile_lambs = [
+            lambda n: (mc.address, [rp.seth_sig(mc.abi, "getEthBalance"), n["fee_distributor_address"]],
+                       [((n["address"], "fee_distributor_eth_balance"), safe_to_float)]),
+        ]
         lambs = [
             lambda n: (ndf.address, [rp.seth_sig(ndf.abi, "getProxyAddress"), n["address"]],
                        [((n["address"], "fee_distributor_address"), None)]),
@@ -457,41 +670,32 @@ class NodeTask(commands.Cog):
                        [((n["address"], "effective_rpl_stake"), safe_to_float)]),
             lambda n: (ns.address, [rp.seth_sig(ns.abi, "getNodeETHCollateralisationRatio"), n["address"]],
                        [((n["address"], "effective_node_share"), safe_inv)]),
-            lambda n: (mc.address, [rp.seth_sig(mc.abi, "getEthBalance"), n["fee_distributor_address"]],
-                       [((n["address"], "fee_distributor_eth_balance"), safe_to_float)]),
             lambda n: (mm.address, [rp.seth_sig(mm.abi, "getNodeStakingMinipoolCount"), n["address"]],
                        [((n["address"], "staking_minipool_count"), None)]),
             lambda n: (nd.address, [rp.seth_sig(nd.abi, "getNodeDepositCredit"), n["address"]],
                           [((n["address"], "deposit_credit"), safe_to_float)])
-        ]
+        ] + volatile_lambs
         # get all node operators from db, but we only care about the address and the fee_distributor_address
         nodes = list(self.db.node_operators_new.find({}, {"address": 1, "fee_distributor_address": 1}))
-        data = {}
-        att_count = 0
-        batch_size = self.batch_size // len(lambs)
-        for i in range(0, len(nodes), batch_size):
-            i_end = min(i + batch_size, len(nodes))
-            log.debug(f"Getting node operator metadata ({i} to {i_end})")
-            res = await rp.multicall2([
-                Call(*lamb(n))
-                for n in nodes[i:i_end]
-                for lamb in lambs
-            ], require_success=False)
-            # update data dict with results
-            for (address, variable_name), value in res.items():
-                if address not in data:
-                    data[address] = {}
-                data[address][variable_name] = value
-                att_count += 1
-        log.debug(f"Updating {att_count} node operator attributes in db")
-        # update minipools in db
-        bulk = [
-            UpdateOne(
-                {"address": a},
-                {"$set": d}
-            ) for a, d in data.items()
+        refresh = self._select_refresh(self.db.node_operators_new, dirty and dirty.nodes, "rpl_stake")
+        log.debug(f"Refreshing full metadata for {len(refresh)}/{len(nodes)} node operators")
+        calls = [
+            Call(*lamb(n))
+            for n in nodes
+            for lamb in (lambs if n["address"] in refresh else volatile_lambs)
         ]
-        self.db.node_operators_new.bulk_write(bulk, ordered=False)
+        data = {}
+        res = await multicall_scheduler.run(calls, require_success=False, label="node_metadata")
+        # update data dict with results
+        for (address, variable_name), value in res.items():
+            if address not in data:
+                data[address] = {}
+            data[address][variable_name] = value
+        # only write attributes that changed
+        bulk = self._diff_updates(self.db.node_operators_new, data)
+        log.debug(f"Updating {len(bulk)} changed node operators in db")
+        if bulk:
+            self.db.node_operators_new.bulk_write(bulk, ordered=False)
         log.debug("Node operators updated with metadata")
 
 async def setup(self):
@@ -1,7 +1,6 @@
 import logging
 from datetime import datetime, timedelta
 
-from motor.motor_asyncio import AsyncIOMotorClient
 from discord import Object
 from discord.app_commands import guilds
 from discord.ext import commands, tasks
@@ -18,7 +17,7 @@ log.setLevel(cfg["log_level"])
 class PinnedMessages(commands.Cog):
     def __init__(self, bot: RocketWatch):
         self.bot = bot
-        self.db = AsyncIOMotorClient(cfg["mongodb.uri"]).rocketwatch
+        self.db = bot.db
 
         if not self.run_loop.is_running() and bot.is_ready():
             self.run_loop.start()
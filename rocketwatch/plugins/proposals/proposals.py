@@ -5,25 +5,26 @@ from datetime import datetime, timedelta
 from io import BytesIO
 
 import aiohttp
-import matplotlib as mpl
 import numpy as np
 from PIL import Image
 from discord import File
 from discord.ext import commands
 from discord.ext.commands import Context
 from discord.ext.commands import hybrid_command
-from matplotlib import pyplot as plt
-from motor.motor_asyncio import AsyncIOMotorClient
 from pymongo import ReplaceOne
-from wordcloud import WordCloud
 
 from rocketwatch import RocketWatch
 from utils.cfg import cfg
+from utils.lazy_import import lazy_import
 from utils.embeds import Embed
 from utils.solidity import beacon_block_to_date, date_to_beacon_block
 from utils.time_debug import timerun_async
 from utils.visibility import is_hidden
 
+mpl = lazy_import("matplotlib")
+plt = lazy_import("matplotlib.pyplot")
+wordcloud = lazy_import("wordcloud")
+
 log = logging.getLogger("proposals")
 log.setLevel(cfg["log_level"])
 
@@ -120,7 +121,7 @@ class Proposals(commands.Cog):
         self.rocketscan_proposals_url = "https://rocketscan.io/api/mainnet/beacon/blocks/all"
         self.last_chore_run = 0
         # connect to local mongodb
-        self.db = AsyncIOMotorClient(cfg["mongodb.uri"]).get_database("rocketwatch")
+        self.db = bot.db
         self.created_view = False
 
     async def create_minipool_proposal_view(self):
@@ -540,7 +541,7 @@ class Proposals(commands.Cog):
         # load font
         font_path = "./plugins/proposals/assets/noto.ttf"
 
-        wc = WordCloud(max_words=2 ** 16,
+        wc = wordcloud.WordCloud(max_words=2 ** 16,
                        scale=2,
                        mask=mask,
                        max_font_size=100,
@@ -10,7 +10,6 @@ from discord import File
 from discord.ext import commands
 from discord.ext.commands import Context
 from discord.ext.commands import hybrid_command
-from motor.motor_asyncio import AsyncIOMotorClient
 
 from rocketwatch import RocketWatch
 from utils import solidity
@@ -29,7 +28,7 @@ log.setLevel(cfg["log_level"])
 class Random(commands.Cog):
     def __init__(self, bot: RocketWatch):
         self.bot = bot
-        self.db = AsyncIOMotorClient(cfg["mongodb.uri"]).get_database("rocketwatch")
+        self.db = bot.db
 
     @hybrid_command()
     async def dice(self, ctx: Context, dice_string: str = "1d6"):
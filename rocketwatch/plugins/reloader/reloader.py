@@ -17,6 +17,13 @@ class Reloader(Cog):
     def __init__(self, bot: RocketWatch):
         self.bot = bot
         
+    async def _warm_up(self, interaction: Interaction, extension: str) -> None:
+        # cogs do their blocking setup in warm_up, which load_extension doesn't run
+        cogs = {name for name, cog in self.bot.cogs.items() if type(cog).__module__ == extension}
+        await self.bot.warm_up_cogs(extension)
+        if failed := cogs - set(self.bot.cogs):
+            await interaction.followup.send(content=f"Failed to warm up {', '.join(sorted(failed))}, removed!")
+
     async def _get_loaded_extensions(self, interaction: Interaction, current: str) -> list[Choice[str]]:
         loaded = {ext.split(".")[-1] for ext in self.bot.extensions.keys()}
         return [Choice(name=plugin, value=plugin) for plugin in loaded if current.lower() in plugin.lower()][:25]
@@ -33,8 +40,10 @@ class Reloader(Cog):
     async def load(self, interaction: Interaction, module: str):
         """Load a new module"""
         await interaction.response.defer()
+        extension = f"plugins.{module}.{module}"
         try:
-            await self.bot.load_extension(f"plugins.{module}.{module}")
+            await self.bot.load_extension(extension)
+            await self._warm_up(interaction, extension)
             await interaction.followup.send(content=f"Loaded plugin `{module}`!")
             await self.bot.sync_commands()
         except ExtensionAlreadyLoaded:
@@ -63,8 +72,10 @@ class Reloader(Cog):
     async def reload(self, interaction: Interaction, module: str):
         """Reload a module"""
         await interaction.response.defer(ephemeral=True)
+        extension = f"plugins.{module}.{module}"
         try:
-            await self.bot.reload_extension(f"plugins.{module}.{module}")
+            await self.bot.reload_extension(extension)
+            await self._warm_up(interaction, extension)
             await interaction.followup.send(content=f"Reloaded plugin `{module}`!")
             await self.bot.sync_commands()
         except ExtensionNotLoaded:
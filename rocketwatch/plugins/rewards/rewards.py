@@ -1,7 +1,6 @@
 import logging
 import aiohttp
 import numpy as np
-import matplotlib.pyplot as plt
 
 from io import BytesIO
 from discord import File
@@ -16,11 +15,14 @@ from dataclasses import dataclass
 from rocketwatch import RocketWatch
 from utils import solidity
 from utils.cfg import cfg
+from utils.lazy_import import lazy_import
 from utils.embeds import Embed, resolve_ens
 from utils.rocketpool import rp
 from utils.retry import retry_async
 from utils.block_time import ts_to_block
 
+plt = lazy_import("matplotlib.pyplot")
+
 log = logging.getLogger("rewards")
 log.setLevel(cfg["log_level"])
 
@@ -10,6 +10,7 @@ from discord.app_commands import Choice, describe
 from cachetools.func import ttl_cache
 
 from rocketwatch import RocketWatch
+from utils.blocking import run_blocking
 from utils.cfg import cfg
 from utils.embeds import Embed
 from utils.retry import retry
@@ -27,6 +28,11 @@ class RPIPs(commands.Cog):
     async def rpip(self, ctx: Context, name: str):
         """Show information about a specific RPIP."""
         await ctx.defer()
+        # fetching the RPIP list and metadata is blocking
+        embed = await run_blocking(self._build_rpip_embed, name)
+        await ctx.send(embed=embed)
+
+    def _build_rpip_embed(self, name: str) -> Embed:
         embed = Embed()
         embed.set_author(name="🔗 Data from rpips.rocketpool.net", url="https://rpips.rocketpool.net")
 
@@ -47,7 +53,7 @@ class RPIPs(commands.Cog):
         else:
             embed.description = "No matching RPIPs."
 
-        await ctx.send(embed=embed)
+        return embed
 
     class RPIP:
         __slots__ = (
@@ -109,7 +115,7 @@ class RPIPs(commands.Cog):
     @rpip.autocomplete("name")
     async def _get_rpip_names(self, ctx: Context, current: str) -> list[Choice[str]]:
         choices = []
-        for rpip in self.get_all_rpips():
+        for rpip in await run_blocking(self.get_all_rpips):
             if current.lower() in (name := rpip.full_title).lower():
                 choices.append(Choice(name=name, value=name))
         return choices[:-26:-1]
@@ -2,23 +2,24 @@ import logging
 from io import BytesIO
 
 import humanize
-import matplotlib.pyplot as plt
 import numpy as np
 from discord import File
 from discord.ext import commands
 from discord.ext.commands import Context
 from discord.ext.commands import hybrid_command
-from motor.motor_asyncio import AsyncIOMotorClient
 
 from rocketwatch import RocketWatch
 from utils import solidity
 from utils.cfg import cfg
+from utils.lazy_import import lazy_import
 from utils.embeds import Embed
 from utils.block_time import ts_to_block
 from utils.rocketpool import rp
 from utils.shared_w3 import w3
 from utils.visibility import is_hidden
 
+plt = lazy_import("matplotlib.pyplot")
+
 log = logging.getLogger("rpl")
 log.setLevel(cfg["log_level"])
 
@@ -26,7 +27,7 @@ log.setLevel(cfg["log_level"])
 class RPL(commands.Cog):
     def __init__(self, bot: RocketWatch):
         self.bot = bot
-        self.db = AsyncIOMotorClient(cfg["mongodb.uri"]).rocketwatch
+        self.db = bot.db
 
     @hybrid_command()
     async def rpl_apr(self, ctx: Context):
@@ -2,21 +2,23 @@ import datetime
 import logging
 from io import BytesIO
 
-import matplotlib.colors as mcolors
-import matplotlib.pyplot as plt
 import pytz
 import requests
 from discord import File
 from discord.ext import commands
 from discord.ext.commands import Context, hybrid_command
 from homeassistant_api import Client
-from matplotlib import dates
 
 from rocketwatch import RocketWatch
 from utils.cfg import cfg
+from utils.lazy_import import lazy_import
 from utils.embeds import Embed
 from utils.visibility import is_hidden
 
+mcolors = lazy_import("matplotlib.colors")
+plt = lazy_import("matplotlib.pyplot")
+dates = lazy_import("matplotlib.dates")
+
 log = logging.getLogger("sleep")
 log.setLevel(cfg["log_level"])
 
@@ -12,9 +12,10 @@ from discord.app_commands import command
 from web3.constants import ADDRESS_ZERO
 from eth_typing import ChecksumAddress, BlockNumber
 from graphql_query import Operation, Query, Argument
-from pymongo import MongoClient, InsertOne, UpdateOne, DeleteOne, DESCENDING
+from pymongo import InsertOne, UpdateOne, DeleteOne, DESCENDING
 
 from rocketwatch import RocketWatch
+from utils.blocking import run_blocking
 from utils.cfg import cfg
 from utils.embeds import Embed, el_explorer_url
 from utils.image import Image, ImageCanvas, Color, FontVariant
@@ -32,7 +33,7 @@ log.setLevel(cfg["log_level"])
 class Snapshot(EventPlugin):
     def __init__(self, bot: RocketWatch):
         super().__init__(bot, timedelta(minutes=2))
-        client = MongoClient(cfg["mongodb.uri"]).rocketwatch
+        client = bot.sync_db
         self.proposal_db = client.snapshot_proposals
         self.vote_db = client.snapshot_votes
 
@@ -583,7 +584,7 @@ class Snapshot(EventPlugin):
         embed = Embed(title="Snapshot Proposals")
         embed.set_author(name="🔗 Data from snapshot.org", url="https://vote.rocketpool.net")
 
-        proposals = self.fetch_proposals("active", reverse=True)[::-1]
+        proposals = (await run_blocking(self.fetch_proposals, "active", reverse=True))[::-1]
         if not proposals:
             embed.description = "No active proposals."
             return await interaction.followup.send(embed=embed)
@@ -181,7 +181,7 @@ async def _use(db, interaction: Interaction, name: str, mention: User | None):
 class SupportGlobal(Cog):
     def __init__(self, bot: RocketWatch):
         self.bot = bot
-        self.db = AsyncIOMotorClient(cfg["mongodb.uri"]).rocketwatch
+        self.db = bot.db
 
     @app_commands.command(name="use")
     async def _use_1(self, interaction: Interaction, name: str, mention: User | None):
@@ -219,7 +219,7 @@ class SupportUtils(GroupCog, name="support"):
 
     def __init__(self, bot: RocketWatch):
         self.bot = bot
-        self.db = AsyncIOMotorClient(cfg["mongodb.uri"]).rocketwatch
+        self.db = bot.db
 
     @Cog.listener()
     async def on_ready(self):
@@ -1,6 +1,7 @@
 import json
 import logging
 import warnings
+from concurrent.futures import ThreadPoolExecutor
 
 import web3.exceptions
 import humanize
@@ -10,6 +11,7 @@ from discord.app_commands import command, guilds
 from discord.ext.commands import is_owner
 from eth_typing import ChecksumAddress, BlockNumber, BlockIdentifier
 from web3.datastructures import MutableAttributeDict as aDict
+from web3.types import RPCEndpoint
 
 from rocketwatch import RocketWatch
 from utils import solidity
@@ -19,6 +21,7 @@ from utils.embeds import assemble, prepare_args, el_explorer_url, Embed
 from utils.event import EventPlugin, Event
 from utils.rocketpool import rp
 from utils.shared_w3 import w3
+from utils.block_time import block_to_ts
 
 log = logging.getLogger("transactions")
 log.setLevel(cfg["log_level"])
@@ -30,6 +33,8 @@ class Transactions(EventPlugin):
         contract_addresses, function_map = self._parse_transaction_config()
         self.addresses = contract_addresses
         self.function_map = function_map
+        self.block_fetch_workers = cfg.get("events.block_fetch_workers", 16)
+        self._trace_filter_supported = True
 
     @staticmethod
     def _parse_transaction_config() -> tuple[list[ChecksumAddress], dict]:
@@ -83,9 +88,8 @@ class Transactions(EventPlugin):
     async def replay_tx(self, interaction: Interaction, tx_hash: str):
         await interaction.response.defer()
         tnx = w3.eth.get_transaction(tx_hash)
-        block = w3.eth.get_block(tnx.blockHash)
 
-        responses: list[Event] = self.process_transaction(block, tnx, tnx.to, tnx.input)
+        responses: list[Event] = self.process_transaction(block_to_ts(tnx.blockNumber), tnx, tnx.to, tnx.input)
         if responses:
             await interaction.followup.send(embeds=[response.embed for response in responses])          
         else:
@@ -102,9 +106,42 @@ class Transactions(EventPlugin):
             raise err
 
     def get_past_events(self, from_block: BlockNumber, to_block: BlockNumber) -> list[Event]:
+        if self._trace_filter_supported:
+            try:
+                return self.get_events_from_traces(from_block, to_block)
+            except ValueError as err:
+                # JSON-RPC "method not found", node doesn't expose the trace API
+                if not (isinstance(err.args[0], dict) and err.args[0].get("code") == -32601):
+                    raise err
+                log.warning("trace_filter not supported by node, falling back to block scanning")
+                self._trace_filter_supported = False
+
+        with ThreadPoolExecutor(max_workers=self.block_fetch_workers) as executor:
+            results = executor.map(self.get_events_for_block, range(from_block, to_block + 1))
+            return [event for block_events in results for event in block_events]
+
+    def get_events_from_traces(self, from_block: BlockNumber, to_block: BlockNumber) -> list[Event]:
+        log.debug(f"Tracing calls to tracked contracts in [{from_block}, {to_block}]")
+        traces = w3.manager.request_blocking(RPCEndpoint("trace_filter"), [{
+            "fromBlock": hex(from_block),
+            "toBlock"  : hex(to_block),
+            "toAddress": self.addresses
+        }])
+
+        # trace_filter also matches internal calls, only transactions sent to a tracked contract are relevant
+        tracked_addresses = {address.lower() for address in self.addresses}
+        # dict as an ordered set, keeps transactions in chain order
+        tx_hashes: dict[str, None] = {}
+        for trace in traces:
+            if trace["type"] != "call" or trace["traceAddress"]:
+                continue
+            if trace["action"]["to"].lower() in tracked_addresses:
+                tx_hashes[trace["transactionHash"]] = None
+
         events = []
-        for block in range(from_block, to_block):
-            events.extend(self.get_events_for_block(block))
+        for tx_hash in tx_hashes:
+            tnx = w3.eth.get_transaction(tx_hash)
+            events.extend(self.process_transaction(block_to_ts(tnx.blockNumber), tnx, tnx.to, tnx.input))
         return events
 
     def get_events_for_block(self, block_number: BlockIdentifier) -> list[Event]:
@@ -118,7 +155,7 @@ class Transactions(EventPlugin):
         events = []
         for tnx in block.transactions:
             if "to" in tnx:
-                events.extend(self.process_transaction(block, tnx, tnx.to, tnx.input))
+                events.extend(self.process_transaction(block.timestamp, tnx, tnx.to, tnx.input))
             else:
                 log.debug((
                     f"Skipping transaction {tnx.hash.hex()} as it has no `to` parameter. "
@@ -254,7 +291,7 @@ class Transactions(EventPlugin):
         args = prepare_args(args)
         return [assemble(args)]
 
-    def process_transaction(self, block, tnx, contract_address, fn_input) -> list[Event]:
+    def process_transaction(self, block_timestamp: int, tnx, contract_address, fn_input) -> list[Event]:
         if contract_address not in self.addresses:
             return []
 
@@ -283,7 +320,7 @@ class Transactions(EventPlugin):
 
         event = aDict(tnx)
         event.args = {arg.lstrip("_"): value for arg, value in decoded[1].items()}
-        event.args["timestamp"] = block.timestamp
+        event.args["timestamp"] = block_timestamp
         event.args["function_name"] = function
         if not receipt.status:
             event.args["reason"] = rp.get_revert_reason(tnx)
@@ -318,7 +355,7 @@ class Transactions(EventPlugin):
             event.args["proposal_body"] = dao.build_proposal_body(proposal, include_proposer=False)
 
             dao_address = dao.contract.address
-            responses = self.process_transaction(block, tnx, dao_address, payload)
+            responses = self.process_transaction(block_timestamp, tnx, dao_address, payload)
 
         embeds = self.create_embeds(event_name, event)
         new_responses = []
@@ -5,7 +5,6 @@ from colorama import Style
 from discord.app_commands import describe
 from discord.ext import commands
 from discord.ext.commands import Context, hybrid_command
-from motor.motor_asyncio import AsyncIOMotorClient
 
 from rocketwatch import RocketWatch
 from utils import solidity
@@ -51,7 +50,7 @@ def split_rewards_logic(balance, node_share, commission, force_base=False):
 class TVL(commands.Cog):
     def __init__(self, bot: RocketWatch):
         self.bot = bot
-        self.db = AsyncIOMotorClient(cfg["mongodb.uri"]).get_database("rocketwatch")
+        self.db = bot.db
 
     @hybrid_command()
     @describe(show_all="Also show entries with 0 value")
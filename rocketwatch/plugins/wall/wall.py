@@ -11,12 +11,6 @@ from discord.ext import commands
 from discord.ext.commands import Context
 from discord.ext.commands import hybrid_command
 from discord.app_commands import describe
-from matplotlib import (
-    pyplot as plt,
-    font_manager as fm,
-    ticker,
-    figure
-)
 from eth_typing import ChecksumAddress, HexStr
 
 from rocketwatch import RocketWatch
@@ -30,7 +24,14 @@ from utils.liquidity import (
     Kraken, Kucoin, Bithumb, BingX, Bitvavo, HTX, BitMart, Bitrue, CoinTR,
     BalancerV2, UniswapV3
 )
+from utils.blocking import run_blocking
 from utils.cfg import cfg
+from utils.lazy_import import lazy_import
+
+plt = lazy_import("matplotlib.pyplot")
+fm = lazy_import("matplotlib.font_manager")
+ticker = lazy_import("matplotlib.ticker")
+figure = lazy_import("matplotlib.figure")
 
 log = logging.getLogger("wall")
 log.setLevel(cfg["log_level"])
@@ -58,7 +59,15 @@ class Wall(commands.Cog):
             Bitrue("RPL", ["USDT"]),
             CoinTR("RPL", ["USDT"]),
         }
-        self.dex: set[DEX] = {
+        # pools are set up with on-chain calls, see warm_up
+        self.dex: set[DEX] = set()
+
+    async def warm_up(self) -> None:
+        self.dex = await run_blocking(self._get_dexes)
+
+    @staticmethod
+    def _get_dexes() -> set[DEX]:
+        return {
             BalancerV2([
                 BalancerV2.WeightedPool(HexStr("0x9f9d900462492d4c21e9523ca95a7cd86142f298000200000000000000000462"))
             ]),
@@ -79,8 +88,8 @@ class Wall(commands.Cog):
 
         for liq in markets.values():
             conv = liq.price / rpl_usd
-            depth += np.array(list(map(liq.depth_at, x * conv))) / conv
-            liquidity += (liq.depth_at(float(x[0] * conv)) + liq.depth_at(float(x[-1] * conv))) / conv
+            depth += liq.depth_at(x * conv) / conv
+            liquidity += float(liq.depth_at(x[[0, -1]] * conv).sum()) / conv
 
         return depth, liquidity
 
@@ -133,7 +142,7 @@ class Wall(commands.Cog):
             rpl_eth: float,
             cex_data: OrderedDict[CEX, np.ndarray],
             dex_data: OrderedDict[DEX, np.ndarray],
-    ) -> figure.Figure:
+    ) -> "figure.Figure":
         fig, ax = plt.subplots(figsize=(10, 5))
 
         ax.minorticks_on()
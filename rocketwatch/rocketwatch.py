@@ -1,5 +1,7 @@
+import asyncio
 import io
 import logging
+import time
 import traceback
 from pathlib import Path
 from typing import Optional
@@ -18,8 +20,16 @@ from discord.ext import commands
 from discord.ext.commands import Bot, Context
 from discord.app_commands import CommandTree, AppCommandError
 
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo.database import Database as SyncDatabase
+
+from utils.block_time import block_time_index
 from utils.cfg import cfg
+from utils.database import database
+from utils.db_indexes import ensure_indexes
+from utils.lazy_import import prewarm
 from utils.retry import retry_async
+from utils.shared_w3 import async_rpc, mainnet_async_rpc, historical_async_rpc
 
 log = logging.getLogger("rocketwatch")
 log.setLevel(cfg["log_level"])
@@ -34,6 +44,15 @@ class RocketWatch(Bot):
     
     def __init__(self, intents: Intents) -> None:
         super().__init__(command_prefix=(), tree_cls=self.RWCommandTree, intents=intents)
+        self.database = database
+
+    @property
+    def db(self) -> AsyncIOMotorDatabase:
+        return self.database.db
+
+    @property
+    def sync_db(self) -> SyncDatabase:
+        return self.database.sync_db
     
     async def _load_plugins(self):
         chain = cfg["rocketpool.chain"]
@@ -59,6 +78,8 @@ class RocketWatch(Bot):
                 log.debug(f"Plugin {_plugin} implicitly included")
                 return True
 
+        # registration: import each plugin and construct its cogs, which should be cheap
+        load_times: dict[str, float] = {}
         for path in Path("plugins").glob('**/*.py'):
             plugin_name = path.stem
             if not should_load_plugin(plugin_name):
@@ -66,17 +87,73 @@ class RocketWatch(Bot):
                 continue
 
             log.info(f"Loading plugin \"{plugin_name}\"")
+            start = time.perf_counter()
             try:
                 extension_name = f"plugins.{plugin_name}.{plugin_name}"
                 await self.load_extension(extension_name)
             except Exception:
                 log.exception(f"Failed to load plugin \"{plugin_name}\"")
-
-        log.info('Finished loading plugins')
+            load_times[plugin_name] = time.perf_counter() - start
+
+        # warm-up: blocking setup work of all cogs, run concurrently
+        start = time.perf_counter()
+        warm_up_times = await self.warm_up_cogs()
+        log.info(f"Finished loading plugins, warm-up took {time.perf_counter() - start:.2f}s")
+        self._log_startup_report(load_times, warm_up_times)
+
+    async def warm_up_cogs(self, extension: Optional[str] = None) -> dict[str, float]:
+        """
+        Await the optional warm_up() coroutine of every cog concurrently, or only of the cogs
+        defined by extension. Must run after every (re)load of an extension that defines one.
+        Cogs whose warm-up fails are removed, same as plugins that fail to load.
+        """
+        cogs = {
+            name: cog for name, cog in self.cogs.items()
+            if hasattr(cog, "warm_up") and (extension is None or type(cog).__module__ == extension)
+        }
+        timings: dict[str, float] = {}
+
+        async def warm_up(name: str, cog: commands.Cog) -> None:
+            try:
+                start = time.perf_counter()
+                await cog.warm_up()
+                timings[name] = time.perf_counter() - start
+            except Exception:
+                log.exception(f"Failed to warm up cog \"{name}\", removing it")
+                await self.remove_cog(name)
+
+        await asyncio.gather(*[warm_up(name, cog) for name, cog in cogs.items()])
+        return timings
+
+    def _log_startup_report(self, load_times: dict[str, float], warm_up_times: dict[str, float]) -> None:
+        # attribute cog warm-up to the plugin that defines it
+        plugin_warm_up: dict[str, float] = {}
+        for cog_name, duration in warm_up_times.items():
+            if cog := self.get_cog(cog_name):
+                plugin_name = type(cog).__module__.split(".")[-1]
+                plugin_warm_up[plugin_name] = plugin_warm_up.get(plugin_name, 0) + duration
+
+        rows = sorted(
+            ((name, load, plugin_warm_up.get(name, 0.0)) for name, load in load_times.items()),
+            key=lambda row: row[1] + row[2],
+            reverse=True
+        )
+        report = "\n".join(f"{name:<28} load {load:6.2f}s  warm-up {warm:6.2f}s" for name, load, warm in rows)
+        log.info(f"Plugin startup report:\n{report}")
 
     async def setup_hook(self) -> None:
+        await ensure_indexes(self.db)
+        # sparse block timestamp samples for ts_to_block, topped up periodically
+        block_time_index.start_fill()
         await self._load_plugins()
         
+    async def close(self) -> None:
+        await super().close()
+        # shared clients outlive cogs, release them once the bot is down
+        for client in {async_rpc, mainnet_async_rpc, historical_async_rpc} - {None}:
+            await client.close()
+        self.database.close()
+
     async def sync_commands(self) -> None:
         log.info("Syncing command tree...")
         await self.tree.sync()
@@ -90,6 +167,9 @@ class RocketWatch(Bot):
 
     async def on_ready(self):
         log.info(f"Logged in as {self.user.name} ({self.user.id})")
+        if cfg.get("modules.prewarm_imports", True):
+            # heavy plotting and model libraries are imported on first use, load them in the background
+            asyncio.get_running_loop().run_in_executor(None, prewarm)
         commands_enabled = cfg["modules.enable_commands"]
         if not commands_enabled:
             log.info("Commands disabled, clearing tree...")
@@ -0,0 +1,169 @@
+import logging
+import threading
+from dataclasses import dataclass
+from typing import Optional
+
+from cachetools import LRUCache
+from eth_typing import ChecksumAddress
+from hexbytes import HexBytes
+from web3.types import RPCEndpoint
+
+from utils.cached_ens import ens
+from utils.cfg import cfg
+from utils.rocketpool import rp
+from utils.shared_w3 import w3, historical_w3
+
+log = logging.getLogger("address_profile")
+log.setLevel(cfg["log_level"])
+
+
+@dataclass(frozen=True, slots=True)
+class AddressProfile:
+    address: ChecksumAddress
+    block: int
+    is_minipool: bool
+    is_node: bool
+    in_smoothing_pool: bool
+    odao_member_id: Optional[str]
+    security_member_id: Optional[str]
+    code_hash: Optional[str]
+    contract_name: Optional[str]
+    ens_name: Optional[str]
+
+    @property
+    def has_code(self) -> bool:
+        return self.code_hash is not None
+
+    @classmethod
+    def unresolved(cls, address: ChecksumAddress, block: int = 0) -> "AddressProfile":
+        """Profile without any facts, for when resolving failed"""
+        return cls(address, block, False, False, False, None, None, None, None, None)
+
+
+class AddressProfileResolver:
+    """
+    Resolves everything el_explorer_url needs to know about a set of addresses at once:
+    Rocket Pool membership checks and contract names in one Multicall3 aggregate,
+    contract code in one JSON-RPC batch and ENS names in one reverse records lookup.
+    """
+    NAME_ABI = [{
+        "inputs"         : [],
+        "name"           : "name",
+        "outputs"        : [{"internalType": "string", "name": "", "type": "string"}],
+        "stateMutability": "view",
+        "type"           : "function"
+    }]
+    # (profile field, contract function) pairs checked for every address
+    MEMBERSHIP_CALLS = [
+        ("is_minipool", "rocketMinipoolManager.getMinipoolExists"),
+        ("is_node", "rocketNodeManager.getNodeExists"),
+        ("in_smoothing_pool", "rocketNodeManager.getSmoothingPoolRegistrationState"),
+        ("odao_member_id", "rocketDAONodeTrusted.getMemberID"),
+        ("security_member_id", "rocketDAOSecurity.getMemberID"),
+    ]
+
+    def __init__(self):
+        self._cache = LRUCache(maxsize=4096)
+        self._lock = threading.Lock()
+
+    def _membership_functions(self, address: ChecksumAddress) -> list:
+        functions = []
+        for field, path in self.MEMBERSHIP_CALLS:
+            try:
+                functions.append((field, rp.get_function(path, address)))
+            except Exception:
+                # contract not deployed on this chain
+                log.debug(f"Skipping {path} for address profiles")
+        return functions
+
+    @staticmethod
+    def _get_code(addresses: list[ChecksumAddress], block: int, historical: bool) -> list[HexBytes]:
+        web3 = historical_w3 if (historical and historical_w3) else w3
+        responses = web3.provider.make_batch_request([
+            (RPCEndpoint("eth_getCode"), [address, hex(block)]) for address in addresses
+        ])
+        codes = []
+        for response in responses:
+            if "error" in response:
+                raise ValueError(response["error"])
+            codes.append(HexBytes(response["result"]))
+        return codes
+
+    def _resolve(self, addresses: list[ChecksumAddress], block: int, historical: bool) -> tuple[list[AddressProfile], bool]:
+        """Profiles for all addresses and whether every source answered, a failed source only drops its fields"""
+        log.debug(f"Resolving {len(addresses)} address profiles at block {block}")
+        calls = []
+        for address in addresses:
+            calls.append(self._membership_functions(address))
+            calls[-1].append(("contract_name", w3.eth.contract(address=address, abi=self.NAME_ABI).functions.name()))
+
+        complete = True
+        flat_calls = [function for address_calls in calls for _, function in address_calls]
+        try:
+            flat_results = rp.multicall3(flat_calls, block=block, require_success=False, historical=historical)
+        except Exception:
+            log.exception("Failed to resolve Rocket Pool membership and contract names")
+            flat_results, complete = [None] * len(flat_calls), False
+        results = iter(flat_results)
+
+        try:
+            codes = self._get_code(addresses, block, historical)
+        except Exception:
+            log.exception("Failed to fetch contract code")
+            codes, complete = [None] * len(addresses), False
+
+        try:
+            ens_names = ens.get_names(addresses)
+        except Exception:
+            log.exception("Failed to resolve ENS names")
+            ens_names, complete = {}, False
+
+        profiles = []
+        for address, address_calls, code in zip(addresses, calls, codes):
+            fields = {field: next(results) for field, _ in address_calls}
+            profiles.append(AddressProfile(
+                address=address,
+                block=block,
+                is_minipool=bool(fields.get("is_minipool")),
+                is_node=bool(fields.get("is_node")),
+                in_smoothing_pool=bool(fields.get("in_smoothing_pool")),
+                odao_member_id=fields.get("odao_member_id") or None,
+                security_member_id=fields.get("security_member_id") or None,
+                code_hash=w3.keccak(text=code.hex()).hex() if code else None,
+                contract_name=(fields.get("contract_name") or None) if code else None,
+                ens_name=ens_names.get(address)
+            ))
+        return profiles, complete
+
+    def resolve(self, addresses: list[ChecksumAddress], block="latest") -> dict[ChecksumAddress, AddressProfile]:
+        """Return profiles for all addresses, resolving the ones not yet cached for this block in one go"""
+        historical = block != "latest"
+        block = rp.get_head_block() if block == "latest" else block
+        addresses = list(dict.fromkeys(w3.toChecksumAddress(a) for a in addresses))
+
+        with self._lock:
+            profiles = {a: self._cache[(a, block)] for a in addresses if (a, block) in self._cache}
+        if missing := [a for a in addresses if a not in profiles]:
+            resolved, complete = self._resolve(missing, block, historical)
+            for profile in resolved:
+                profiles[profile.address] = profile
+                # partial profiles are resolved again next time
+                if complete:
+                    with self._lock:
+                        self._cache[(profile.address, block)] = profile
+        return profiles
+
+    def get(self, address: ChecksumAddress, block="latest") -> AddressProfile:
+        address = w3.toChecksumAddress(address)
+        return self.resolve([address], block)[address]
+
+
+address_profiles = AddressProfileResolver()
+
+
+def resolve_address_profiles(addresses: list[ChecksumAddress], block="latest") -> dict[ChecksumAddress, AddressProfile]:
+    return address_profiles.resolve(addresses, block)
+
+
+def get_address_profile(address: ChecksumAddress, block="latest") -> AddressProfile:
+    return address_profiles.get(address, block)
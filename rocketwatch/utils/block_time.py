@@ -1,45 +1,237 @@
-import math
 import logging
-from functools import cache
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+import pymongo
+from cachetools import LRUCache, TTLCache
+from cachetools.func import ttl_cache
+from pymongo import UpdateOne
 
 from utils.cfg import cfg
+from utils.database import database
 from utils.shared_w3 import w3
 
 log = logging.getLogger("block_time")
 log.setLevel(cfg["log_level"])
 
 
-@cache
+class BlockTimeIndex:
+    """
+    Persistent block number -> timestamp index backed by MongoDB.
+
+    Only blocks at least REORG_DEPTH below the chain head are persisted, more recent
+    headers are only kept in a short-lived in-memory cache. A sparse sample of the
+    whole chain is filled and periodically topped up in the background so that
+    timestamp lookups can interpolate between known blocks instead of binary
+    searching over the node.
+    """
+    # blocks this far below head are considered safe from reorgs
+    REORG_DEPTH = 64
+    # distance between blocks sampled by the background fill
+    SAMPLE_STRIDE = 1_000
+    FILL_BATCH_SIZE = 250
+    # seconds between top-ups of the sample index
+    FILL_INTERVAL = cfg.get("block_time.fill_interval", 3600)
+    # seconds for which headers of not yet final blocks are reused
+    RECENT_TTL = cfg.get("block_time.recent_ttl", 60)
+
+    def __init__(self):
+        self.collection = database.sync_db.block_timestamps
+        self._cache = LRUCache(maxsize=65_536)
+        # headers of blocks within REORG_DEPTH of head, never persisted
+        self._recent = TTLCache(maxsize=4096, ttl=self.RECENT_TTL)
+        # cachetools caches aren't thread-safe (even get reorders), this guards both
+        self._cache_lock = threading.Lock()
+        self._fill_lock = threading.Lock()
+        self._fill_thread: Optional[threading.Thread] = None
+        # last block covered by the sample index
+        self._filled_until = 0
+
+    @ttl_cache(ttl=12)
+    def _head(self) -> int:
+        return w3.eth.block_number
+
+    def _is_final(self, block_number: int) -> bool:
+        return block_number <= self._head() - self.REORG_DEPTH
+
+    @staticmethod
+    def _fetch_header(block_number: int) -> dict:
+        block = w3.eth.get_block(block_number)
+        return {
+            "_id"        : block.number,
+            "timestamp"  : block.timestamp,
+            "hash"       : block.hash.hex(),
+            "parent_hash": block.parentHash.hex()
+        }
+
+    def _store(self, headers: list[dict]) -> None:
+        headers = [h for h in headers if self._is_final(h["_id"])]
+        if not headers:
+            return
+
+        # make sure the parents we already know about are still part of the canonical chain
+        parents = {h["_id"] - 1: h["parent_hash"] for h in headers}
+        for doc in self.collection.find({"_id": {"$in": list(parents)}}, {"hash": 1}):
+            if doc["hash"] != parents[doc["_id"]]:
+                log.warning(f"Stored hash for block {doc['_id']} is not canonical, invalidating")
+                self.invalidate(doc["_id"])
+
+        self.collection.bulk_write([
+            UpdateOne({"_id": h["_id"]}, {"$set": h}, upsert=True) for h in headers
+        ], ordered=False)
+        with self._cache_lock:
+            for h in headers:
+                self._cache[h["_id"]] = h["timestamp"]
+
+    def invalidate(self, from_block: int) -> None:
+        """Drop all stored entries at or above from_block, e.g. after a reorg"""
+        log.info(f"Invalidating block timestamps from block {from_block}")
+        self.collection.delete_many({"_id": {"$gte": from_block}})
+        with self._cache_lock:
+            for block_number in [b for b in self._cache.keys() if b >= from_block]:
+                self._cache.pop(block_number, None)
+            for block_number in [b for b in self._recent.keys() if b >= from_block]:
+                self._recent.pop(block_number, None)
+
+    def _get_recent(self, block_number: int) -> Optional[dict]:
+        with self._cache_lock:
+            header = self._recent.get(block_number)
+            parent = self._recent.get(block_number - 1)
+            if header and parent and (parent["hash"] != header["parent_hash"]):
+                # one of the two has been reorged out, fetch again
+                log.debug(f"Cached header for block {block_number} doesn't match its parent, dropping")
+                self._recent.pop(block_number, None)
+                self._recent.pop(block_number - 1, None)
+                return None
+            return header
+
+    def _set_recent(self, header: dict) -> None:
+        block_number = header["_id"]
+        with self._cache_lock:
+            self._recent[block_number] = header
+            child = self._recent.get(block_number + 1)
+            if child and (child["parent_hash"] != header["hash"]):
+                self._recent.pop(block_number + 1, None)
+
+    def block_to_ts(self, block_number: int) -> int:
+        with self._cache_lock:
+            ts = self._cache.get(block_number)
+        if ts is not None:
+            return ts
+
+        if doc := self.collection.find_one({"_id": block_number}, {"timestamp": 1}):
+            with self._cache_lock:
+                self._cache[block_number] = doc["timestamp"]
+            return doc["timestamp"]
+
+        if header := self._get_recent(block_number):
+            return header["timestamp"]
+
+        header = self._fetch_header(block_number)
+        if self._is_final(block_number):
+            self._store([header])
+        else:
+            self._set_recent(header)
+        return header["timestamp"]
+
+    def _closest_indexed(self, target_ts: int, direction: int) -> Optional[tuple[int, int]]:
+        ts_filter = {"$lte": target_ts} if direction == pymongo.DESCENDING else {"$gte": target_ts}
+        doc = self.collection.find_one(
+            {"timestamp": ts_filter},
+            {"timestamp": 1},
+            sort=[("timestamp", direction)]
+        )
+        return (doc["_id"], doc["timestamp"]) if doc else None
+
+    def ts_to_block(self, target_ts: int) -> int:
+        log.debug(f"Looking for block at timestamp {target_ts}")
+
+        if target_ts < self.block_to_ts(1):
+            # genesis block doesn't have a timestamp
+            return 0
+
+        head = self._head() - 1
+        lo, lo_ts = self._closest_indexed(target_ts, pymongo.DESCENDING) or (1, self.block_to_ts(1))
+        hi, hi_ts = self._closest_indexed(target_ts, pymongo.ASCENDING) or (head, self.block_to_ts(head))
+        if hi > head:
+            hi, hi_ts = head, self.block_to_ts(head)
+
+        if lo_ts == target_ts:
+            return lo
+        if hi_ts <= target_ts:
+            return hi
+
+        # interpolation search between the closest known blocks, falling back to
+        # bisection whenever a step doesn't at least halve the search interval
+        bisect = False
+        while hi - lo > 1:
+            width = hi - lo
+            if bisect:
+                guess = (lo + hi) // 2
+            else:
+                guess = lo + (target_ts - lo_ts) * (hi - lo) // (hi_ts - lo_ts)
+            guess = min(max(guess, lo + 1), hi - 1)
+
+            ts = self.block_to_ts(guess)
+            if ts == target_ts:
+                log.debug(f"Exact match: block {guess} @ {ts}")
+                return guess
+            elif ts < target_ts:
+                lo, lo_ts = guess, ts
+            else:
+                hi, hi_ts = guess, ts
+
+            bisect = (hi - lo) > (width // 2)
+
+        # hi == lo + 1, pick whichever is closer to the target
+        block = hi if abs(hi_ts - target_ts) < abs(lo_ts - target_ts) else lo
+        log.debug(f"Closest match: block {block} @ {self.block_to_ts(block)}")
+        return block
+
+    def start_fill(self) -> None:
+        """Start the background thread that fills the sample index and tops it up every FILL_INTERVAL"""
+        with self._fill_lock:
+            if self._fill_thread and self._fill_thread.is_alive():
+                return
+            self._fill_thread = threading.Thread(target=self._fill_loop, name="block_time_fill", daemon=True)
+            self._fill_thread.start()
+
+    def _fill_loop(self) -> None:
+        while True:
+            self._fill()
+            time.sleep(self.FILL_INTERVAL)
+
+    def _fill(self) -> None:
+        try:
+            last_final = self._head() - self.REORG_DEPTH
+            # after the initial fill only the blocks finalized since the last run need samples
+            first = self._filled_until - (self._filled_until - 1) % self.SAMPLE_STRIDE if self._filled_until else 1
+            samples = set(range(first, last_final + 1, self.SAMPLE_STRIDE)) | {last_final}
+            known = set(self.collection.distinct("_id", {"_id": {"$in": list(samples)}}))
+            missing = sorted(samples - known)
+            if not missing:
+                self._filled_until = last_final
+                return
+
+            log.info(f"Filling block timestamp index with {len(missing)} samples")
+            with ThreadPoolExecutor(max_workers=8) as executor:
+                for i in range(0, len(missing), self.FILL_BATCH_SIZE):
+                    batch = missing[i:i + self.FILL_BATCH_SIZE]
+                    self._store(list(executor.map(self._fetch_header, batch)))
+            self._filled_until = last_final
+            log.info("Block timestamp index filled")
+        except Exception:
+            log.exception("Failed to fill block timestamp index")
+
+
+block_time_index = BlockTimeIndex()
+
+
 def block_to_ts(block_number: int) -> int:
-    return w3.eth.get_block(block_number).timestamp
+    return block_time_index.block_to_ts(block_number)
+
 
-@cache
 def ts_to_block(target_ts: int) -> int:
-    log.debug(f"Looking for block at timestamp {target_ts}")
-    if target_ts < block_to_ts(1):
-        # genesis block doesn't have a timestamp
-        return 0
-
-    lo = 1
-    hi = w3.eth.block_number - 1
-    
-    # simple binary search over block numbers
-    while lo < hi:
-        mid = math.ceil((lo + hi) / 2)
-        ts = block_to_ts(mid)
-
-        if ts < target_ts:
-            lo = mid
-        elif ts > target_ts:
-            hi = mid - 1
-        elif ts == target_ts:
-            log.debug(f"Exact match: block {mid} @ {ts}")
-            return mid
-
-    # l == r, highest block number below target
-    block = hi
-    if abs(block_to_ts(block + 1) - target_ts) < abs(block_to_ts(block) - target_ts):
-        block += 1
-        
-    log.debug(f"Closest match: block {block} @ {block_to_ts(block)}")
-    return block
+    return block_time_index.ts_to_block(target_ts)
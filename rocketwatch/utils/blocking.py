@@ -0,0 +1,21 @@
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, TypeVar
+
+from utils.cfg import cfg
+
+T = TypeVar("T")
+
+# shared, bounded pool for sync code (web3, requests, pymongo) called from async handlers
+executor = ThreadPoolExecutor(
+    max_workers=cfg.get("modules.blocking_workers", 16),
+    thread_name_prefix="blocking"
+)
+
+
+async def run_blocking(fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Run a sync function in the shared executor instead of inline on the event loop"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, functools.partial(fn, *args, **kwargs))
+
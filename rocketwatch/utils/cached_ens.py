@@ -1,5 +1,7 @@
 import logging
+import threading
 from typing import Optional
+from cachetools import TTLCache
 from cachetools.func import ttl_cache
 
 from ens import ENS
@@ -13,15 +15,54 @@ log.setLevel(cfg["log_level"])
 
 
 class CachedEns:
+    # ENS ReverseRecords helper, resolves (and forward-verifies) many reverse records in one call
+    REVERSE_RECORDS_ADDRESS = "0x3671aE578E63FdF66ad4F3E12CC0c0d71Ac7510C"
+    REVERSE_RECORDS_ABI = [{
+        "inputs"         : [{"internalType": "address[]", "name": "addresses", "type": "address[]"}],
+        "name"           : "getNames",
+        "outputs"        : [{"internalType": "string[]", "name": "r", "type": "string[]"}],
+        "stateMutability": "view",
+        "type"           : "function"
+    }]
+
     def __init__(self):
         self.ens = ENS.from_web3(mainnet_w3)
+        self.reverse_records = mainnet_w3.eth.contract(
+            address=self.REVERSE_RECORDS_ADDRESS, abi=self.REVERSE_RECORDS_ABI
+        )
+        self._names = TTLCache(maxsize=4096, ttl=300)
+        self._names_lock = threading.Lock()
 
     @ttl_cache(ttl=300)
     def get_name(self, address: ChecksumAddress) -> Optional[str]:
         log.debug(f"Retrieving ENS name for {address}")
         return self.ens.name(address)
 
+    def get_names(self, addresses: list[ChecksumAddress]) -> dict[ChecksumAddress, Optional[str]]:
+        """Reverse resolve all addresses, names that aren't cached yet are fetched in a single call"""
+        with self._names_lock:
+            names = {a: self._names[a] for a in addresses if a in self._names}
+        missing = list(dict.fromkeys(a for a in addresses if a not in names))
+        if not missing:
+            return names
+
+        log.debug(f"Retrieving ENS names for {len(missing)} addresses")
+        try:
+            fetched = [n or None for n in self.reverse_records.functions.getNames(missing).call()]
+        except Exception:
+            log.exception("Batched ENS lookup failed, falling back to individual lookups")
+            fetched = [self.get_name(a) for a in missing]
+
+        with self._names_lock:
+            for address, name in zip(missing, fetched):
+                self._names[address] = name
+                names[address] = name
+        return names
+
     @ttl_cache(ttl=300)
     def resolve_name(self, name: str) -> Optional[ChecksumAddress]:
         log.debug(f"Resolving ENS name {name}")
         return self.ens.address(name)
+
+
+ens = CachedEns()
@@ -0,0 +1,105 @@
+import logging
+import threading
+from collections import defaultdict
+from typing import Optional
+
+import pymongo
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
+from pymongo import monitoring
+from pymongo.database import Database as SyncDatabase
+
+from utils.cfg import cfg
+
+log = logging.getLogger("database")
+log.setLevel(cfg["log_level"])
+
+
+class CommandLatencyListener(monitoring.CommandListener):
+    """Keeps per-command latency totals and logs commands slower than the threshold"""
+    def __init__(self, slow_threshold_ms: float):
+        self.slow_threshold_ms = slow_threshold_ms
+        self._lock = threading.Lock()
+        # command name -> [count, total ms, max ms, failures]
+        self._stats: dict[str, list] = defaultdict(lambda: [0, 0.0, 0.0, 0])
+
+    def _record(self, event, failed: bool) -> None:
+        duration_ms = event.duration_micros / 1000
+        with self._lock:
+            stats = self._stats[event.command_name]
+            stats[0] += 1
+            stats[1] += duration_ms
+            stats[2] = max(stats[2], duration_ms)
+            stats[3] += failed
+        if duration_ms >= self.slow_threshold_ms:
+            log.warning(f"Slow database command {event.command_name} took {duration_ms:.0f}ms")
+
+    def started(self, event: monitoring.CommandStartedEvent) -> None:
+        pass
+
+    def succeeded(self, event: monitoring.CommandSucceededEvent) -> None:
+        self._record(event, failed=False)
+
+    def failed(self, event: monitoring.CommandFailedEvent) -> None:
+        self._record(event, failed=True)
+
+    def get_stats(self) -> dict[str, dict]:
+        with self._lock:
+            return {
+                name: {"count": count, "avg_ms": total / count, "max_ms": max_ms, "failures": failures}
+                for name, (count, total, max_ms, failures) in self._stats.items()
+            }
+
+
+class Database:
+    """
+    Process-wide MongoDB clients: one async client for cogs and one sync client for code
+    that runs in executors, sharing tuned connection pools and a latency monitor.
+    """
+    def __init__(self, uri: str, *, max_pool_size: int = 50, min_pool_size: int = 0, slow_command_ms: float = 500):
+        self.uri = uri
+        self.pool_options = {"maxPoolSize": max_pool_size, "minPoolSize": min_pool_size}
+        self.latency = CommandLatencyListener(slow_command_ms)
+        self._lock = threading.Lock()
+        self._async_client: Optional[AsyncIOMotorClient] = None
+        self._sync_client: Optional[pymongo.MongoClient] = None
+
+    @property
+    def async_client(self) -> AsyncIOMotorClient:
+        with self._lock:
+            if self._async_client is None:
+                self._async_client = AsyncIOMotorClient(
+                    self.uri, event_listeners=[self.latency], **self.pool_options
+                )
+            return self._async_client
+
+    @property
+    def sync_client(self) -> pymongo.MongoClient:
+        with self._lock:
+            if self._sync_client is None:
+                self._sync_client = pymongo.MongoClient(
+                    self.uri, event_listeners=[self.latency], **self.pool_options
+                )
+            return self._sync_client
+
+    @property
+    def db(self) -> AsyncIOMotorDatabase:
+        return self.async_client.rocketwatch
+
+    @property
+    def sync_db(self) -> SyncDatabase:
+        return self.sync_client.rocketwatch
+
+    def close(self) -> None:
+        with self._lock:
+            for client in (self._async_client, self._sync_client):
+                if client is not None:
+                    client.close()
+            self._async_client = self._sync_client = None
+
+
+database = Database(
+    cfg["mongodb.uri"],
+    max_pool_size=cfg.get("mongodb.max_pool_size", 50),
+    min_pool_size=cfg.get("mongodb.min_pool_size", 0),
+    slow_command_ms=cfg.get("mongodb.slow_command_ms", 500)
+)
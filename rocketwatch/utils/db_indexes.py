@@ -0,0 +1,70 @@
+import logging
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ASCENDING, DESCENDING, IndexModel
+
+from utils.cfg import cfg
+
+log = logging.getLogger("db_indexes")
+log.setLevel(cfg["log_level"])
+
+# every index the bot relies on, by collection. names of pre-existing indexes are kept as is,
+# since recreating an index under a different name fails
+INDEXES: dict[str, list[IndexModel]] = {
+    "event_queue": [
+        # pending events per channel in send order, unsent events are a tiny prefix of the index
+        IndexModel([("message_id", ASCENDING), ("channel_id", ASCENDING), ("score", ASCENDING)]),
+        # latest stored event when catching up
+        IndexModel([("block_number", DESCENDING)]),
+        IndexModel("time_seen")
+    ],
+    "state_messages": [
+        IndexModel("channel_id")
+    ],
+    "minipools": [
+        IndexModel("validator", name="validator_2"),
+        IndexModel("address")
+    ],
+    "minipools_new": [
+        IndexModel("address"),
+        IndexModel("pubkey"),
+        IndexModel("validator_index")
+    ],
+    "node_operators_new": [
+        IndexModel("address")
+    ],
+    "proposals": [
+        IndexModel("validator"),
+        IndexModel("slot", unique=True)
+    ],
+    "sync_committee_latest": [
+        IndexModel("validator", unique=True),
+        IndexModel("index", unique=True)
+    ],
+    "sync_committee_next": [
+        IndexModel("validator", unique=True),
+        IndexModel("index", unique=True)
+    ],
+    "block_timestamps": [
+        IndexModel("timestamp")
+    ],
+    "event_images": [
+        # images are content-addressed and shared between events, drop them once no recent event uses them
+        IndexModel("time_seen", expireAfterSeconds=cfg.get("events.image_retention_days", 14) * 24 * 60 * 60)
+    ],
+    "karma": [
+        IndexModel("user"),
+        IndexModel("issuer")
+    ]
+}
+
+
+async def ensure_indexes(db: AsyncIOMotorDatabase) -> None:
+    """Create all declared indexes, existing ones are left untouched"""
+    for collection, indexes in INDEXES.items():
+        try:
+            names = await db[collection].create_indexes(indexes)
+            log.debug(f"Ensured indexes {names} on {collection}")
+        except Exception:
+            log.exception(f"Failed to ensure indexes on {collection}")
+    log.info(f"Ensured indexes on {len(INDEXES)} collections")
@@ -1,4 +1,3 @@
-import contextlib
 import datetime
 import logging
 import math
@@ -14,7 +13,8 @@ from etherscan_labels import Addresses
 
 from strings import _
 from utils import solidity
-from utils.cached_ens import CachedEns
+from utils.address_profile import AddressProfile, resolve_address_profiles, get_address_profile
+from utils.cached_ens import ens
 from utils.cfg import cfg
 from utils.readable import cl_explorer_url, advanced_tnx_url, s_hex
 from utils.rocketpool import rp
@@ -23,8 +23,6 @@ from utils.shared_w3 import w3
 from utils.retry import retry
 from utils.block_time import block_to_ts
 
-ens = CachedEns()
-
 log = logging.getLogger("embeds")
 log.setLevel(cfg["log_level"])
 
@@ -102,6 +100,12 @@ def el_explorer_url(
         # sanitize address
         url = f"{cfg['execution_layer.explorer']}/address/{target}"
         target = w3.toChecksumAddress(target)
+        try:
+            profile = get_address_profile(target, block)
+        except Exception:
+            # names are cosmetic, a failed lookup must not break the embed
+            log.exception(f"Failed to resolve address profile for {target}")
+            profile = AddressProfile.unresolved(target)
 
         # rocketscan url stuff
         rocketscan_chains = {
@@ -112,10 +116,10 @@ def el_explorer_url(
         if cfg["rocketpool.chain"] in rocketscan_chains:
             rocketscan_url = rocketscan_chains[cfg["rocketpool.chain"]]
 
-            if rp.call("rocketMinipoolManager.getMinipoolExists", target, block=block):
+            if profile.is_minipool:
                 url = f"{rocketscan_url}/minipool/{target}"
-            elif rp.call("rocketNodeManager.getNodeExists", target, block=block):
-                if rp.call("rocketNodeManager.getSmoothingPoolRegistrationState", target, block=block) and prefix != -1:
+            elif profile.is_node:
+                if profile.in_smoothing_pool and prefix != -1:
                     prefix += ":cup_with_straw:"
                 url = f"{rocketscan_url}/node/{target}"
 
@@ -123,12 +127,12 @@ def el_explorer_url(
         if not name and (n := _(n_key)) != n_key:
             name = n
 
-        if not name and (member_id := rp.call("rocketDAONodeTrusted.getMemberID", target, block=block)):
+        if not name and (member_id := profile.odao_member_id):
             if prefix != -1:
                 prefix += "🔮"
             name = member_id
 
-        if not name and (member_id := rp.call("rocketDAOSecurity.getMemberID", target, block=block)):
+        if not name and (member_id := profile.security_member_id):
             if prefix != -1:
                 prefix += "🔒"
             name = member_id
@@ -148,37 +152,24 @@ def el_explorer_url(
                 name = a.name
         if not name:
             # not an odao member, try to get their ens
-            name = ens.get_name(target)
+            name = profile.ens_name
 
-        if code := w3.eth.get_code(target):
+        if profile.has_code:
             if prefix != -1:
                 prefix += "📄"
-            if (
-                    not name
-                    and w3.keccak(text=code.hex()).hex()
-                    in cfg["other.mev_hashes"]
-            ):
+            if not name and profile.code_hash in cfg["other.mev_hashes"]:
                 name = "MEV Bot Contract"
-            if not name:
-                with contextlib.suppress(Exception):
-                    c = w3.eth.contract(address=target, abi=[{"inputs"         : [],
-                                                              "name"           : "name",
-                                                              "outputs"        : [{"internalType": "string",
-                                                                                   "name"        : "",
-                                                                                   "type"        : "string"}],
-                                                              "stateMutability": "view",
-                                                              "type"           : "function"}])
-                    n = c.functions.name().call()
-                    # make sure nobody is trying to inject a custom link, as there was a guy that made the name of his contract
-                    # 'RocketSwapRouter](https://etherscan.io/search?q=0x16d5a408e807db8ef7c578279beeee6b228f1c1c)[',
-                    # in an attempt to get people to click on his contract
-
-                    # first, if the name has a link in it, we ignore it
-                    if any(keyword in n.lower() for keyword in
-                           ["http", "discord", "airdrop", "telegram", "twitter", "youtube"]):
-                        log.warning(f"Contract {target} has a suspicious name: {n}")
-                    else:
-                        name = f"{discord.utils.remove_markdown(n, ignore_links=False)}*"
+            if not name and (n := profile.contract_name):
+                # make sure nobody is trying to inject a custom link, as there was a guy that made the name of his contract
+                # 'RocketSwapRouter](https://etherscan.io/search?q=0x16d5a408e807db8ef7c578279beeee6b228f1c1c)[',
+                # in an attempt to get people to click on his contract
+
+                # first, if the name has a link in it, we ignore it
+                if any(keyword in n.lower() for keyword in
+                       ["http", "discord", "airdrop", "telegram", "twitter", "youtube"]):
+                    log.warning(f"Contract {target} has a suspicious name: {n}")
+                else:
+                    name = f"{discord.utils.remove_markdown(n, ignore_links=False)}*"
     else:
         # transaction_hash
         url = f"{cfg['execution_layer.explorer']}/tx/{target}"
@@ -194,6 +185,14 @@ def el_explorer_url(
 
 
 def prepare_args(args):
+    # resolve all addresses up front so el_explorer_url only hits the cache
+    addresses = [v for v in args.values() if str(v).startswith("0x") and w3.isAddress(v)]
+    if addresses:
+        try:
+            resolve_address_profiles(addresses)
+        except Exception:
+            log.exception("Failed to prefetch address profiles")
+
     for arg_key, arg_value in list(args.items()):
         # store raw value
         args[f"{arg_key}_raw"] = arg_value
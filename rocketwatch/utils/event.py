@@ -7,6 +7,7 @@ from discord.ext import commands
 from eth_typing import BlockNumber
 
 from utils.shared_w3 import w3
+from utils.blocking import run_blocking
 from utils.cfg import cfg
 from utils.embeds import Embed
 from utils.image import Image
@@ -33,10 +34,16 @@ class EventPlugin(commands.Cog):
         self.bot = bot
         self.rate_limit = rate_limit
         self.lookback_distance: int = cfg["events.lookback_distance"]
-        self.last_served_block = w3.eth.get_block(cfg["events.genesis"]).number - 1
+        # resolved in warm_up
+        self.last_served_block: BlockNumber = BlockNumber(0)
         self._pending_block = self.last_served_block
         self._last_run = datetime.now() - rate_limit
 
+    async def warm_up(self) -> None:
+        genesis = await run_blocking(w3.eth.get_block, cfg["events.genesis"])
+        self.last_served_block = genesis.number - 1
+        self._pending_block = self.last_served_block
+
     def start_tracking(self, block: BlockNumber) -> None:
         self.last_served_block = block - 1
 
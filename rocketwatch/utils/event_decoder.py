@@ -0,0 +1,105 @@
+from typing import Callable, Optional
+
+from eth_abi.decoding import ContextFramesBytesIO, TupleDecoder
+from eth_abi.registry import registry
+from eth_utils import event_abi_to_log_topic, to_checksum_address
+from hexbytes import HexBytes
+from web3._utils.abi import (
+    exclude_indexed_event_inputs,
+    get_abi_input_names,
+    get_indexed_event_inputs,
+    map_abi_data,
+    normalize_event_input_types
+)
+from web3._utils.events import get_event_abi_types_for_decoding
+from web3._utils.normalizers import BASE_RETURN_NORMALIZERS
+from web3.datastructures import AttributeDict
+from web3.exceptions import LogTopicError, MismatchedABI
+from web3.types import ABIEvent, EventData, LogReceipt
+
+
+def _get_normalizer(abi_type: str) -> Optional[Callable]:
+    if abi_type == "address":
+        return to_checksum_address
+    if "address" in abi_type:
+        return lambda value: map_abi_data(BASE_RETURN_NORMALIZERS, [abi_type], [value])[0]
+    return None
+
+
+class EventDecoder:
+    """
+    Decoder for a single event ABI with the eth-abi decoders for its topics and data
+    resolved up front. Produces the same output as ContractEvent.process_log.
+    """
+    def __init__(self, event_abi: ABIEvent):
+        self.name = event_abi["name"]
+        self.topic = HexBytes(event_abi_to_log_topic(event_abi))
+        # same type resolution as web3's get_event_data, indexed dynamic values are only stored as their hash
+        topic_inputs = get_indexed_event_inputs(event_abi)
+        data_inputs = exclude_indexed_event_inputs(event_abi)
+        self.topic_args = list(zip(
+            get_abi_input_names(ABIEvent({"inputs": topic_inputs})),
+            get_event_abi_types_for_decoding(normalize_event_input_types(topic_inputs))
+        ))
+        self.data_args = list(zip(
+            get_abi_input_names(ABIEvent({"inputs": data_inputs})),
+            get_event_abi_types_for_decoding(normalize_event_input_types(data_inputs))
+        ))
+
+        self._topic_decoders = [registry.get_decoder(abi_type) for _, abi_type in self.topic_args]
+        self._data_decoder = TupleDecoder(decoders=[registry.get_decoder(abi_type) for _, abi_type in self.data_args])
+        self._normalizers = {
+            name: normalizer for name, abi_type in self.topic_args + self.data_args
+            if (normalizer := _get_normalizer(abi_type))
+        }
+
+    def decode(self, event_log: LogReceipt) -> EventData:
+        topics = event_log["topics"]
+        if not topics or HexBytes(topics[0]) != self.topic:
+            raise MismatchedABI("The event signature did not match the provided ABI")
+        if len(topics) != len(self.topic_args) + 1:
+            raise LogTopicError(f"Expected {len(self.topic_args)} log topics.  Got {len(topics) - 1}")
+
+        values = {
+            name: decoder(ContextFramesBytesIO(HexBytes(topic)))
+            for (name, _), decoder, topic in zip(self.topic_args, self._topic_decoders, topics[1:])
+        }
+        data_values = self._data_decoder(ContextFramesBytesIO(HexBytes(event_log["data"])))
+        values.update(zip((name for name, _ in self.data_args), data_values))
+
+        for name, normalizer in self._normalizers.items():
+            values[name] = normalizer(values[name])
+
+        return AttributeDict.recursive({
+            "args"            : values,
+            "event"           : self.name,
+            "logIndex"        : event_log["logIndex"],
+            "transactionIndex": event_log["transactionIndex"],
+            "transactionHash" : event_log["transactionHash"],
+            "address"         : event_log["address"],
+            "blockHash"       : event_log["blockHash"],
+            "blockNumber"     : event_log["blockNumber"]
+        })
+
+
+class EventDecoderRegistry:
+    """Event decoders keyed by (emitting address, topic0), built once when the event config is parsed"""
+    def __init__(self):
+        self._decoders: dict[tuple[str, HexBytes], EventDecoder] = {}
+
+    def __len__(self) -> int:
+        return len(self._decoders)
+
+    def register(self, address: str, event_abi: ABIEvent) -> EventDecoder:
+        decoder = EventDecoder(event_abi)
+        self._decoders[(to_checksum_address(address), decoder.topic)] = decoder
+        return decoder
+
+    def get(self, event_log: LogReceipt) -> Optional[EventDecoder]:
+        return self._decoders.get((event_log["address"], HexBytes(event_log["topics"][0])))
+
+    def decode(self, event_log: LogReceipt) -> Optional[EventData]:
+        """Decode a log, None if no decoder is registered for its address and topic"""
+        if (decoder := self.get(event_log)) is None:
+            return None
+        return decoder.decode(event_log)
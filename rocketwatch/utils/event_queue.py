@@ -0,0 +1,75 @@
+import hashlib
+import logging
+import pickle
+from datetime import datetime
+from io import BytesIO
+from typing import Optional
+
+from bson import Binary
+from discord import File
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from utils.blocking import run_blocking
+from utils.cfg import cfg
+from utils.embeds import Embed
+from utils.event import Event
+from utils.image import Image
+
+log = logging.getLogger("event_queue")
+log.setLevel(cfg["log_level"])
+
+# version 0: pickled Embed and Image objects, version 1: embed dicts and PNG images by hash
+FORMAT_VERSION = 1
+
+
+async def store_image(db: AsyncIOMotorDatabase, image: Image) -> str:
+    """Store an image once as compressed PNG and return its hash for use as a reference"""
+    # stored images are kept for a while, worth the slower optimized encode
+    data = await run_blocking(image.to_png, optimize=True)
+    image_id = hashlib.sha256(data).hexdigest()
+    # refreshing time_seen keeps reused images from expiring, see db_indexes
+    await db.event_images.update_one(
+        {"_id": image_id},
+        {"$setOnInsert": {"data": Binary(data)}, "$set": {"time_seen": datetime.now()}},
+        upsert=True
+    )
+    return image_id
+
+
+async def encode_event(db: AsyncIOMotorDatabase, event: Event, channel_id: int) -> dict:
+    """Event queue entry for an event, embed and images are kept in their serialized form until sent"""
+    return {
+        "_id": event.unique_id,
+        "version": FORMAT_VERSION,
+        "embed": event.embed.to_dict(),
+        "topic": event.topic,
+        "event_name": event.event_name,
+        "block_number": event.block_number,
+        "score": event.get_score(),
+        "time_seen": datetime.now(),
+        "image": await store_image(db, event.image) if event.image else None,
+        "thumbnail": await store_image(db, event.thumbnail) if event.thumbnail else None,
+        "channel_id": channel_id,
+        "message_id": None
+    }
+
+
+def decode_embed(entry: dict) -> Optional[Embed]:
+    if not (serialized := entry.get("embed")):
+        return None
+    if entry.get("version", 0) < 1:
+        # queued before the format change
+        return pickle.loads(serialized)
+    return Embed.from_dict(serialized)
+
+
+async def load_image_file(db: AsyncIOMotorDatabase, entry: dict, key: str, file_name: str) -> Optional[File]:
+    if not (reference := entry.get(key)):
+        return None
+    if entry.get("version", 0) < 1:
+        return pickle.loads(reference).to_file(file_name)
+    if not (doc := await db.event_images.find_one({"_id": reference})):
+        log.warning(f"Image {reference} of event {entry['_id']} not found")
+        return None
+    # the stored PNG is sent as is, without decoding it
+    return File(BytesIO(doc["data"]), file_name)
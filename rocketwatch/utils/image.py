@@ -15,11 +15,13 @@ class Image:
     def __init__(self, image: PillowImage.Image):
         self.__img = image
 
-    def to_file(self, name: str) -> File:
+    def to_png(self, optimize: bool = False) -> bytes:
         buffer = BytesIO()
-        self.__img.save(buffer, format="png")
-        buffer.seek(0)
-        return File(buffer, name)
+        self.__img.save(buffer, format="png", optimize=optimize)
+        return buffer.getvalue()
+
+    def to_file(self, name: str) -> File:
+        return File(BytesIO(self.to_png()), name)
 
 
 class Font(str, Enum):
@@ -0,0 +1,62 @@
+import importlib
+import logging
+import time
+import types
+
+from utils.cfg import cfg
+
+log = logging.getLogger("lazy_import")
+log.setLevel(cfg["log_level"])
+
+
+class LazyModule(types.ModuleType):
+    """Stand-in for a module that is only imported on first attribute access"""
+    def __init__(self, name: str):
+        super().__init__(name)
+        self.__dict__["_module"] = None
+        self.__dict__["import_time"] = None
+
+    def _load(self) -> types.ModuleType:
+        if (module := self.__dict__["_module"]) is None:
+            start = time.perf_counter()
+            module = importlib.import_module(self.__name__)
+            self.__dict__["import_time"] = time.perf_counter() - start
+            self.__dict__["_module"] = module
+            log.info(f"Imported {self.__name__} on first use in {self.import_time:.2f}s")
+        return module
+
+    @property
+    def is_loaded(self) -> bool:
+        return self.__dict__["_module"] is not None
+
+    def __getattr__(self, attr: str):
+        return getattr(self._load(), attr)
+
+    def __dir__(self) -> list[str]:
+        return dir(self._load())
+
+
+_modules: dict[str, LazyModule] = {}
+
+
+def lazy_import(name: str) -> LazyModule:
+    """Module proxy for name, shared by all importers"""
+    if name not in _modules:
+        _modules[name] = LazyModule(name)
+    return _modules[name]
+
+
+def prewarm() -> None:
+    """Import all lazily imported modules, meant to run in the background once the bot is up"""
+    start = time.perf_counter()
+    for name, module in list(_modules.items()):
+        try:
+            module._load()
+        except Exception:
+            log.exception(f"Failed to prewarm {name}")
+    log.info(f"Prewarmed {len(_modules)} lazy imports in {time.perf_counter() - start:.2f}s")
+
+
+def get_import_times() -> dict[str, float | None]:
+    """Import duration of every lazy module, None for modules that haven't been imported yet"""
+    return {name: module.import_time for name, module in _modules.items()}
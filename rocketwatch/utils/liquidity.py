@@ -1,5 +1,6 @@
 import math
 import logging
+import threading
 from collections import OrderedDict
 from abc import ABC, abstractmethod
 from dataclasses import dataclass
@@ -9,6 +10,7 @@ import aiohttp
 import numpy as np
 
 from eth_typing import ChecksumAddress, HexStr
+from web3.contract import ContractFunction
 
 from utils.cfg import cfg
 from utils.retry import retry_async
@@ -19,12 +21,13 @@ log.setLevel(cfg["log_level"])
 
 
 class Liquidity:
-    def __init__(self, price: float, depth_fn: Callable[[float], float]):
+    def __init__(self, price: float, depth_fn: Callable[[np.ndarray], np.ndarray]):
         self.price = price
         self.__depth_fn = depth_fn
 
-    def depth_at(self, price: float) -> float:
-        return self.__depth_fn(price)
+    def depth_at(self, prices: np.ndarray | float) -> np.ndarray:
+        """Depth at every given price, evaluated in one vectorized pass"""
+        return self.__depth_fn(np.asarray(prices, dtype=float))
 
 
 class Exchange(ABC):
@@ -93,26 +96,23 @@ class CEX(Exchange, ABC):
             log.warning(f"Empty order book")
             return None
 
-        bid_prices = np.array(list(bids.keys()))
-        bid_liquidity = np.cumsum([p * bids[p] for p in bids])
-
-        ask_prices = np.array(list(asks.keys()))
-        ask_liquidity = np.cumsum([p * asks[p] for p in asks])
+        bid_prices = np.fromiter(bids.keys(), dtype=float)
+        ask_prices = np.fromiter(asks.keys(), dtype=float)
+        # cumulative depth with a leading zero, so index i is the depth of the first i levels
+        bid_levels = np.concatenate(([0.0], np.cumsum(bid_prices * np.fromiter(bids.values(), dtype=float))))
+        ask_levels = np.concatenate(([0.0], np.cumsum(ask_prices * np.fromiter(asks.values(), dtype=float))))
+        # bids are sorted descending, negate them for searchsorted
+        neg_bid_prices = -bid_prices
 
         max_bid = float(bid_prices[0])
         min_ask = float(ask_prices[0])
         price = (max_bid + min_ask) / 2
 
-        def depth_at(_price: float) -> float:
-            if max_bid < _price < min_ask:
-                return 0
-
-            if _price <= max_bid:
-                i = int(np.searchsorted(-bid_prices, -_price, "right"))
-                return float(bid_liquidity[min(i, len(bid_liquidity)) - 1])
-            else:
-                i = int(np.searchsorted(ask_prices, _price, "right"))
-                return float(ask_liquidity[min(i, len(ask_liquidity)) - 1])
+        def depth_at(_prices: np.ndarray) -> np.ndarray:
+            # prices between the best bid and ask match no ask level and end up at 0
+            bid_depth = bid_levels[np.searchsorted(neg_bid_prices, -_prices, "right")]
+            ask_depth = ask_levels[np.searchsorted(ask_prices, _prices, "right")]
+            return np.where(_prices <= max_bid, bid_depth, ask_depth)
 
         return Liquidity(price, depth_at)
 
@@ -586,8 +586,9 @@ class ERC20Token:
     def __init__(self, address: ChecksumAddress):
         self.address = address
         contract = rp.assemble_contract("ERC20", address, mainnet=True)
-        self.symbol: str = contract.functions.symbol().call()
-        self.decimals: int = contract.functions.decimals().call()
+        symbol, decimals = rp.multicall3([contract.functions.symbol(), contract.functions.decimals()], mainnet=True)
+        self.symbol: str = symbol
+        self.decimals: int = decimals
 
     def __str__(self) -> str:
         return self.symbol
@@ -646,11 +647,12 @@ class BalancerV2(DEX):
             balance_norm = 10 ** (self.token_1.decimals - self.token_0.decimals)
             price = balance_norm * balance_0 / balance_1
 
+            invariant = float(balance_0 * balance_1)
+
             # assume equal weights and liquidity in token 0 for now
-            def depth_at(_price: float) -> float:
-                invariant = balance_0 * balance_1
-                new_balance_0 = math.sqrt(_price * invariant / balance_norm)
-                return abs(new_balance_0 - balance_0) / (10 ** self.token_0.decimals)
+            def depth_at(_prices: np.ndarray) -> np.ndarray:
+                new_balance_0 = np.sqrt(_prices * invariant / balance_norm)
+                return np.abs(new_balance_0 - balance_0) / (10 ** self.token_0.decimals)
 
             return Liquidity(price, depth_at)
 
@@ -670,21 +672,31 @@ class UniswapV3(DEX):
     TICK_WORD_SIZE = 256
     MIN_TICK = -887_272
     MAX_TICK = 887_272
+    # price range around the current price, in percent, that fetched tick data has to cover
+    DEPTH_PERCENTAGE = cfg.get("liquidity.uniswap.depth_percentage", 500)
 
     @staticmethod
     def tick_to_price(tick: int) -> float:
         return 1.0001 ** tick
 
     @staticmethod
-    def price_to_tick(price: float) -> float:
-        return math.log(price, 1.0001)
+    def price_to_tick(price: float | np.ndarray) -> float | np.ndarray:
+        return np.log(price) / math.log(1.0001)
 
     class Pool(DEX.LiquidityPool):
         def __init__(self, pool_address: ChecksumAddress):
             self.contract = rp.assemble_contract("UniswapV3Pool", pool_address, mainnet=True)
-            self.tick_spacing: int = self.contract.functions.tickSpacing().call()
-            self.token_0 = ERC20Token(self.contract.functions.token0().call())
-            self.token_1 = ERC20Token(self.contract.functions.token1().call())
+            functions = self.contract.functions
+            tick_spacing, token_0, token_1 = rp.multicall3(
+                [functions.tickSpacing(), functions.token0(), functions.token1()], mainnet=True
+            )
+            self.tick_spacing: int = tick_spacing
+            self.token_0 = ERC20Token(token_0)
+            self.token_1 = ERC20Token(token_1)
+
+        @property
+        def address(self) -> ChecksumAddress:
+            return self.contract.address
 
         def tick_to_word_and_bit(self, tick: int) -> tuple[int, int]:
             compressed = int(tick // self.tick_spacing)
@@ -695,35 +707,19 @@ class UniswapV3(DEX):
             bit_position = compressed % UniswapV3.TICK_WORD_SIZE
             return word_position, bit_position
 
-        def get_ticks_net_liquidity(self, ticks: list[int]) -> dict[int, int]:
-            return dict(zip(ticks, [
-                res.results[1] for res in rp.multicall.aggregate(
-                    [self.contract.functions.ticks(tick) for tick in ticks],
-                ).results
-            ]))
-
-        def get_initialized_ticks(self, current_tick: int) -> list[int]:
-            ticks = []
-            active_word, b = self.tick_to_word_and_bit(current_tick)
-
-            word_range = list(range(active_word - 5, active_word + 5))
-            bitmaps = [
-                res.results[0] for res in rp.multicall.aggregate(
-                    [self.contract.functions.tickBitmap(word) for word in word_range],
-                ).results
+        def get_word_range(self, current_tick: int) -> range:
+            """Bitmap words covering all prices within DEPTH_PERCENTAGE of the current price"""
+            tick_delta = math.log(1 + UniswapV3.DEPTH_PERCENTAGE / 100, 1.0001)
+            lower_word, _ = self.tick_to_word_and_bit(max(int(current_tick - tick_delta), UniswapV3.MIN_TICK))
+            upper_word, _ = self.tick_to_word_and_bit(min(int(current_tick + tick_delta), UniswapV3.MAX_TICK))
+            return range(lower_word, upper_word + 1)
+
+        def get_initialized_ticks(self, word: int, tick_bitmap: int) -> list[int]:
+            return [
+                (word * UniswapV3.TICK_WORD_SIZE + b) * self.tick_spacing
+                for b in range(UniswapV3.TICK_WORD_SIZE) if (tick_bitmap >> b) & 1
             ]
 
-            for word, tick_bitmap in zip(word_range, bitmaps):
-                if not tick_bitmap:
-                    continue
-
-                for b in range(UniswapV3.TICK_WORD_SIZE):
-                    if (tick_bitmap >> b) & 1:
-                        tick = (word * UniswapV3.TICK_WORD_SIZE + b) * self.tick_spacing
-                        ticks.append(tick)
-
-            return ticks
-
         def liquidity_to_tokens(self, liquidity: int, tick_lower: int, tick_upper: int) -> tuple[float, float]:
             sqrtp_lower = math.sqrt(UniswapV3.tick_to_price(tick_lower))
             sqrtp_upper = math.sqrt(UniswapV3.tick_to_price(tick_upper))
@@ -736,20 +732,25 @@ class UniswapV3(DEX):
 
             return balance_0, balance_1
 
+        def normalize_price(self, price: float) -> float:
+            return price * 10 ** (self.token_0.decimals - self.token_1.decimals)
+
         def get_price(self) -> float:
-            sqrt96x = self.contract.functions.slot0().call()[0]
-            return (sqrt96x ** 2) / (2 ** 192)
+            return pool_snapshots.get([self], depth=False)[self].price
 
         def get_normalized_price(self) -> float:
-            return self.get_price() * 10 ** (self.token_0.decimals - self.token_1.decimals)
+            return self.normalize_price(self.get_price())
 
         def get_liquidity(self) -> Optional[Liquidity]:
-            price = self.get_price()
-            initial_liquidity = self.contract.functions.liquidity().call()
+            return self.liquidity_from_snapshot(pool_snapshots.get([self])[self])
+
+        def liquidity_from_snapshot(self, snapshot: "PoolSnapshot") -> Optional[Liquidity]:
+            price = snapshot.price
+            initial_liquidity = snapshot.liquidity
 
             calculated_tick = UniswapV3.price_to_tick(price)
             current_tick = int(calculated_tick)
-            ticks = self.get_initialized_ticks(current_tick)
+            ticks = sorted(snapshot.net_liquidity)
 
             if not ticks:
                 log.warning("No liquidity found")
@@ -761,18 +762,18 @@ class UniswapV3(DEX):
                 cumulative_liquidity = 0
                 last_tick = calculated_tick
                 active_liquidity = initial_liquidity
-
-                net_liquidity: dict[int, int] = self.get_ticks_net_liquidity(_ticks)
                 liquidity = []
 
                 # assume liquidity in token 0 for now
                 for tick in _ticks:
+                    # the MIN_TICK / MAX_TICK bounds are not initialized
+                    net_liquidity = snapshot.net_liquidity.get(tick, 0)
                     if tick > last_tick:
                         liq_0, _ = self.liquidity_to_tokens(active_liquidity, last_tick, tick)
-                        active_liquidity += net_liquidity[tick]
+                        active_liquidity += net_liquidity
                     else:
                         liq_0, _ = self.liquidity_to_tokens(active_liquidity, tick, last_tick)
-                        active_liquidity -= net_liquidity[tick]
+                        active_liquidity -= net_liquidity
 
                     cumulative_liquidity += liq_0
                     liquidity.append(cumulative_liquidity)
@@ -790,33 +791,25 @@ class UniswapV3(DEX):
 
             balance_norm = 10 ** (self.token_1.decimals - self.token_0.decimals)
 
-            def depth_at(_price: float) -> float:
-                if _price <= 0:
-                    tick = UniswapV3.MAX_TICK
-                else:
-                    tick = -UniswapV3.price_to_tick(_price / balance_norm)
-
-                if tick <= calculated_tick:
-                    i = int(np.searchsorted(-np.array(ask_ticks), -tick, "right"))
-                    liq_ticks = ask_ticks
-                    liquidity_levels = ask_liquidity
-                else:
-                    i = int(np.searchsorted(np.array(bid_ticks), tick, "right"))
-                    liq_ticks = bid_ticks
-                    liquidity_levels = bid_liquidity
+            # ask ticks are descending, negate them so both sides are increasing for interp
+            neg_ask_ticks = -np.array(ask_ticks, dtype=float)
+            ask_levels = np.array(ask_liquidity, dtype=float)
+            bid_ticks = np.array(bid_ticks, dtype=float)
+            bid_levels = np.array(bid_liquidity, dtype=float)
 
-                if i >= len(liquidity_levels):
-                    return liquidity_levels[-1]
-
-                range_share = abs(tick - liq_ticks[i - 1]) / abs(liq_ticks[i] - liq_ticks[i - 1])
-                range_liquidity = abs(liquidity_levels[i] - liquidity_levels[i - 1])
+            def depth_at(_prices: np.ndarray) -> np.ndarray:
+                positive = _prices > 0
+                safe_prices = np.where(positive, _prices, balance_norm)
+                ticks = np.where(positive, -UniswapV3.price_to_tick(safe_prices / balance_norm), UniswapV3.MAX_TICK)
                 # linear interpolation should be fine since ticks are exponential
-                return liquidity_levels[i - 1] + range_share * range_liquidity
+                ask_depth = np.interp(-ticks, neg_ask_ticks, ask_levels)
+                bid_depth = np.interp(ticks, bid_ticks, bid_levels)
+                return np.where(ticks <= calculated_tick, ask_depth, bid_depth)
 
             return Liquidity(balance_norm / price, depth_at)
 
     def __init__(self, pools: list[ChecksumAddress]):
-        super().__init__([UniswapV3.Pool(pool) for pool in pools])
+        super().__init__([pool_snapshots.get_pool(pool) for pool in pools])
 
     def __str__(self) -> str:
         return "Uniswap"
@@ -824,3 +817,161 @@ class UniswapV3(DEX):
     @property
     def color(self) -> str:
         return "#A02C6C"
+
+    def get_liquidity(self) -> dict[Pool, Liquidity]:
+        # snapshot all pools together instead of one after the other
+        snapshots = pool_snapshots.get(self.pools)
+        pools = {}
+        for pool in self.pools:
+            if liq := pool.liquidity_from_snapshot(snapshots[pool]):
+                pools[pool] = liq
+        return pools
+
+
+@dataclass(frozen=True, slots=True)
+class PoolSnapshot:
+    block: int
+    sqrt_price_x96: int
+    tick: int
+    liquidity: int
+    # bitmaps by word and net liquidity by initialized tick, both empty without depth
+    bitmaps: dict[int, int]
+    net_liquidity: dict[int, int]
+    has_depth: bool
+
+    @property
+    def price(self) -> float:
+        return (self.sqrt_price_x96 ** 2) / (2 ** 192)
+
+
+class PoolSnapshotter:
+    """
+    Reads UniswapV3 pool state for a block in as few Multicall3 calls as possible, covering all requested
+    pools at once. The word window and ticks of a pool's previous snapshot are fetched speculatively next
+    to slot0, so refreshing pools whose price stayed within their window takes a single call.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pools: dict[ChecksumAddress, UniswapV3.Pool] = {}
+        self._snapshots: dict[ChecksumAddress, PoolSnapshot] = {}
+        # words and initialized ticks of the last depth snapshot, kept across price-only snapshots
+        self._windows: dict[ChecksumAddress, tuple[list[int], list[int]]] = {}
+
+    def get_pool(self, address: ChecksumAddress) -> UniswapV3.Pool:
+        with self._lock:
+            if pool := self._pools.get(address):
+                return pool
+        # set up outside the lock, a concurrent setup of the same pool is simply discarded
+        pool = UniswapV3.Pool(address)
+        with self._lock:
+            return self._pools.setdefault(address, pool)
+
+    def get(
+            self,
+            pools: list[UniswapV3.Pool],
+            depth: bool = True,
+            block: Optional[int] = None
+    ) -> dict[UniswapV3.Pool, PoolSnapshot]:
+        """Snapshots of all pools at block (default head), with tick data if depth is set"""
+        block = block or rp.get_head_block(mainnet=True)
+        # the lock only guards the cache, fetching happens outside so cheap price reads
+        # don't queue up behind a multi-round depth refresh
+        with self._lock:
+            snapshots = {pool: self._snapshots[pool.address] for pool in pools if self._is_cached(pool, block, depth)}
+            stale = [pool for pool in pools if pool not in snapshots]
+            windows = {pool.address: self._windows.get(pool.address, ([], [])) for pool in stale}
+
+        if stale:
+            fetched, new_windows = self._fetch(stale, block, depth, windows)
+            snapshots |= fetched
+            with self._lock:
+                for pool, snapshot in fetched.items():
+                    current = self._snapshots.get(pool.address)
+                    # don't replace newer or more complete snapshots stored in the meantime
+                    if (current is None) or (current.block, current.has_depth) < (snapshot.block, snapshot.has_depth):
+                        self._snapshots[pool.address] = snapshot
+                self._windows |= new_windows
+
+        return snapshots
+
+    def _is_cached(self, pool: UniswapV3.Pool, block: int, depth: bool) -> bool:
+        snapshot = self._snapshots.get(pool.address)
+        return (snapshot is not None) and (snapshot.block == block) and (snapshot.has_depth or not depth)
+
+    @staticmethod
+    def _get_function(pool: UniswapV3.Pool, kind: str, arg: Optional[int]) -> ContractFunction:
+        if kind == "bitmap":
+            return pool.contract.functions.tickBitmap(arg)
+        if kind == "tick":
+            return pool.contract.functions.ticks(arg)
+        return getattr(pool.contract.functions, kind)()
+
+    def _fetch(
+            self,
+            pools: list[UniswapV3.Pool],
+            block: int,
+            depth: bool,
+            windows: dict[ChecksumAddress, tuple[list[int], list[int]]]
+    ) -> tuple[dict[UniswapV3.Pool, PoolSnapshot], dict[ChecksumAddress, tuple[list[int], list[int]]]]:
+        state: dict[UniswapV3.Pool, dict] = {pool: {} for pool in pools}
+        bitmaps: dict[UniswapV3.Pool, dict[int, int]] = {pool: {} for pool in pools}
+        net_liquidity: dict[UniswapV3.Pool, dict[int, int]] = {pool: {} for pool in pools}
+
+        requests = [(pool, kind, None) for pool in pools for kind in ("slot0", "liquidity")]
+        if depth:
+            for pool in pools:
+                words, ticks = windows[pool.address]
+                requests += [(pool, "bitmap", word) for word in words]
+                requests += [(pool, "tick", tick) for tick in ticks]
+
+        rounds = 0
+        while requests:
+            rounds += 1
+            results = rp.multicall3(
+                [self._get_function(*request) for request in requests], block=block, mainnet=True
+            )
+            for (pool, kind, arg), result in zip(requests, results):
+                if kind == "bitmap":
+                    bitmaps[pool][arg] = result
+                elif kind == "tick":
+                    net_liquidity[pool][arg] = result[1]
+                else:
+                    state[pool][kind] = result
+
+            requests = []
+            if not depth:
+                break
+
+            # extend windows that don't cover the current price range and fetch newly initialized ticks
+            for pool in pools:
+                for word in pool.get_word_range(state[pool]["slot0"][1]):
+                    if word not in bitmaps[pool]:
+                        requests.append((pool, "bitmap", word))
+                        continue
+                    for tick in pool.get_initialized_ticks(word, bitmaps[pool][word]):
+                        if tick not in net_liquidity[pool]:
+                            requests.append((pool, "tick", tick))
+
+        snapshots, new_windows = {}, {}
+        for pool in pools:
+            sqrt_price_x96, tick = state[pool]["slot0"][:2]
+            words = pool.get_word_range(tick) if depth else range(0)
+            pool_bitmaps = {word: bitmaps[pool][word] for word in words}
+            ticks = [t for word, bitmap in pool_bitmaps.items() for t in pool.get_initialized_ticks(word, bitmap)]
+            if depth:
+                new_windows[pool.address] = (list(words), ticks)
+            snapshots[pool] = PoolSnapshot(
+                block=block,
+                sqrt_price_x96=sqrt_price_x96,
+                tick=tick,
+                liquidity=state[pool]["liquidity"],
+                bitmaps=pool_bitmaps,
+                net_liquidity={t: net_liquidity[pool][t] for t in ticks},
+                has_depth=depth
+            )
+
+        log.debug(f"Snapshotted {len(pools)} pools at block {block} in {rounds} multicalls")
+        return snapshots, new_windows
+
+
+pool_snapshots = PoolSnapshotter()
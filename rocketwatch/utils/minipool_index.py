@@ -0,0 +1,146 @@
+import logging
+import threading
+from typing import Iterable, Optional
+
+import numpy as np
+
+from utils.cfg import cfg
+from utils.database import database
+
+log = logging.getLogger("minipool_index")
+log.setLevel(cfg["log_level"])
+
+
+class MinipoolIndex:
+    """
+    In-memory validator index -> minipool table, loaded from minipools_new by the warm-up
+    of the cogs using it (or on first use) and kept up to date by NodeTask. Checking whether a validator belongs to a minipool
+    is a single array lookup instead of a database round trip.
+    """
+    PROJECTION = {"_id": 0, "address": 1, "validator_index": 1, "node_operator": 1, "pubkey": 1, "node_fee": 1}
+
+    def __init__(self):
+        self.collection = database.sync_db.minipools_new
+        self._lock = threading.RLock()
+        self._loaded = False
+        # validator index -> row, -1 for validators that aren't minipools
+        self._rows = np.full(0, -1, dtype=np.int32)
+        # row -> column value
+        self._validators = np.empty(0, dtype=np.int64)
+        self._node_fees = np.empty(0, dtype=np.float64)
+        self._addresses: list[str] = []
+        self._node_operators: list[Optional[str]] = []
+        self._pubkeys: list[Optional[str]] = []
+        self._rows_by_address: dict[str, int] = {}
+
+    def load(self) -> None:
+        """Load the table if it isn't yet, blocking; async code should run this in a warm-up"""
+        if self._loaded:
+            return
+        with self._lock:
+            if self._loaded:
+                return
+            self.refresh()
+            self._loaded = True
+            log.info(f"Loaded {len(self._addresses)} minipools into validator index")
+
+    @staticmethod
+    def _grow(array: np.ndarray, size: int, fill) -> np.ndarray:
+        if size <= len(array):
+            return array
+        grown = np.full(max(size, 2 * len(array)), fill, dtype=array.dtype)
+        grown[:len(array)] = array
+        return grown
+
+    def _add_row(self, address: str, validator_index: int) -> int:
+        row = len(self._addresses)
+        self._rows_by_address[address] = row
+        self._addresses.append(address)
+        self._node_operators.append(None)
+        self._pubkeys.append(None)
+        self._validators = self._grow(self._validators, row + 1, -1)
+        self._node_fees = self._grow(self._node_fees, row + 1, np.nan)
+        self._validators[row] = validator_index
+        return row
+
+    def update(self, minipools: Iterable[dict]) -> None:
+        """
+        Apply (partial) minipool documents keyed by address. Minipools without a row
+        are only added once their validator index is known.
+        """
+        with self._lock:
+            for minipool in minipools:
+                validator_index = minipool.get("validator_index")
+                row = self._rows_by_address.get(minipool["address"])
+                if row is None:
+                    if validator_index is None:
+                        continue
+                    row = self._add_row(minipool["address"], validator_index)
+
+                if validator_index is not None:
+                    self._rows = self._grow(self._rows, validator_index + 1, -1)
+                    self._rows[validator_index] = row
+                    self._validators[row] = validator_index
+                if "node_operator" in minipool:
+                    self._node_operators[row] = minipool["node_operator"]
+                if "pubkey" in minipool:
+                    self._pubkeys[row] = minipool["pubkey"]
+                if "node_fee" in minipool:
+                    node_fee = minipool["node_fee"]
+                    self._node_fees[row] = np.nan if node_fee is None else node_fee
+
+    def refresh(self, query: Optional[dict] = None) -> None:
+        """Reload all minipools matching query from the database"""
+        query = (query or {}) | {"validator_index": {"$ne": None}}
+        self.update(self.collection.find(query, self.PROJECTION))
+
+    def _entry(self, row: int) -> dict:
+        return {
+            "validator"    : int(self._validators[row]),
+            "address"      : self._addresses[row],
+            "node_operator": self._node_operators[row],
+            "pubkey"       : self._pubkeys[row]
+        }
+
+    def __contains__(self, validator_index: int) -> bool:
+        self.load()
+        rows = self._rows
+        return 0 <= validator_index < len(rows) and rows[validator_index] >= 0
+
+    def __len__(self) -> int:
+        self.load()
+        return len(self._addresses)
+
+    def get(self, validator_index: int) -> Optional[dict]:
+        if validator_index not in self:
+            return None
+        return self._entry(int(self._rows[validator_index]))
+
+    def get_many(self, validator_indices: Iterable[int]) -> dict[int, dict]:
+        """Return entries for all indices that belong to minipools"""
+        self.load()
+        indices = np.fromiter(validator_indices, dtype=np.int64)
+        rows = self._rows
+        indices = indices[(indices >= 0) & (indices < len(rows))]
+        matched = rows[indices]
+        return {
+            int(validator_index): self._entry(int(row))
+            for validator_index, row in zip(indices[matched >= 0], matched[matched >= 0])
+        }
+
+    def get_validator_mask(self) -> np.ndarray:
+        """Boolean array over validator indices, True for validators that belong to minipools"""
+        self.load()
+        return self._rows >= 0
+
+    def get_node_fees(self) -> np.ndarray:
+        """Node fees of all minipools with a known fee, ordered by validator index"""
+        self.load()
+        with self._lock:
+            size = len(self._addresses)
+            validators, node_fees = self._validators[:size], self._node_fees[:size]
+            node_fees = node_fees[np.argsort(validators, kind="stable")]
+        return node_fees[~np.isnan(node_fees)]
+
+
+minipool_index = MinipoolIndex()
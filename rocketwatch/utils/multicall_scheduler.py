@@ -0,0 +1,121 @@
+import asyncio
+import logging
+import time
+from typing import Any
+
+from multicall import Call
+
+from utils.cfg import cfg
+from utils.rocketpool import rp
+
+log = logging.getLogger("multicall_scheduler")
+log.setLevel(cfg["log_level"])
+
+
+class MulticallScheduler:
+    """
+    Runs large lists of multicall Calls as shards that are dispatched concurrently.
+
+    Shard sizes adapt per label: shards that finish well under the target latency grow,
+    slow shards shrink and a failed shard (typically out of gas or an oversized response)
+    is split in half and only that shard is retried.
+    """
+    def __init__(
+            self,
+            *,
+            concurrency: int = 8,
+            shard_size: int = 1_000,
+            min_shard_size: int = 50,
+            max_shard_size: int = 5_000,
+            target_latency: float = 2.0,
+            retries: int = 3
+    ):
+        self.concurrency = concurrency
+        self.default_shard_size = shard_size
+        self.min_shard_size = min_shard_size
+        self.max_shard_size = max_shard_size
+        self.target_latency = target_latency
+        self.retries = retries
+        self._shard_sizes: dict[str, int] = {}
+
+    def _adapt(self, label: str, shard_len: int, duration: float) -> None:
+        size = self._shard_sizes.get(label, self.default_shard_size)
+        if duration < self.target_latency / 2 and shard_len >= size:
+            size = int(size * 1.5)
+        elif duration > self.target_latency:
+            size = int(size * 0.75)
+        self._shard_sizes[label] = max(self.min_shard_size, min(size, self.max_shard_size))
+
+    def _shrink(self, label: str, shard_len: int) -> None:
+        size = min(self._shard_sizes.get(label, self.default_shard_size), shard_len // 2)
+        self._shard_sizes[label] = max(self.min_shard_size, size)
+
+    async def _run_shard(
+            self,
+            shard: list[Call],
+            require_success: bool,
+            label: str,
+            semaphore: asyncio.Semaphore,
+            timings: list[float],
+            attempt: int = 0
+    ) -> dict[Any, Any]:
+        try:
+            async with semaphore:
+                start = time.perf_counter()
+                result = await rp.multicall2(shard, require_success=require_success)
+                duration = time.perf_counter() - start
+        except Exception as err:
+            if attempt >= self.retries:
+                log.error(f"{label}: shard of {len(shard)} calls failed after {attempt + 1} attempts")
+                raise
+            log.warning(f"{label}: shard of {len(shard)} calls failed ({err!r}), retrying")
+            self._shrink(label, len(shard))
+            await asyncio.sleep(0.5 * 2 ** attempt)
+            if len(shard) <= self.min_shard_size:
+                return await self._run_shard(shard, require_success, label, semaphore, timings, attempt + 1)
+            # split and only retry the calls of this shard
+            mid = len(shard) // 2
+            halves = await asyncio.gather(
+                self._run_shard(shard[:mid], require_success, label, semaphore, timings, attempt + 1),
+                self._run_shard(shard[mid:], require_success, label, semaphore, timings, attempt + 1)
+            )
+            return halves[0] | halves[1]
+
+        timings.append(duration)
+        self._adapt(label, len(shard), duration)
+        log.debug(f"{label}: shard of {len(shard)} calls took {duration:.2f}s")
+        return result
+
+    async def run(self, calls: list[Call], *, require_success: bool = True, label: str = "multicall") -> dict[Any, Any]:
+        """Execute all calls and return the merged results, same as a single multicall2"""
+        if not calls:
+            return {}
+
+        size = self._shard_sizes.get(label, self.default_shard_size)
+        shards = [calls[i:i + size] for i in range(0, len(calls), size)]
+        semaphore = asyncio.Semaphore(self.concurrency)
+        timings: list[float] = []
+
+        start = time.perf_counter()
+        results = await asyncio.gather(*[
+            self._run_shard(shard, require_success, label, semaphore, timings) for shard in shards
+        ])
+        duration = time.perf_counter() - start
+
+        log.info(
+            f"{label}: {len(calls)} calls in {len(timings)} shards took {duration:.2f}s "
+            f"(slowest shard {max(timings):.2f}s, next shard size {self._shard_sizes[label]})"
+        )
+        merged = {}
+        for result in results:
+            merged |= result
+        return merged
+
+
+multicall_scheduler = MulticallScheduler(
+    concurrency=cfg.get("execution_layer.multicall.concurrency", 8),
+    shard_size=cfg.get("execution_layer.multicall.shard_size", 1_000),
+    max_shard_size=cfg.get("execution_layer.multicall.max_shard_size", 5_000),
+    target_latency=cfg.get("execution_layer.multicall.target_latency", 2.0),
+    retries=cfg.get("execution_layer.multicall.retries", 3)
+)
@@ -1,20 +1,30 @@
+import copy
 import logging
 import os
+import threading
 from pathlib import Path
 from typing import Optional
 
 from bidict import bidict
-from cachetools import cached, FIFOCache
+from cachetools import cached, FIFOCache, LRUCache
+from cachetools.keys import hashkey
 from cachetools.func import ttl_cache
+from hexbytes import HexBytes
 from multicall import Call, Multicall
 from multicall.constants import MULTICALL3_ADDRESSES
-from web3.exceptions import ContractLogicError
+from web3._utils.abi import get_abi_output_types, map_abi_data
+from web3._utils.contracts import encode_transaction_data
+from web3._utils.normalizers import BASE_RETURN_NORMALIZERS
+from web3.contract import ContractFunction
+from web3.exceptions import BadFunctionCallOutput, ContractLogicError
+from web3.types import RPCEndpoint
 from web3_multicall import Multicall as Web3Multicall
 
 from utils import solidity
 from utils.cfg import cfg
+from utils.database import database
 from utils.readable import decode_abi
-from utils.shared_w3 import w3, mainnet_w3, historical_w3
+from utils.shared_w3 import w3, mainnet_w3, historical_w3, async_rpc, mainnet_async_rpc, historical_async_rpc
 from utils.time_debug import timerun_async
 
 log = logging.getLogger("rocketpool")
@@ -28,9 +38,27 @@ class RocketPool:
     ADDRESS_CACHE = FIFOCache(maxsize=2048)
     ABI_CACHE = FIFOCache(maxsize=2048)
     CONTRACT_CACHE = FIFOCache(maxsize=2048)
+    # call results at explicit, final block numbers never change (barring deep reorgs)
+    CALL_CACHE = LRUCache(maxsize=cfg.get("rocketpool.call_cache.size", 65_536))
+    # blocks this far below head are considered safe from reorgs
+    REORG_DEPTH = 64
+    # seconds for which a resolved "latest" block number is reused
+    HEAD_TTL = cfg.get("rocketpool.call_cache.head_ttl", 2)
+    # aggregate3((address,bool,bytes)[])
+    AGGREGATE3_SELECTOR = bytes.fromhex("82ad56cb")
+    # compressed ABIs are large, fetch them in smaller batches to stay below the eth_call gas cap
+    ABI_BATCH_SIZE = 20
 
     def __init__(self):
         self.addresses = bidict()
+        # compressed ABIs from rocketStorage, by contract name
+        self._compressed_abis: dict[str, str] = {}
+        self._call_cache_lock = threading.Lock()
+        # results for the current head, keyed by mainnet flag, dropped whenever the head moves
+        self._head_blocks: dict[bool, int] = {}
+        self._head_results: dict[bool, dict] = {False: {}, True: {}}
+        self.call_cache_hits = 0
+        self.call_cache_misses = 0
         self.multicall = Web3Multicall(w3.eth, MULTICALL3_ADDRESSES[w3.eth.chain_id])
         self.flush()
 
@@ -39,7 +67,9 @@ class RocketPool:
         self.CONTRACT_CACHE.clear()
         self.ABI_CACHE.clear()
         self.ADDRESS_CACHE.clear()
+        self.clear_call_cache()
         self.addresses = bidict()
+        self._compressed_abis = {}
         self._init_contract_addresses()
 
     def _init_contract_addresses(self) -> None:
@@ -51,29 +81,114 @@ class RocketPool:
 
         log.info("Indexing Rocket Pool contracts...")
         # generate list of all file names with the .sol extension from the rocketpool submodule
-        for path in Path("contracts/rocketpool/contracts/contract").rglob('*.sol'):
-            # append to list but ensure that the first character is lowercase
-            file_name = path.stem
-            contract = file_name[0].lower() + file_name[1:]
-            try:
-                self.get_address_by_name(contract)
-            except Exception:
-                log.warning(f"Skipping {contract} in function list generation")
-                continue
+        # and ensure that the first character is lowercase
+        names = [
+            path.stem[0].lower() + path.stem[1:]
+            for path in Path("contracts/rocketpool/contracts/contract").rglob('*.sol')
+        ]
+        try:
+            self._discover_contracts([name for name in names if name not in self.addresses])
+        except Exception:
+            log.exception("Batched contract discovery failed, falling back to individual lookups")
+            for contract in names:
+                try:
+                    self.get_address_by_name(contract)
+                except Exception:
+                    log.warning(f"Skipping {contract} in function list generation")
+                    continue
 
         try:
             cs_dir, cs_prefix = "ConstellationDirectory", "Constellation"
-            self.addresses |= {
-                f"{cs_prefix}.SuperNodeAccount": self.call(f"{cs_dir}.getSuperNodeAddress"),
-                f"{cs_prefix}.OperatorDistributor": self.call(f"{cs_dir}.getOperatorDistributorAddress"),
-                f"{cs_prefix}.Whitelist": self.call(f"{cs_dir}.getWhitelistAddress"),
-                f"{cs_prefix}.ETHVault": self.call(f"{cs_dir}.getWETHVaultAddress"),
-                f"{cs_prefix}.RPLVault": self.call(f"{cs_dir}.getRPLVaultAddress"),
-                "WETH": self.call(f"{cs_dir}.getWETHAddress")
-            }
+            directory = self.get_contract_by_name(cs_dir)
+            cs_addresses = self.multicall3([
+                directory.functions.getSuperNodeAddress(),
+                directory.functions.getOperatorDistributorAddress(),
+                directory.functions.getWhitelistAddress(),
+                directory.functions.getWETHVaultAddress(),
+                directory.functions.getRPLVaultAddress(),
+                directory.functions.getWETHAddress()
+            ])
+            self.addresses |= dict(zip([
+                f"{cs_prefix}.SuperNodeAccount",
+                f"{cs_prefix}.OperatorDistributor",
+                f"{cs_prefix}.Whitelist",
+                f"{cs_prefix}.ETHVault",
+                f"{cs_prefix}.RPLVault",
+                "WETH"
+            ], cs_addresses))
         except NoAddressFound:
             log.warning("Failed to find address for Constellation contracts")
 
+    @staticmethod
+    def _storage_key(prefix: str, name: str) -> bytes:
+        return w3.soliditySha3(["string", "string"], [prefix, name])
+
+    def _discover_contracts(self, names: list[str]) -> None:
+        """
+        Resolve the addresses of all named contracts in one Multicall3 call. ABIs are taken from
+        the persisted contract table unless the contract's address changed since it was stored.
+        """
+        storage = self.get_contract_by_name("rocketStorage")
+        block = w3.eth.block_number
+        results = self.multicall3(
+            [storage.functions.getAddress(self._storage_key("contract.address", name)) for name in names],
+            block=block,
+            require_success=False
+        )
+        table = self._load_contract_table(storage.address)
+
+        stale = []
+        for name, address in zip(names, results):
+            if not address or not w3.toInt(hexstr=address):
+                log.warning(f"Skipping {name} in function list generation")
+                continue
+            try:
+                self.addresses[name] = address
+            except Exception:
+                log.warning(f"Skipping {name}, address {address} is already registered")
+                continue
+            entry = table.get(name, {})
+            if entry.get("address") == address and entry.get("abi"):
+                self._compressed_abis[name] = entry["abi"]
+            elif not os.path.exists(self._get_abi_path(name)):
+                stale.append(name)
+
+        # only new or upgraded contracts need their ABI fetched again
+        for i in range(0, len(stale), self.ABI_BATCH_SIZE):
+            batch = stale[i:i + self.ABI_BATCH_SIZE]
+            abis = self.multicall3(
+                [storage.functions.getString(self._storage_key("contract.abi", name)) for name in batch],
+                block=block,
+                require_success=False
+            )
+            self._compressed_abis |= {name: abi for name, abi in zip(batch, abis) if abi}
+
+        log.info(f"Resolved {len(self.addresses)} contract addresses, fetched {len(stale)} ABIs at block {block}")
+        self._save_contract_table(storage.address, block, {
+            name: {"address": self.addresses[name], "abi": self._compressed_abis.get(name)}
+            for name in names if name in self.addresses
+        })
+
+    @staticmethod
+    def _load_contract_table(storage_address: str) -> dict[str, dict]:
+        try:
+            doc = database.sync_db.contract_addresses.find_one({"_id": storage_address})
+        except Exception:
+            log.exception("Failed to load persisted contract table")
+            return {}
+        return doc["contracts"] if doc else {}
+
+    @staticmethod
+    def _save_contract_table(storage_address: str, block: int, contracts: dict[str, dict]) -> None:
+        try:
+            database.sync_db.contract_addresses.replace_one(
+                {"_id": storage_address},
+                {"block": block, "contracts": contracts},
+                upsert=True
+            )
+        except Exception:
+            log.exception("Failed to persist contract table")
+
     @staticmethod
     def seth_sig(abi, function_name):
         # also handle tuple outputs, so `example(unit256)((unit256,unit256))` for example
@@ -103,7 +218,7 @@ class RocketPool:
 
     def uncached_get_address_by_name(self, name, block="latest"):
         log.debug(f"Retrieving address for {name} Contract")
-        sha3 = w3.soliditySha3(["string", "string"], ["contract.address", name])
+        sha3 = self._storage_key("contract.address", name)
         address = self.get_contract_by_name("rocketStorage", historical=block != "latest").functions.getAddress(sha3).call(block_identifier=block)
         if not w3.toInt(hexstr=address):
             raise NoAddressFound(f"No address found for {name} Contract")
@@ -143,21 +258,25 @@ class RocketPool:
         return self.uncached_get_abi_by_name(name)
 
     def uncached_get_abi_by_name(self, name):
+        if compressed_string := self._compressed_abis.get(name):
+            return decode_abi(compressed_string)
         log.debug(f"Retrieving abi for {name} Contract")
-        sha3 = w3.soliditySha3(["string", "string"], ["contract.abi", name])
+        sha3 = self._storage_key("contract.abi", name)
         compressed_string = self.get_contract_by_name("rocketStorage").functions.getString(sha3).call()
         if not compressed_string:
             raise Exception(f"No abi found for {name} Contract")
         return decode_abi(compressed_string)
 
-    @cached(cache=CONTRACT_CACHE)
-    def assemble_contract(self, name, address=None, historical=False, mainnet=False):
+    @staticmethod
+    def _get_abi_path(name: str) -> str:
         if name.startswith("Constellation."):
             short_name = name.removeprefix("Constellation.")
-            abi_path = f"./contracts/constellation/{short_name}.abi.json"
-        else:
-            abi_path = f"./contracts/{name}.abi.json"
+            return f"./contracts/constellation/{short_name}.abi.json"
+        return f"./contracts/{name}.abi.json"
 
+    @cached(cache=CONTRACT_CACHE)
+    def assemble_contract(self, name, address=None, historical=False, mainnet=False):
+        abi_path = self._get_abi_path(name)
         if os.path.exists(abi_path):
             with open(abi_path, "r") as f:
                 abi = f.read()
@@ -198,9 +317,171 @@ class RocketPool:
         contract = self.assemble_contract(name, address, historical, mainnet)
         return contract.functions[function](*args)
 
+    @ttl_cache(ttl=HEAD_TTL)
+    def get_head_block(self, mainnet: bool = False) -> int:
+        return (mainnet_w3 if mainnet else w3).eth.block_number
+
+    def _get_head_cache(self, mainnet: bool) -> tuple[int, dict]:
+        head = self.get_head_block(mainnet)
+        with self._call_cache_lock:
+            if self._head_blocks.get(mainnet) != head:
+                self._head_blocks[mainnet] = head
+                self._head_results[mainnet] = {}
+            return head, self._head_results[mainnet]
+
+    def clear_call_cache(self) -> None:
+        with self._call_cache_lock:
+            self.CALL_CACHE.clear()
+            self._head_blocks.clear()
+            self._head_results = {False: {}, True: {}}
+
+    def call_cache_info(self) -> dict[str, int]:
+        with self._call_cache_lock:
+            return {
+                "hits"        : self.call_cache_hits,
+                "misses"      : self.call_cache_misses,
+                "head_size"   : sum(len(results) for results in self._head_results.values()),
+                "history_size": len(self.CALL_CACHE)
+            }
+
     def call(self, path, *args, block="latest", address=None, mainnet=False):
+        if block == "latest":
+            # pin the call to the current head so the result can be cached for that block
+            block_number, cache = self._get_head_cache(mainnet)
+        elif isinstance(block, int):
+            head, head_cache = self._get_head_cache(mainnet)
+            # results for blocks that can still be reorged only live until the head moves
+            block_number, cache = block, (self.CALL_CACHE if block <= head - self.REORG_DEPTH else head_cache)
+        else:
+            # "pending", block hashes etc. are not cached
+            return self.uncached_call(path, *args, block=block, address=address, mainnet=mainnet)
+
+        key = hashkey(path, *args, block=block_number, address=address, mainnet=mainnet)
+        try:
+            with self._call_cache_lock:
+                result = cache[key]
+                self.call_cache_hits += 1
+            return self._copy_result(result)
+        except KeyError:
+            pass
+        except TypeError:
+            # unhashable arguments
+            return self.uncached_call(path, *args, block=block, address=address, mainnet=mainnet)
+
+        with self._call_cache_lock:
+            self.call_cache_misses += 1
+        result = self.uncached_call(
+            path, *args, block=block_number, address=address, mainnet=mainnet, historical=block != "latest"
+        )
+        with self._call_cache_lock:
+            cache[key] = self._copy_result(result)
+        return result
+
+    @staticmethod
+    def _copy_result(result):
+        # cached results are shared, callers get their own copy of anything mutable
+        if isinstance(result, (list, tuple, dict)):
+            return copy.deepcopy(result)
+        return result
+
+    def uncached_call(self, path, *args, block="latest", address=None, mainnet=False, historical=None):
         log.debug(f"Calling {path} (block={block})")
-        return self.get_function(path, *args, historical=block != "latest", address=address, mainnet=mainnet).call(block_identifier=block)
+        if historical is None:
+            historical = block != "latest"
+        function = self.get_function(path, *args, historical=historical, address=address, mainnet=mainnet)
+        return function.call(block_identifier=block)
+
+    @staticmethod
+    def _encode_call(function: ContractFunction) -> HexBytes:
+        return HexBytes(encode_transaction_data(
+            function.web3,
+            function.function_identifier,
+            function.contract_abi,
+            function.abi,
+            function.args,
+            function.kwargs
+        ))
+
+    @staticmethod
+    def _decode_output(function: ContractFunction, data: bytes):
+        output_types = get_abi_output_types(function.abi)
+        if output_types and not data:
+            raise BadFunctionCallOutput(f"Could not decode output of {function.fn_name}, received empty response")
+        output = function.web3.codec.decode_abi(output_types, data)
+        result = map_abi_data(BASE_RETURN_NORMALIZERS, output_types, output)
+        return result[0] if len(result) == 1 else result
+
+    @staticmethod
+    async def _eth_call(to: str, data: HexBytes, block="latest", mainnet=False) -> HexBytes:
+        if mainnet:
+            client = mainnet_async_rpc
+        elif block != "latest":
+            client = historical_async_rpc or async_rpc
+        else:
+            client = async_rpc
+
+        block_id = block if isinstance(block, str) else hex(block)
+        try:
+            result = await client.request(RPCEndpoint("eth_call"), [{"to": to, "data": data.hex()}, block_id])
+        except ValueError as err:
+            error = err.args[0] if err.args else None
+            if isinstance(error, dict) and "revert" in error.get("message", ""):
+                raise ContractLogicError(error["message"]) from err
+            raise
+        return HexBytes(result)
+
+    async def acall(self, path, *args, block="latest", address=None, mainnet=False):
+        """Async version of call, sends the eth_call through the shared aiohttp session"""
+        log.debug(f"Calling {path} asynchronously (block={block})")
+        function = self.get_function(path, *args, address=address, mainnet=mainnet)
+        data = await self._eth_call(function.address, self._encode_call(function), block, mainnet)
+        return self._decode_output(function, data)
+
+    def _encode_aggregate3(self, functions: list[ContractFunction], require_success: bool) -> HexBytes:
+        calls = [(function.address, not require_success, self._encode_call(function)) for function in functions]
+        return HexBytes(self.AGGREGATE3_SELECTOR + w3.codec.encode_abi(["(address,bool,bytes)[]"], [calls]))
+
+    def _decode_aggregate3(self, functions: list[ContractFunction], data: bytes, require_success: bool) -> list:
+        (results,) = w3.codec.decode_abi(["(bool,bytes)[]"], data)
+        decoded = []
+        for function, (success, return_data) in zip(functions, results):
+            if not success:
+                decoded.append(None)
+                continue
+            try:
+                decoded.append(self._decode_output(function, return_data))
+            except Exception:
+                # e.g. a call to an account without code "succeeds" with empty return data
+                if require_success:
+                    raise
+                decoded.append(None)
+        return decoded
+
+    def multicall3(
+            self,
+            functions: list[ContractFunction],
+            block="latest",
+            require_success=True,
+            historical=False,
+            mainnet=False
+    ) -> list:
+        """
+        Execute all functions in a single Multicall3 aggregate3 eth_call and return their
+        decoded results in order. Failed calls return None if require_success is False.
+        """
+        data = self._encode_aggregate3(functions, require_success)
+        if mainnet:
+            web3, address = mainnet_w3, MULTICALL3_ADDRESSES[1]
+        else:
+            web3, address = (historical_w3 if (historical and historical_w3) else w3), self.addresses["multicall3"]
+        result = web3.eth.call({"to": address, "data": data.hex()}, block)
+        return self._decode_aggregate3(functions, result, require_success)
+
+    async def amulticall(self, functions: list[ContractFunction], block="latest", require_success=True) -> list:
+        """Async version of multicall3"""
+        data = self._encode_aggregate3(functions, require_success)
+        result = await self._eth_call(self.addresses["multicall3"], data, block)
+        return self._decode_aggregate3(functions, result, require_success)
 
     def get_annual_rpl_inflation(self):
         inflation_per_interval = solidity.to_float(self.call("rocketTokenRPL.getInflationIntervalRate"))
@@ -215,17 +496,40 @@ class RocketPool:
         percentage = (value / 18_000_000) * 100
         return round(percentage, 2)
 
+    PRICE_POOLS = ("UniV3_USDC_ETH", "UniV3_rETH_ETH")
+
+    def _get_price_pool_snapshot(self, name: str) -> tuple:
+        from utils.liquidity import pool_snapshots
+        # read all price pools together, so one slot0 round trip per block serves every price
+        pools = {}
+        for pool_name in self.PRICE_POOLS:
+            try:
+                pools[pool_name] = pool_snapshots.get_pool(self.get_address_by_name(pool_name))
+            except Exception:
+                if pool_name == name:
+                    raise
+                log.warning(f"Failed to set up price pool {pool_name}")
+
+        pool = pools[name]
+        try:
+            snapshots = pool_snapshots.get(list(pools.values()), depth=False)
+        except Exception:
+            if len(pools) == 1:
+                raise
+            # another pool may be the culprit, don't let it break this price
+            log.warning(f"Failed to snapshot price pools together, reading {name} on its own")
+            snapshots = pool_snapshots.get([pool], depth=False)
+        return pool, snapshots[pool]
+
     @ttl_cache(ttl=60)
     def get_eth_usdc_price(self) -> float:
-        from utils.liquidity import UniswapV3
-        pool_address = self.get_address_by_name("UniV3_USDC_ETH")
-        return 1 / UniswapV3.Pool(pool_address).get_normalized_price()
+        pool, snapshot = self._get_price_pool_snapshot("UniV3_USDC_ETH")
+        return 1 / pool.normalize_price(snapshot.price)
 
     @ttl_cache(ttl=60)
     def get_reth_eth_price(self) -> Optional[float]:
-        from utils.liquidity import UniswapV3
-        pool_address = self.get_address_by_name("UniV3_rETH_ETH")
-        return UniswapV3.Pool(pool_address).get_normalized_price()
+        pool, snapshot = self._get_price_pool_snapshot("UniV3_rETH_ETH")
+        return pool.normalize_price(snapshot.price)
 
 
 rp = RocketPool()
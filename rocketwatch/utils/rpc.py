@@ -0,0 +1,244 @@
+import gzip
+import itertools
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+import aiohttp
+import requests
+from requests.adapters import HTTPAdapter
+from web3 import HTTPProvider
+from web3._utils.encoding import FriendlyJsonSerde
+from web3.types import RPCEndpoint, RPCResponse
+
+from utils.cfg import cfg
+
+log = logging.getLogger("rpc")
+log.setLevel(cfg["log_level"])
+
+# marks threads whose requests should be coalesced into JSON-RPC batches
+_batch_scope = threading.local()
+
+
+class BatchHTTPProvider(HTTPProvider):
+    """
+    HTTP provider with a tuned keep-alive connection pool and JSON-RPC array batching.
+
+    Requests made outside a RequestBatch are sent immediately. Requests made from
+    within a RequestBatch are queued and flushed as a single JSON-RPC array once
+    the batch window has passed or max_batch_size requests are pending.
+    """
+    def __init__(
+            self,
+            endpoint_uri: str,
+            request_kwargs: Optional[dict[str, Any]] = None,
+            *,
+            pool_size: int = 32,
+            compress: bool = False,
+            batch_window: float = 0.005,
+            max_batch_size: int = 100
+    ):
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size, pool_block=True)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        super().__init__(endpoint_uri, request_kwargs=request_kwargs, session=self.session)
+
+        self.compress = compress
+        self.batch_window = batch_window
+        self.max_batch_size = max_batch_size
+        self._serde = FriendlyJsonSerde()
+        self._lock = threading.Lock()
+        self._pending: list[tuple[dict, Future]] = []
+        self._flush_timer: Optional[threading.Timer] = None
+
+    def _post(self, payload: Any) -> Any:
+        data = self._serde.json_encode(payload).encode()
+        kwargs = self.get_request_kwargs()
+        if self.compress:
+            data = gzip.compress(data)
+            kwargs["headers"] = kwargs.get("headers", {}) | {"Content-Encoding": "gzip"}
+
+        response = self.session.post(self.endpoint_uri, data=data, **kwargs)
+        response.raise_for_status()
+        return self._serde.json_decode(response.text)
+
+    def _build_request(self, method: RPCEndpoint, params: Any) -> dict:
+        return {
+            "jsonrpc": "2.0",
+            "method" : method,
+            "params" : params or [],
+            "id"     : next(self.request_counter)
+        }
+
+    def make_request(self, method: RPCEndpoint, params: Any) -> RPCResponse:
+        if getattr(_batch_scope, "active", False):
+            return self._enqueue(self._build_request(method, params)).result()
+
+        self.logger.debug("Making request HTTP. URI: %s, Method: %s", self.endpoint_uri, method)
+        return self._post(self._build_request(method, params))
+
+    def make_batch_request(self, calls: list[tuple[RPCEndpoint, Any]]) -> list[RPCResponse]:
+        """Send all calls as one JSON-RPC array, responses are returned in call order"""
+        if not calls:
+            return []
+        return self._send_batch([self._build_request(method, params) for method, params in calls])
+
+    def _send_batch(self, requests_: list[dict]) -> list[RPCResponse]:
+        log.debug(f"Sending batch of {len(requests_)} requests to {self.endpoint_uri}")
+        responses = self._post(requests_)
+        if isinstance(responses, dict):
+            # some nodes answer a rejected batch with a single error object
+            return [responses | {"id": r["id"]} for r in requests_]
+
+        by_id = {response.get("id"): response for response in responses}
+        missing = {"error": {"code": -32603, "message": "Missing response in batch"}}
+        return [by_id.get(r["id"], missing | {"id": r["id"]}) for r in requests_]
+
+    def _enqueue(self, request: dict) -> Future:
+        future = Future()
+        with self._lock:
+            self._pending.append((request, future))
+            if len(self._pending) >= self.max_batch_size:
+                pending = self._take_pending()
+            else:
+                pending = None
+                if self._flush_timer is None:
+                    self._flush_timer = threading.Timer(self.batch_window, self._flush)
+                    self._flush_timer.daemon = True
+                    self._flush_timer.start()
+
+        if pending:
+            self._resolve(pending)
+        return future
+
+    def _take_pending(self) -> list[tuple[dict, Future]]:
+        # caller must hold self._lock
+        if self._flush_timer is not None:
+            self._flush_timer.cancel()
+            self._flush_timer = None
+        pending, self._pending = self._pending, []
+        return pending
+
+    def _flush(self) -> None:
+        with self._lock:
+            pending = self._take_pending()
+        if pending:
+            self._resolve(pending)
+
+    def _resolve(self, pending: list[tuple[dict, Future]]) -> None:
+        try:
+            responses = self._send_batch([request for request, _ in pending])
+        except Exception as err:
+            for _, future in pending:
+                future.set_exception(err)
+            return
+
+        for (_, future), response in zip(pending, responses):
+            future.set_result(response)
+
+
+class RequestBatch:
+    """
+    Context manager that runs submitted calls concurrently on exit, so that the
+    requests they issue through a BatchHTTPProvider share JSON-RPC batches.
+
+        with RequestBatch() as batch:
+            receipt = batch.submit(w3.eth.get_transaction_receipt, tx_hash)
+            exists = batch.submit(rp.call, "rocketMinipoolManager.getMinipoolExists", address)
+        receipt.result(), exists.result()
+    """
+    def __init__(self, max_workers: int = 16):
+        self.max_workers = max_workers
+        self._calls: list[tuple[Future, Callable, tuple, dict]] = []
+
+    def submit(self, fn: Callable, *args, **kwargs) -> Future:
+        future = Future()
+        self._calls.append((future, fn, args, kwargs))
+        return future
+
+    @staticmethod
+    def _run(future: Future, fn: Callable, args: tuple, kwargs: dict) -> None:
+        _batch_scope.active = True
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except Exception as err:
+            future.set_exception(err)
+        finally:
+            _batch_scope.active = False
+
+    def execute(self) -> None:
+        calls, self._calls = self._calls, []
+        if not calls:
+            return
+        with ThreadPoolExecutor(max_workers=min(len(calls), self.max_workers)) as executor:
+            for call in calls:
+                executor.submit(self._run, *call)
+
+    def __enter__(self) -> "RequestBatch":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        if exc_type is None:
+            self.execute()
+
+
+class AsyncRPCClient:
+    """
+    JSON-RPC client for use on the event loop. All requests to an endpoint share
+    one aiohttp session, and with it a single keep-alive connection pool.
+    """
+    def __init__(self, endpoint_uri: str, *, pool_size: int = 32, timeout: float = 60):
+        self.endpoint_uri = endpoint_uri
+        self.pool_size = pool_size
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._request_counter = itertools.count()
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        # created lazily so that the session is bound to the running loop
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.pool_size)
+            self._session = aiohttp.ClientSession(connector=connector, timeout=self.timeout)
+        return self._session
+
+    def _build_request(self, method: RPCEndpoint, params: Any) -> dict:
+        return {
+            "jsonrpc": "2.0",
+            "method" : method,
+            "params" : params or [],
+            "id"     : next(self._request_counter)
+        }
+
+    async def _post(self, payload: Any) -> Any:
+        async with self._get_session().post(self.endpoint_uri, json=payload) as response:
+            response.raise_for_status()
+            return await response.json(content_type=None)
+
+    async def request(self, method: RPCEndpoint, params: Any = None) -> Any:
+        """Send a single request and return its result, errors are raised as ValueError like in web3"""
+        log.debug(f"Making async request to {self.endpoint_uri}: {method}")
+        response = await self._post(self._build_request(method, params))
+        if "error" in response:
+            raise ValueError(response["error"])
+        return response["result"]
+
+    async def batch_request(self, calls: list[tuple[RPCEndpoint, Any]]) -> list[RPCResponse]:
+        """Send all calls as one JSON-RPC array, responses are returned in call order"""
+        if not calls:
+            return []
+
+        requests_ = [self._build_request(method, params) for method, params in calls]
+        log.debug(f"Sending async batch of {len(requests_)} requests to {self.endpoint_uri}")
+        responses = await self._post(requests_)
+        if isinstance(responses, dict):
+            return [responses | {"id": r["id"]} for r in requests_]
+
+        by_id = {response.get("id"): response for response in responses}
+        missing = {"error": {"code": -32603, "message": "Missing response in batch"}}
+        return [by_id.get(r["id"], missing | {"id": r["id"]}) for r in requests_]
+
+    async def close(self) -> None:
+        if self._session is not None:
+            await self._session.close()
@@ -4,26 +4,44 @@ import math
 import circuitbreaker
 import requests
 from requests import HTTPError, ConnectTimeout
-from web3 import Web3, HTTPProvider
+from web3 import Web3
 from web3.beacon import Beacon as Bacon
 from web3.middleware import geth_poa_middleware
 
 from utils.cfg import cfg
 from utils.retry import retry
+from utils.rpc import AsyncRPCClient, BatchHTTPProvider
 
 log = logging.getLogger("shared_w3")
 log.setLevel(cfg["log_level"])
 
-w3 = Web3(HTTPProvider(cfg['execution_layer.endpoint.current'], request_kwargs={'timeout': 60}))
+provider_kwargs = {
+    "pool_size"     : cfg.get("execution_layer.rpc.pool_size", 32),
+    "compress"      : cfg.get("execution_layer.rpc.compress", False),
+    "batch_window"  : cfg.get("execution_layer.rpc.batch_window", 0.005),
+    "max_batch_size": cfg.get("execution_layer.rpc.max_batch_size", 100)
+}
+
+w3 = Web3(BatchHTTPProvider(cfg['execution_layer.endpoint.current'], request_kwargs={'timeout': 60}, **provider_kwargs))
 mainnet_w3 = w3
 
 if cfg['rocketpool.chain'] != "mainnet":
-    mainnet_w3 = Web3(HTTPProvider(cfg['execution_layer.endpoint.mainnet']))
+    mainnet_w3 = Web3(BatchHTTPProvider(cfg['execution_layer.endpoint.mainnet'], **provider_kwargs))
     w3.middleware_onion.inject(geth_poa_middleware, layer=0)
 
 historical_w3 = None
 if "archive" in cfg['execution_layer.endpoint'].keys():
-    historical_w3 = Web3(HTTPProvider(cfg['execution_layer.endpoint.archive']))
+    historical_w3 = Web3(BatchHTTPProvider(cfg['execution_layer.endpoint.archive'], **provider_kwargs))
+
+# async counterparts for code running on the event loop
+async_rpc = AsyncRPCClient(cfg['execution_layer.endpoint.current'], pool_size=provider_kwargs["pool_size"])
+mainnet_async_rpc = async_rpc
+if cfg['rocketpool.chain'] != "mainnet":
+    mainnet_async_rpc = AsyncRPCClient(cfg['execution_layer.endpoint.mainnet'], pool_size=provider_kwargs["pool_size"])
+
+historical_async_rpc = None
+if historical_w3 is not None:
+    historical_async_rpc = AsyncRPCClient(cfg['execution_layer.endpoint.archive'], pool_size=provider_kwargs["pool_size"])
 
 endpoints = cfg["consensus_layer.endpoints"]
 tmp = []
@@ -92,6 +110,16 @@ for fallback_endpoint in reversed(endpoints):
             response.raise_for_status()
             return response.json()
 
+        def stream_validators(self, state_id: str) -> requests.Response:
+            """Full validators response for a state, the body is left unread for incremental parsing"""
+            url = self.base_url + f"/eth/v1/beacon/states/{state_id}/validators"
+            response = self.session.get(url, stream=True, timeout=(5, 300))
+            response.raise_for_status()
+            response.raw.decode_content = True
+            return response
+
 
     tmp.append(SuperBacon(fallback_endpoint))
 bacon = tmp[-1]
+# one client per endpoint in configured order, each falling back to the endpoints after it
+bacons = tmp[::-1]
@@ -0,0 +1,105 @@
+import io
+import logging
+from typing import IO, Callable, Optional
+
+import ijson
+import numpy as np
+
+from utils import solidity
+from utils.cfg import cfg
+
+log = logging.getLogger("validator_snapshot")
+log.setLevel(cfg["log_level"])
+
+
+class ValidatorSnapshot:
+    """
+    Compact columnar beacon state of a set of validators, sorted by validator index.
+
+    Built by incrementally parsing a full validators response, so the 1M+ entries of the
+    network never have to be held in memory at once. Two snapshots can be diffed with a
+    handful of array comparisons to find the validators whose state actually changed.
+    """
+    EPOCH_COLUMNS = ("activation_eligibility_epoch", "activation_epoch", "exit_epoch", "withdrawable_epoch")
+    INT_COLUMNS = ("balance", "effective_balance") + EPOCH_COLUMNS
+    COLUMNS = ("indices", "status", "slashed") + INT_COLUMNS
+
+    def __init__(self, indices: np.ndarray, status: np.ndarray, slashed: np.ndarray, **int_columns: np.ndarray):
+        self.indices = indices
+        self.status = status
+        self.slashed = slashed
+        for column in self.INT_COLUMNS:
+            setattr(self, column, int_columns[column])
+
+    def __len__(self) -> int:
+        return len(self.indices)
+
+    @classmethod
+    def from_stream(cls, stream: IO[bytes], is_tracked: Callable[[int], bool]) -> "ValidatorSnapshot":
+        """Parse a validators response body, keeping only validators accepted by is_tracked"""
+        rows = []
+        seen = 0
+        for item in ijson.items(stream, "data.item"):
+            seen += 1
+            index = int(item["index"])
+            if not is_tracked(index):
+                continue
+            validator = item["validator"]
+            rows.append((
+                index,
+                item["status"],
+                validator["slashed"],
+                int(item["balance"]),
+                int(validator["effective_balance"]),
+                *(int(validator[column]) for column in cls.EPOCH_COLUMNS)
+            ))
+        log.debug(f"Parsed {seen} validators, {len(rows)} tracked")
+
+        rows.sort(key=lambda row: row[0])
+        columns = list(zip(*rows)) or [()] * len(cls.COLUMNS)
+        return cls(
+            np.array(columns[0], dtype=np.int64),
+            np.array(columns[1], dtype=np.str_),
+            np.array(columns[2], dtype=np.bool_),
+            **{
+                column: np.array(values, dtype=np.uint64)
+                for column, values in zip(cls.INT_COLUMNS, columns[3:])
+            }
+        )
+
+    def to_bytes(self) -> bytes:
+        buffer = io.BytesIO()
+        np.savez_compressed(buffer, **{column: getattr(self, column) for column in self.COLUMNS})
+        return buffer.getvalue()
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "ValidatorSnapshot":
+        with np.load(io.BytesIO(data)) as arrays:
+            columns = {column: arrays[column] for column in cls.COLUMNS}
+        return cls(**columns)
+
+    def changed_indices(self, previous: Optional["ValidatorSnapshot"]) -> np.ndarray:
+        """Validator indices whose state differs from the previous snapshot, or that weren't part of it"""
+        if previous is None or not len(previous):
+            return self.indices
+
+        positions = np.minimum(np.searchsorted(previous.indices, self.indices), len(previous) - 1)
+        known = previous.indices[positions] == self.indices
+        changed = ~known
+        for column in ("status", "slashed") + self.INT_COLUMNS:
+            changed |= getattr(self, column) != getattr(previous, column)[positions]
+        return self.indices[changed]
+
+    def beacon_data(self, validator_index: int) -> dict:
+        """Beacon fields of a validator, in the shape stored on minipools_new"""
+        row = int(np.searchsorted(self.indices, validator_index))
+        epochs = {
+            column: int(getattr(self, column)[row]) if getattr(self, column)[row] < 2 ** 32 else None
+            for column in self.EPOCH_COLUMNS
+        }
+        return {
+            "status"           : str(self.status[row]),
+            "balance"          : solidity.to_float(int(self.balance[row]), 9),
+            "effective_balance": solidity.to_float(int(self.effective_balance[row]), 9),
+            "slashed"          : bool(self.slashed[row])
+        } | epochs